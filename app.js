@@ -6,6 +6,9 @@ const state = {
   showTranslation: loadTranslationPref(),
   questions: [],
   byId: new Map(),
+  glossary: null,
+  cards: null,
+  search: null,
   quizCurrent: null,
   examQueue: [],
   examIndex: 0,
@@ -52,6 +55,7 @@ async function init() {
   const allQuestions = await res.json();
   state.questions = allQuestions.filter(q => !(q.flags && q.flags.includes('page_missing_from_pdf')));
   state.questions.forEach((q) => state.byId.set(q.id, q));
+  [state.glossary, state.cards] = await Promise.all([loadGlossary().then(checkGlossary), loadCards()]);
   bindUI();
   startStudyClock();
   renderQuiz(nextQuizQuestion());
@@ -82,6 +86,7 @@ function bindUI() {
   el.reviewSearch.addEventListener('input', () => {
     registerInteraction();
     renderReview();
+    if (!state.search) loadSearchIndex().then(renderReview);
   });
 
   if (el.translationToggle) {
@@ -143,22 +148,17 @@ function renderQuestionCard(container, q, opts = {}) {
     return;
   }
 
-  const sec = `${q.exam} · ${q.section} T${q.teil} · #${q.number}`;
-  const options = (q.options || []).map((opt, i) => {
-    const label = String(opt);
-    const val = parseOptKey(label, i);
-    const tr = state.showTranslation ? optionTranslation(q, label) : '';
-    return `<button data-val="${escapeHtml(val)}">${escapeHtml(label)}${tr ? `<div class="translation-line">${escapeHtml(tr)}</div>` : ''}</button>`;
-  }).join('');
-
-  const questionEs = state.showTranslation ? (q.question_es || inferQuestionTranslation(q)) : '';
+  const c = cardFor(q) || buildCard(q);
+  const tr = state.showTranslation;
+  const options = c.options.map(([val, label, optTr]) =>
+    `<button data-val="${val}">${label}${tr && optTr ? `<div class="translation-line">${optTr}</div>` : ''}</button>`).join('');
 
   container.innerHTML = `
-    <div class="section-tag">${escapeHtml(sec)}</div>
-    <div class="context">${wrapVocab(q.context || '')}</div>
-    <div class="question">${escapeHtml(q.question || 'Pregunta')}${questionEs ? `<div class="translation-line">${escapeHtml(questionEs)}</div>` : ''}</div>
+    <div class="section-tag">${c.tag}</div>
+    <div class="context">${c.context}</div>
+    <div class="question">${c.question}${tr && c.questionEs ? `<div class="translation-line">${c.questionEs}</div>` : ''}</div>
     <div class="options">${options}</div>
-    <div class="muted">Instrucción: ${escapeHtml(q.instruction || '')}</div>
+    <div class="muted">Instrucción: ${c.instruction}</div>
     <div class="feedback" id="feedback" hidden></div>
   `;
 
@@ -200,6 +200,60 @@ function renderQuestionCard(container, q, opts = {}) {
   });
 }
 
+// Card fragments, already escaped: from data/cards.json (scripts/render_cards.py)
+// when it has the question as it is now, else built here the same way.
+function cardFor(q) {
+  const card = state.cards && state.cards.cards[q.id];
+  if (!card) return null;
+  if (!cardChecked.has(q)) cardChecked.set(q, card[6] === cardSourceHash(q));
+  if (!cardChecked.get(q)) return null;
+  const s = state.cards.strings;
+  const [tag, context, question, questionEs, instruction, bank] = card;
+  return {
+    tag: s[tag],
+    context: s[context],
+    question: s[question],
+    questionEs: s[questionEs],
+    instruction: s[instruction],
+    options: state.cards.banks[bank].map(([val, label, tr]) => [s[val], s[label], s[tr]]),
+  };
+}
+
+// source_hash() of render_cards.py: CRC-32 of the card's source fields as UTF-8 JSON.
+const CARD_SOURCE_FIELDS = ['id', 'exam', 'section', 'teil', 'number', 'instruction', 'context', 'question',
+  'question_es', 'explanation_es', 'options'];
+let crcTable = null;
+const cardChecked = new WeakMap(); // question object → its card is current (records are replaced, not edited)
+
+function cardSourceHash(q) {
+  if (!crcTable) {
+    crcTable = new Int32Array(256).map((_, n) => {
+      let c = n;
+      for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+      return c;
+    });
+  }
+  let crc = -1;
+  for (const b of new TextEncoder().encode(JSON.stringify(CARD_SOURCE_FIELDS.map((f) => q[f] ?? null)))) {
+    crc = crcTable[(crc ^ b) & 0xff] ^ (crc >>> 8);
+  }
+  return (crc ^ -1) >>> 0;
+}
+
+function buildCard(q) {
+  return {
+    tag: escapeHtml(`${q.exam} · ${q.section} T${q.teil} · #${q.number}`),
+    context: wrapVocab(q.context || '', glossaryRef(q, 'context')),
+    question: escapeHtml(q.question || 'Pregunta'),
+    questionEs: escapeHtml(q.question_es || inferQuestionTranslation(q)),
+    instruction: escapeHtml(q.instruction || ''),
+    options: (q.options || []).map((opt, i) => {
+      const label = String(opt);
+      return [escapeHtml(parseOptKey(label, i)), escapeHtml(label), escapeHtml(optionTranslation(q, label, i))];
+    }),
+  };
+}
+
 function renderQuiz(q) {
   state.quizCurrent = q;
   renderQuestionCard(el.quizCard, q);
@@ -305,8 +359,10 @@ function renderReview() {
   ];
 
   const query = el.reviewSearch.value.trim().toLowerCase();
+  const indexed = query && state.search && state.search.ready ? searchIndexIds(query) : null;
   const filtered = state.questions.filter((q) => {
     if (!query) return true;
+    if (indexed) return indexed.has(q.id) || q.exam.toLowerCase().includes(query);
     return (`${q.exam} ${q.context} ${q.question} ${q.explanation_es}`).toLowerCase().includes(query);
   });
 
@@ -317,8 +373,10 @@ function renderReview() {
     byExam[q.exam].push(q);
   }
 
+  // exams of other books ("<namespace>:<EXAM>", scripts/corpus.py) follow in data order
+  const exams = [...EXAM_ORDER, ...Object.keys(byExam).filter((e) => !EXAM_ORDER.includes(e))];
   let html = '';
-  for (const exam of EXAM_ORDER) {
+  for (const exam of exams) {
     const examQs = byExam[exam];
     if (!examQs || examQs.length === 0) continue;
 
@@ -783,8 +841,178 @@ function renderVocab(items) {
   return `<div class="vocab">${items.map((v) => `<span>${escapeHtml(v.de)} = ${escapeHtml(v.es)}</span>`).join('')}</div>`;
 }
 
-function wrapVocab(text) {
+async function loadCards() {
+  try {
+    const res = await fetch('data/cards.json');
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+
+async function loadGlossary() {
+  try {
+    const res = await fetch('data/glossary.json');
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+
+// glossary.json stays as installed when sw.js patches questions.json. Its
+// spans are UTF-16 offsets into the text whose text_key() (build_glossary.py:
+// sha1, first 12 hex digits) they are filed under, so a question whose text
+// has changed since loses its refs for that field; option hints are kept only
+// where the entry still occurs in the option, as the build checks.
+async function checkGlossary(glossary) {
+  if (!glossary) return null;
+  const keys = new Map(); // text → Promise of its text_key
+  const textKey = (text) => {
+    if (!keys.has(text)) {
+      keys.set(text, crypto.subtle.digest('SHA-1', new TextEncoder().encode(text)).then((d) => (
+        [...new Uint8Array(d)].map((b) => b.toString(16).padStart(2, '0')).join('').slice(0, 12))));
+    }
+    return keys.get(text);
+  };
+  try {
+    await Promise.all(state.questions.map(async (q) => {
+      const ref = glossary.questions[q.id];
+      if (!ref) return;
+      for (const field of ['context', 'question']) {
+        if (ref[field] && ref[field] !== (await textKey(q[field] || ''))) delete ref[field];
+      }
+      if (ref.options) {
+        ref.options = (q.options || []).map((opt, i) => {
+          const clean = String(opt).replace(/^[A-Za-zXx]\)?\s*/, '').toLowerCase();
+          return (ref.options[i] || []).filter((g) => clean.includes(glossary.entries[g].de.toLowerCase()));
+        });
+      }
+    }));
+  } catch {
+    return null; // no crypto.subtle: the render-time scan instead of unchecked spans
+  }
+  return glossary;
+}
+
+function glossaryRef(q, field) {
+  const ref = state.glossary && state.glossary.questions[q.id];
+  return ref ? ref[field] : undefined;
+}
+
+// ── Search index (scripts/search_index.py), loaded on first search ──
+
+function loadSearchIndex() {
+  if (state.search) return state.search.loading;
+  state.search = { ready: false, folded: new Map(), postings: new Map() };
+  state.search.loading = fetch('data/search_index.json')
+    .then((res) => (res.ok ? res.json() : null))
+    .then((doc) => {
+      if (!doc) return;
+      Object.assign(state.search, {
+        ready: true,
+        fields: doc.fields,
+        ids: doc.ids,
+        texts: doc.texts.map(([f, qs]) => [f, deltaDecode(qs)]),
+        grams: doc.grams,
+      });
+    })
+    .catch(() => {});
+  return state.search.loading;
+}
+
+function deltaDecode(deltas) {
+  let acc = 0;
+  return deltas.map((d) => (acc += d));
+}
+
+// Same as fold() in scripts/search_index.py: ae/oe/ue digraphs only in German text.
+const SEARCH_GERMAN = new Set(['question', 'context', 'options', 'answer']);
+const SEARCH_SPANISH = new Set(['question_es', 'explanation_es']);
+
+function foldSearch(text, german = true) {
+  let out = String(text).toLowerCase().replaceAll('ß', 'ss')
+    .normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+  if (german) out = out.replace(/([aou])e/g, '$1');
+  return out.replace(/[^a-z0-9]+/g, ' ').trim();
+}
+
+function foldSearchField(q, field) {
+  if (field === 'vocabulary') {
+    return (q.vocabulary || [])
+      .map((v) => `${foldSearch(v.de || '')} ${foldSearch(v.es || '', false)}`.trim()).join(' ').trim();
+  }
+  return foldSearch(searchFieldText(q, field), !SEARCH_SPANISH.has(field));
+}
+
+function searchFieldText(q, field) {
+  switch (field) {
+    case 'options': return (q.options || []).join(' | ');
+    case 'answer': {
+      const corr = normalizeAnswer(q.correct);
+      const opt = (q.options || []).find((o) => parseOptKey(o, 0) === corr && /^[A-Za-z]\)/.test(o));
+      return opt ? String(opt).replace(/^[A-Za-z]\)\s*/, '') : '';
+    }
+    case 'vocabulary': return (q.vocabulary || []).map((v) => `${v.de || ''} ${v.es || ''}`).join(' | ');
+    default: return q[field] || '';
+  }
+}
+
+function searchPosting(gram) {
+  const s = state.search;
+  if (!s.postings.has(gram)) s.postings.set(gram, new Set(deltaDecode(s.grams[gram] || [])));
+  return s.postings.get(gram);
+}
+
+function searchIndexIds(query) {
+  const s = state.search;
+  const de = foldSearch(query);
+  if (!de) return null;
+  const es = foldSearch(query, false);
+  const cand = new Set();
+  for (const phrase of new Set([de, es])) {
+    let c = null;
+    for (const w of phrase.split(' ')) {
+      const grams = [];
+      if (w.length >= 3) for (let i = 0; i + 3 <= w.length; i++) grams.push(w.slice(i, i + 3));
+      else grams.push(` ${w}`.slice(0, 3));
+      for (const g of grams) {
+        const p = searchPosting(g);
+        c = c ? new Set([...c].filter((t) => p.has(t))) : new Set(p);
+      }
+    }
+    (c || []).forEach((t) => cand.add(t));
+  }
+  const needle = (p) => (p.length >= 3 ? p : ` ${p}`);
+  const hits = new Set();
+  for (const ti of cand) {
+    const [f, qs] = s.texts[ti];
+    const field = s.fields[f];
+    if (!s.folded.has(ti)) {
+      const owner = qs.map((qi) => state.byId.get(s.ids[qi])).find(Boolean);
+      s.folded.set(ti, owner ? ` ${foldSearchField(owner, field)} ` : '');
+    }
+    const phrases = SEARCH_GERMAN.has(field) ? [de] : SEARCH_SPANISH.has(field) ? [es] : [de, es];
+    if (!phrases.some((p) => s.folded.get(ti).includes(needle(p)))) continue;
+    qs.forEach((qi) => hits.add(s.ids[qi]));
+  }
+  return hits;
+}
+
+function wrapVocab(text, spanKey) {
   if (!text) return '';
+  if (state.glossary) {
+    // Precomputed by scripts/build_glossary.py: [start, end, entryIndex]
+    const spans = (spanKey && state.glossary.spans[spanKey]) || [];
+    let out = '';
+    let pos = 0;
+    for (const [s, e, idx] of spans) {
+      const v = state.glossary.entries[idx];
+      out += escapeHtml(text.slice(pos, s));
+      out += `<span class="vocab-hit" data-tip="${escapeHtml(`${v.de} = ${v.es}`)}">${escapeHtml(text.slice(s, e))}</span>`;
+      pos = e;
+    }
+    return out + escapeHtml(text.slice(pos));
+  }
   const toks = text.split(/(\s+)/);
   return toks.map((t) => {
     const k = t.replace(/[^A-Za-zÄÖÜäöüß]/g, '').toLowerCase();
@@ -829,7 +1057,12 @@ function bindSwipe(node, onLeft) {
   }, { passive: true });
 }
 
-function optionTranslation(q, label) {
+function optionTranslation(q, label, i) {
+  const hitsIdx = glossaryRef(q, 'options');
+  if (state.glossary) {
+    const idx = (hitsIdx && hitsIdx[i]) || [];
+    return idx.map((g) => `${state.glossary.entries[g].de} = ${state.glossary.entries[g].es}`).join(' · ');
+  }
   const clean = String(label).replace(/^[A-Za-zXx]\)?\s*/, '').toLowerCase();
   const hits = (q.vocabulary || []).filter((v) => clean.includes(String(v.de || '').toLowerCase()));
   if (hits.length) return hits.slice(0, 3).map((v) => `${v.de} = ${v.es}`).join(' · ');
@@ -863,5 +1096,10 @@ function escapeHtml(s) {
 function registerSW() {
   if ('serviceWorker' in navigator) {
     navigator.serviceWorker.register('sw.js').catch(() => {});
+    navigator.serviceWorker.addEventListener('message', (e) => {
+      if (e.data && e.data.type === 'data-updated') {
+        showToast('Preguntas actualizadas. Se verán al recargar la app.');
+      }
+    });
   }
 }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Offline throughput of the enrichment scripts against the Gemini stub.
+
+  python3 benchmarks/bench_enrich.py --sizes 1000,10000 --latency lognormal:300,0.4
+  python3 benchmarks/bench_enrich.py --pipeline generate_translations --sizes 1000 --p429 0.05 --malformed 0.05
+
+Synthetic corpora are clones of data/questions.json with "~N" id suffixes and
+the enrichment fields cleared. Each run starts a fresh in-process stub, points
+GEMINI_ENDPOINT at it and runs the script's main loop on a temp copy of the data.
+Retry backoff and rate-limit sleeps are scaled by --sleep-scale so a 10k run
+finishes in minutes; time spent in them is still reported.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import metrics
+from gemini_stub import Stub, add_fault_arguments, serve
+
+RESULTS = ROOT / "benchmarks" / "results"
+ENRICH_FIELDS = ["question_es", "explanation_es", "vocabulary"]
+
+
+def synth_questions(n: int):
+    base = json.loads((ROOT / "data" / "questions.json").read_text(encoding="utf-8"))
+    out = []
+    for k in range(n):
+        q = dict(base[k % len(base)])
+        q["id"] = f"{q['id']}~{k // len(base)}"
+        for f in ENRICH_FIELDS:
+            q.pop(f, None)
+        out.append(q)
+    return out
+
+
+_DEFAULTS = {}
+
+
+def scale_sleeps(module, names, scale):
+    for name in names:
+        base = _DEFAULTS.setdefault((module.__name__, name), getattr(module, name))
+        setattr(module, name, base * scale)
+
+
+def _generate_translations(path: Path, sleep_scale: float):
+    import generate_translations as m
+    m.DATA = str(path)
+    scale_sleeps(m, ["DELAY_SECONDS", "RETRY_BACKOFF"], sleep_scale)
+    m.translate_all()
+
+
+def _translate_fast(path: Path, sleep_scale: float):
+    import translate_fast as m
+    m.DATA = str(path)
+    scale_sleeps(m, ["RETRY_BACKOFF"], sleep_scale)
+    m.translate_all()
+
+
+def _generate_explanations(path: Path, sleep_scale: float):
+    import generate_explanations as m
+    m.INPUT = path
+    scale_sleeps(m, ["DELAY_SECONDS"], sleep_scale)
+    m.explain_all()
+
+
+def _enrich(path: Path, sleep_scale: float):
+    import enrich as m
+    m.DATA = path
+    m.STATE = path.with_name("enrich_state.json")
+    m.QUEUE = path.with_name("enrich_queue.json")
+    scale_sleeps(m, ["RETRY_BACKOFF"], sleep_scale)
+    m.enrich_all(fresh=True)
+
+
+PIPELINES = {
+    "enrich": (_enrich, "explanation_es"),
+    "translate_fast": (_translate_fast, "question_es"),
+    "generate_translations": (_generate_translations, "question_es"),
+    "generate_explanations": (_generate_explanations, "explanation_es"),
+}
+
+
+def run_one(pipeline: str, n: int, args) -> dict:
+    fn, field = PIPELINES[pipeline]
+    stub = Stub(args.latency, args.p429, args.p5xx, args.truncate, args.malformed, args.fence, args.seed)
+    server, url = serve(stub)
+    os.environ["GEMINI_ENDPOINT"] = url
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "questions.json"
+            path.write_text(json.dumps(synth_questions(n), ensure_ascii=False), encoding="utf-8")
+            metrics.reset()
+            log = io.StringIO()
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(log):
+                fn(path, args.sleep_scale)
+            wall = time.perf_counter() - t0
+            snap = metrics.snapshot()
+            done = sum(1 for q in json.loads(path.read_text(encoding="utf-8")) if q.get(field))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    timers, counters = snap["timers"], snap["counters"]
+    sleeps = sum(s["sum"] for k, s in timers.items() if k.startswith("sleep."))
+    return {
+        "pipeline": pipeline,
+        "questions": n,
+        "completed": done,
+        "wall_s": round(wall, 3),
+        "questions_per_s": round(done / wall, 1) if wall else 0.0,
+        "sleep_s": round(sleeps, 3),
+        "api_latency_p50_ms": round(timers.get("api.latency", {}).get("p50", 0) * 1000, 1),
+        "counters": counters,
+        "stub": dict(stub.stats),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pipeline", choices=sorted(PIPELINES), default="translate_fast")
+    ap.add_argument("--sizes", default="1000,10000")
+    ap.add_argument("--sleep-scale", type=float, default=0.01)
+    ap.add_argument("--out", type=Path)
+    add_fault_arguments(ap)
+    args = ap.parse_args()
+    os.environ.setdefault("GEMINI_API_KEY", "offline")
+
+    results = []
+    for n in [int(s) for s in args.sizes.split(",")]:
+        res = run_one(args.pipeline, n, args)
+        results.append(res)
+        c, s = res["counters"], res["stub"]
+        print(f"{args.pipeline} n={n:>6,}  done={res['completed']:>6,}  {res['wall_s']:8.2f}s  "
+              f"{res['questions_per_s']:>8.1f} q/s  requests={c.get('api.requests', 0)} "
+              f"errors={c.get('api.errors', 0)} failed_calls={c.get('api.failed_calls', 0)} "
+              f"requeued={c.get('questions.requeued', 0)} salvage_lost={c.get('salvage.lost', 0)} "
+              f"schema_invalid={c.get('schema.invalid', 0)}/{c.get('schema.valid', 0) + c.get('schema.invalid', 0)}  "
+              f"stub 429={s['429']} 5xx={s['5xx']} trunc={s['truncated']} malformed={s['malformed']}",
+              flush=True)
+
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+    }
+    out = args.out or RESULTS / f"enrich-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
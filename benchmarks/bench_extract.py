@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Per-stage timing of scripts/extract_questions.py on 1×/10×/100× synthetic books.
+
+  python3 benchmarks/bench_extract.py run --scales 1,10,100 --out benchmarks/results/base.json
+  python3 benchmarks/bench_extract.py compare base.json new.json --threshold 0.15
+
+Each scale runs in a fresh subprocess so its peak RSS is reported on its own.
+`compare` exits non-zero when a stage got slower than the threshold allows.
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+RESULTS = ROOT / "benchmarks" / "results"
+# the synthetic books are cloned from telc-b1, so its page footer applies
+FOOTER = json.loads((ROOT / "books" / "telc-b1.json").read_text(encoding="utf-8")).get("footer")
+PARSE_STAGES = {
+    "parse_answer_map": lambda x, ex, sec: x.parse_answer_map(ex, FOOTER),
+    "parse_lv1": lambda x, ex, sec: x.parse_lv1(sec["lv1"]),
+    "parse_lv2": lambda x, ex, sec: x.parse_lv2(sec["lv2"]),
+    "parse_lv3": lambda x, ex, sec: x.parse_lv3(sec["lv3"]),
+    "parse_sb1": lambda x, ex, sec: x.parse_sb1(sec["sb1"]),
+    "parse_sb2_word_bank": lambda x, ex, sec: x.parse_sb2_word_bank(sec["sb2"]),
+}
+
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def run_scale(scale: int, repeat: int) -> dict:
+    import extract_questions as x
+    from synth_corpus import generate
+
+    raw, blocks = generate(scale)
+    stages = {}
+
+    stages["clean_line"], lines = timed(lambda: [x.clean_line(l) for l in raw], repeat)
+    stages["find_exam_blocks"], _ = timed(lambda: x.find_exam_blocks(lines), repeat)
+
+    exam_lines = [(b["name"], lines[b["start"]:b["end"]]) for b in blocks]
+    stages["section_slices"], sections = timed(
+        lambda: [x.section_slices(ex, 0, len(ex)) for _, ex in exam_lines], repeat)
+
+    for name, fn in PARSE_STAGES.items():
+        stages[name], _ = timed(
+            lambda: [fn(x, ex, sec) for (_, ex), sec in zip(exam_lines, sections)], repeat)
+
+    questions = []
+    for name, ex in exam_lines:
+        questions.extend(x.build_exam_questions(name, ex))
+    stages["json_serialize"], _ = timed(
+        lambda: json.dumps(questions, ensure_ascii=False, indent=2), repeat)
+
+    return {
+        "scale": scale,
+        "lines": len(raw),
+        "blocks": len(blocks),
+        "questions": len(questions),
+        "stages_ms": {k: round(v * 1000, 3) for k, v in stages.items()},
+        "total_ms": round(sum(stages.values()) * 1000, 3),
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def cmd_run(args):
+    results = []
+    for scale in [int(s) for s in args.scales.split(",")]:
+        repeat = args.repeat if scale < 100 else max(1, args.repeat // 3)
+        proc = subprocess.run(
+            [sys.executable, __file__, "_one", str(scale), "--repeat", str(repeat)],
+            capture_output=True, text=True, check=True,
+        )
+        res = json.loads(proc.stdout)
+        results.append(res)
+        print(f"{scale:>4}×  lines={res['lines']:>9,}  total={res['total_ms']:>10.1f} ms  "
+              f"rss={res['peak_rss_kb'] / 1024:.0f} MiB", flush=True)
+        for stage, ms in res["stages_ms"].items():
+            print(f"        {stage:22s} {ms:>10.2f} ms")
+
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    out = args.out or RESULTS / f"extract-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Saved to {out}")
+
+
+def cmd_one(args):
+    print(json.dumps(run_scale(args.scale, args.repeat)))
+
+
+def cmd_compare(args):
+    base = {r["scale"]: r for r in json.loads(args.base.read_text())["results"]}
+    new = {r["scale"]: r for r in json.loads(args.new.read_text())["results"]}
+    regressions = 0
+    for scale in sorted(base.keys() & new.keys()):
+        print(f"{scale}×")
+        b, n = base[scale], new[scale]
+        rows = list(b["stages_ms"].items()) + [("total", b["total_ms"]), ("peak_rss_kb", b["peak_rss_kb"])]
+        for stage, old in rows:
+            cur = n["total_ms"] if stage == "total" else n.get(stage) if stage == "peak_rss_kb" \
+                else n["stages_ms"].get(stage)
+            if cur is None:
+                continue
+            change = (cur - old) / old if old else 0.0
+            # sub-millisecond stages are noise-dominated; only flag them past 1 ms absolute
+            slow = change > args.threshold and (stage == "peak_rss_kb" or cur - old > 1.0)
+            regressions += slow
+            print(f"  {stage:22s} {old:>12.2f} → {cur:>12.2f}  {change:+7.1%}{'  REGRESSION' if slow else ''}")
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run")
+    r.add_argument("--scales", default="1,10,100")
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--out", type=Path)
+    r.set_defaults(func=cmd_run)
+
+    one = sub.add_parser("_one")
+    one.add_argument("scale", type=int)
+    one.add_argument("--repeat", type=int, default=5)
+    one.set_defaults(func=cmd_one)
+
+    c = sub.add_parser("compare")
+    c.add_argument("base", type=Path)
+    c.add_argument("new", type=Path)
+    c.add_argument("--threshold", type=float, default=0.15)
+    c.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Memory of the loaded corpus: plain dicts against scripts/model.py records.
+
+  python3 benchmarks/bench_model.py --scales 1,50
+
+Each scale is data/questions.json repeated as if it were that many books:
+every copy gets its own ids, exam names, texts (context, question,
+translations, explanations) and option banks. Within a copy the sharing of
+the real data stays as it is: a context used by five questions is still one
+text. Instructions, section and type names and vocabulary pairs are the same
+in every copy, as in further telc books.
+
+Both loaders parse the same JSON text; tracemalloc reports what is still
+allocated once the result is built (the parsed dicts dropped for the model)
+and the peak while building; build times include the tracemalloc overhead.
+Records must come back equal through to_dicts() before anything is reported.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import model  # noqa: E402
+import store  # noqa: E402
+
+RESULTS = ROOT / "benchmarks" / "results"
+PER_COPY = ("context", "question", "question_es", "explanation_es")
+
+
+def scaled(questions, scale: int) -> list:
+    out = []
+    for copy in range(scale):
+        if copy == 0:
+            out.extend(questions)
+            continue
+        tag = f" ⟨{copy}⟩"
+        for q in questions:
+            r = dict(q, id=f"b{copy}-{q['id']}", exam=f"{q['exam']}{tag}",
+                     options=[o + tag for o in q["options"]])
+            r.update({f: q[f] + tag for f in PER_COPY if q.get(f)})
+            out.append(r)
+    return out
+
+
+def measure(build, text: str):
+    """(result, bytes still allocated, peak bytes, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = build(text)
+    seconds = time.perf_counter() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, seconds
+
+
+LOADERS = {
+    "dicts": json.loads,
+    "model": lambda text: model.from_dicts(json.loads(text)),
+}
+
+
+def mb(n: int) -> float:
+    return round(n / 2**20, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", default="1,50")
+    ap.add_argument("--out", type=Path)
+    args = ap.parse_args()
+
+    base = store.load_questions(ROOT / store.QUESTIONS)
+    results = []
+    for scale in [int(s) for s in args.scales.split(",")]:
+        records = scaled(base, scale)
+        text = json.dumps(records, ensure_ascii=False)
+        del records
+        res = {"scale": scale, "json_bytes": len(text.encode("utf-8"))}
+        loaded = {}
+        for name, build in LOADERS.items():
+            loaded[name], current, peak, seconds = measure(build, text)
+            res[name] = {"mb": mb(current), "peak_mb": mb(peak), "ms": round(seconds * 1000, 1)}
+        if loaded["model"].to_dicts() != loaded["dicts"]:
+            print(f"MISMATCH at {scale}×: model records differ from the parsed dicts")
+            sys.exit(1)
+        res["questions"] = len(loaded["dicts"])
+        res["slices"] = len(loaded["model"].slices)
+        res["saving"] = round(1 - res["model"]["mb"] / res["dicts"]["mb"], 3)
+        del loaded
+        results.append(res)
+        print(f"{scale:>4}×  questions={res['questions']:>7,}  dicts {res['dicts']['mb']:>8.2f} MB  "
+              f"model {res['model']['mb']:>8.2f} MB ({res['saving']:.0%} less)  "
+              f"build {res['dicts']['ms']:.0f} / {res['model']['ms']:.0f} ms  "
+              f"peak {res['dicts']['peak_mb']:.1f} / {res['model']['peak_mb']:.1f} MB  identical", flush=True)
+
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    out = args.out or RESULTS / f"model-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""clean_line: the old chained replace/re.sub version against scripts/normalize.py.
+
+  python3 benchmarks/bench_normalize.py --scales 1,10,100
+
+Each scale is a synthetic book from synth_corpus.generate() (OCR-style
+mutations, stray bidi marks). Three paths are timed on the same buffer:
+legacy per-line, normalize.clean_line per-line, and normalize.clean_text on
+the whole buffer. Outputs must be identical before any time is reported; a
+mismatch prints the first differing line and exits non-zero.
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import normalize
+from synth_corpus import generate
+
+RESULTS = ROOT / "benchmarks" / "results"
+# line starts and ends, bidi/control characters, Arabic runs and whitespace splitlines() does not split on
+EDGE_CASES = "\n".join([
+    "", " ", "\t\t", "\x0c", "PETRA\x0c", "\u200fA)\u200e Text\u202a\u202c",
+    "vor \u0627\u0644\u0639\u0631\u0628\u064a\u0629 nach", "\u06ff\u0600", "a\x1fb\xa0c\u3000d",
+    "x\x0by\x1cz\x85w\u2028v\u2029u", "r\r\nn\rm", "  mehrere   Leerzeichen\t ",
+])
+
+
+def legacy_clean_line(s: str) -> str:
+    """clean_line as it was before normalize.py, kept verbatim as the reference."""
+    s = s.replace("\x0c", " ").replace("\u200f", " ").replace("\u200e", " ")
+    s = s.replace("\u202a", " ").replace("\u202c", " ")
+    s = re.sub(r"[\u0600-\u06FF]+", " ", s)
+    s = s.replace("\t", " ")
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+PATHS = {
+    "legacy": lambda text: [legacy_clean_line(l) for l in text.splitlines()],
+    "clean_line": lambda text: [normalize.clean_line(l) for l in text.splitlines()],
+    "clean_text": normalize.clean_text,
+}
+
+
+def check(text: str, label: str) -> bool:
+    want = PATHS["legacy"](text)
+    for name in ("clean_line", "clean_text"):
+        got = PATHS[name](text)
+        if got != want:
+            i = next((i for i, (a, b) in enumerate(zip(got, want)) if a != b), min(len(got), len(want)))
+            print(f"MISMATCH {label} {name} at line {i}: {got[i:i + 1]!r} != {want[i:i + 1]!r}")
+            return False
+    return True
+
+
+def timed(fn, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", default="1,10,100")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", type=Path)
+    args = ap.parse_args()
+
+    if not check(EDGE_CASES, "edge cases"):
+        sys.exit(1)
+    results = []
+    for scale in [int(s) for s in args.scales.split(",")]:
+        raw, _ = generate(scale)
+        text = "\n".join(raw) + "\n"
+        if not check(text, f"{scale}×"):
+            sys.exit(1)
+        repeat = args.repeat if scale < 100 else max(1, args.repeat // 3)
+        ms = {name: round(timed(fn, text, repeat) * 1000, 2) for name, fn in PATHS.items()}
+        res = {"scale": scale, "lines": len(raw), "chars": len(text), "ms": ms,
+               "speedup": {k: round(ms["legacy"] / v, 2) for k, v in ms.items() if k != "legacy" and v}}
+        results.append(res)
+        print(f"{scale:>4}×  lines={len(raw):>9,}  legacy {ms['legacy']:>9.1f} ms  "
+              f"clean_line {ms['clean_line']:>9.1f} ms ({res['speedup']['clean_line']}×)  "
+              f"clean_text {ms['clean_text']:>9.1f} ms ({res['speedup']['clean_text']}×)  identical", flush=True)
+
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    out = args.out or RESULTS / f"normalize-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
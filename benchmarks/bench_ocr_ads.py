@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Accuracy and throughput of local Tesseract OCR for LV3 ads against data/lv3_ads.json.
+
+  python3 benchmarks/bench_ocr_ads.py --jobs 4
+  python3 benchmarks/bench_ocr_ads.py --min-confidence 0.85 --out benchmarks/results/ocr.json
+
+Uses the committed lv3-pages/ renders (exam-p<lv3 page>-<page>.jpg), mapped to
+exams through ad_pages.locate() on the telc-b1 text layer, so no PDF is needed.
+Accuracy per ad is the difflib ratio between whitespace-normalised texts; a
+letter the OCR missed scores 0. The report splits exams into those the
+confidence threshold would accept locally and those it would send to the
+vision model, which is the number that tells whether the threshold is right.
+"""
+import argparse
+import difflib
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import ad_pages
+import corpus
+import ocr_ads
+
+RESULTS = ROOT / "benchmarks" / "results"
+REFERENCE = ROOT / "data" / "lv3_ads.json"
+
+
+def norm(text: str) -> str:
+    return " ".join(text.split())
+
+
+def accuracy(got: list, want: list) -> float:
+    got_by = {a["letter"]: norm(a["text"]) for a in got}
+    scores = [difflib.SequenceMatcher(None, got_by.get(a["letter"], ""), norm(a["text"])).ratio()
+              for a in want]
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def exam_images() -> dict:
+    """{exam: [image paths]} for the default book's exams that have renders."""
+    os.chdir(ROOT)  # books/*.json and the text layer use repo-relative paths
+    book = corpus.load_books()[0]
+    exams = None if book["exams"] == "auto" else book["exams"]
+    found = ad_pages.locate(ad_pages.page_texts(book), exams, book["exclude"])
+    renders = {}  # pdftoppm zero-pads the page suffix, so match on the numbers
+    for f in ad_pages.RENDERS_DIR.glob("exam-p*-*.jpg"):
+        m = re.fullmatch(r"exam-p(\d+)-(\d+)\.jpg", f.name)
+        if m:
+            renders[int(m.group(1)), int(m.group(2))] = str(f)
+    out = {}
+    for exam, loc in found.items():
+        first, last = loc["ads"]
+        files = [renders.get((loc["lv3"], p)) for p in range(first, last + 1)]
+        if all(files):
+            out[exam] = files
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jobs", type=int, default=None, help="OCR processes (default: all cores)")
+    ap.add_argument("--lang", default=ocr_ads.LANG)
+    ap.add_argument("--min-confidence", type=float, default=ocr_ads.MIN_CONFIDENCE)
+    ap.add_argument("--out", type=Path)
+    args = ap.parse_args()
+    if not ocr_ads.available():
+        sys.exit("tesseract not found on PATH (apt install tesseract-ocr tesseract-ocr-deu)")
+
+    reference = json.loads(REFERENCE.read_text(encoding="utf-8"))
+    images = {e: f for e, f in exam_images().items() if e in reference}
+    t0 = time.perf_counter()
+    results = ocr_ads.ocr_all(images, args.jobs, args.lang)
+    wall = time.perf_counter() - t0
+
+    rows = []
+    for exam in sorted(images, key=lambda e: images[e][0]):
+        res, want = results[exam], reference[exam]
+        acc = accuracy(res["ads"], want)
+        local = res["confidence"] >= args.min_confidence
+        rows.append({"exam": exam, "ads": len(res["ads"]), "expected": len(want),
+                     "confidence": res["confidence"], "accuracy": round(acc, 3), "local": local})
+        print(f"  {exam:10s} ads {len(res['ads']):2d}/{len(want):2d}  conf {res['confidence']:.2f}  "
+              f"acc {acc:.3f}  {'local' if local else 'vision'}")
+
+    pages = sum(len(f) for f in images.values())
+    local = [r for r in rows if r["local"]]
+    summary = {
+        "exams": len(rows),
+        "pages": pages,
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(pages / wall, 2) if wall else 0.0,
+        "accuracy_mean": round(statistics.mean(r["accuracy"] for r in rows), 3) if rows else 0.0,
+        "local_exams": len(local),
+        "local_accuracy_mean": round(statistics.mean(r["accuracy"] for r in local), 3) if local else None,
+        "vision_calls_saved": len(local),
+    }
+    print(f"{summary['exams']} exams, {pages} pages in {wall:.2f}s ({summary['pages_per_s']} pages/s, "
+          f"jobs={args.jobs or os.cpu_count()})  accuracy {summary['accuracy_mean']:.3f}  "
+          f"local {len(local)}/{len(rows)} at ≥{args.min_confidence} "
+          f"(accuracy {summary['local_accuracy_mean']})")
+
+    doc = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "summary": summary,
+        "exams": rows,
+    }
+    out = args.out or RESULTS / f"ocr-ads-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"Saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
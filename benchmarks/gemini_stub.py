@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the Gemini generateContent endpoint.
+
+  python3 benchmarks/gemini_stub.py --port 8765 --latency lognormal:300,0.4 \
+      --p429 0.05 --p5xx 0.02 --truncate 0.05 --malformed 0.05 --fence 0.2
+  GEMINI_ENDPOINT=http://127.0.0.1:8765 GEMINI_API_KEY=x python3 scripts/translate_fast.py
+
+Replies are canned from data/questions.json (ids may carry a "~N" clone suffix)
+and data/lv3_ads.json, in the shape the request's responseSchema asks for, or
+without one the shape of each script's prompt: a bare JSON array
+(translations), {"results": [...]} (explanations) or an a)–l) ad list
+(inlineData requests). Faults are drawn per request from a seeded RNG:
+
+  429 / 5xx     HTTP error with a Gemini-style error body
+  truncate      text cut mid-item, finishReason MAX_TOKENS
+  malformed     one item broken (missing comma, stray quote, trailing comma) or prose only;
+                with responseSchema, valid JSON with one item off-schema instead
+  fence         ```json fences plus a preamble (only without responseMimeType)
+
+GET /stats returns the request and fault counters.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPUS = ROOT / "data" / "questions.json"
+ADS = ROOT / "data" / "lv3_ads.json"
+
+LETTERS = "abcdefghijkl"
+
+
+def parse_latency(spec: str):
+    """'0', 'fixed:200', 'uniform:50,400' or 'lognormal:300,0.5' (median ms, sigma) → rng → seconds."""
+    kind, _, args = (spec or "0").partition(":")
+    vals = [float(v) for v in args.split(",") if v]
+    if kind in ("0", "none"):
+        return lambda rng: 0.0
+    if kind == "fixed":
+        return lambda rng: vals[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(vals[0], vals[1]) / 1000
+    if kind == "lognormal":
+        mu, sigma = math.log(vals[0]), vals[1] if len(vals) > 1 else 0.5
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000
+    raise ValueError(f"unknown latency spec {spec!r}")
+
+
+class Canned:
+    """Reply bodies built from the committed data, falling back to synthetic text."""
+
+    def __init__(self, corpus=CORPUS, ads=ADS):
+        self.by_id = {}
+        if Path(corpus).exists():
+            self.by_id = {q["id"]: q for q in json.loads(Path(corpus).read_text(encoding="utf-8"))}
+        self.ads = json.loads(Path(ads).read_text(encoding="utf-8")) if Path(ads).exists() else {}
+
+    def record(self, qid):
+        return self.by_id.get(qid.split("~", 1)[0], {})
+
+    def translation(self, qid):
+        q = self.record(qid)
+        return {
+            "id": qid,
+            "question_es": q.get("question_es") or f"Traducción simulada de {qid}",
+            "explanation_es": q.get("explanation_es") or "La opción correcta encaja con el contexto.",
+            "vocabulary": q.get("vocabulary") or [{"de": "Prüfung", "es": "examen"}],
+        }
+
+    def explanation(self, qid):
+        item = self.translation(qid)
+        return {"id": qid, "explanation_es": item["explanation_es"], "vocabulary": item["vocabulary"]}
+
+    def ad_page(self, rng):
+        if self.ads:
+            return self.ads[rng.choice(sorted(self.ads))]
+        return [{"letter": c, "text": f"Anzeige {c}) Tel. 0{rng.randrange(10**6, 10**7)}"} for c in LETTERS]
+
+
+def request_text(payload) -> str:
+    return "".join(p.get("text", "") for c in payload.get("contents", []) for p in c.get("parts", []))
+
+
+def request_ids(text: str):
+    return re.findall(r"ID:\s?([^\s|]+)", text) or re.findall(r'"id":\s*"([^"]+)"', text)
+
+
+def schema_reply(schema, ids, canned: Canned) -> str:
+    """Items with exactly the fields the responseSchema asks for."""
+    wrap, arr = None, schema
+    if schema.get("type") == "OBJECT":
+        wrap = next(iter(schema["properties"]))
+        arr = schema["properties"][wrap]
+    fields = [f for f in arr["items"]["properties"] if f != "id"]
+    items = []
+    for i in ids:
+        full = canned.translation(i)
+        items.append({"id": i, **{f: full.get(f, "") for f in fields}})
+    return json.dumps({wrap: items} if wrap else items, ensure_ascii=False)
+
+
+def build_reply(payload, canned: Canned, rng):
+    """(style, JSON text) for a generateContent payload."""
+    parts = [p for c in payload.get("contents", []) for p in c.get("parts", [])]
+    text = request_text(payload)
+    schema = payload.get("generationConfig", {}).get("responseSchema")
+    if any("inlineData" in p for p in parts):
+        return "ads", json.dumps(canned.ad_page(rng), ensure_ascii=False)
+    if schema:
+        return "schema", schema_reply(schema, request_ids(text), canned)
+    if '"results"' in text:
+        return "results", json.dumps({"results": [canned.explanation(i) for i in request_ids(text)]},
+                                     ensure_ascii=False)
+    return "array", json.dumps([canned.translation(i) for i in request_ids(text)], ensure_ascii=False, indent=1)
+
+
+def truncate(text: str, rng) -> str:
+    return text[:max(1, int(len(text) * rng.uniform(0.3, 0.95)))]
+
+
+def malform(text: str, rng) -> str:
+    breaks = [i.start() for i in re.finditer(r"\},\s*\{", text)]
+    kind = rng.choice(["missing_comma", "stray_quote", "trailing_comma", "prose"])
+    if kind == "prose" or not breaks:
+        return "Lo siento, aquí están las traducciones: " + text.replace('"', "'")[:200]
+    at = rng.choice(breaks)
+    if kind == "missing_comma":
+        return text[:at + 1] + text[at + 2:]
+    if kind == "trailing_comma":
+        return text[:at] + "," + text[at:]
+    # an unescaped quote inside the next string value
+    q = text.find(': "', at)
+    return text[:q + 3] + 'das "Wort' + text[q + 3:] if q >= 0 else text[:at]
+
+
+def violate(text: str, rng) -> str:
+    """Schema-mode counterpart of malform(): valid JSON, one item off-schema."""
+    doc = json.loads(text)
+    items = doc["results"] if isinstance(doc, dict) else doc
+    if not items:
+        return text
+    it = rng.choice(items)
+    key = rng.choice([k for k in it if k not in ("id", "letter")] or list(it))
+    kind = rng.choice(["drop", "empty", "retype"])
+    if kind == "drop":
+        del it[key]
+    elif kind == "empty":
+        it[key] = ""
+    else:
+        it[key] = {"value": it[key]}
+    return json.dumps(doc, ensure_ascii=False)
+
+
+class Stub:
+    def __init__(self, latency="0", p429=0.0, p5xx=0.0, truncate=0.0, malformed=0.0, fence=0.0,
+                 seed=0, canned=None):
+        self.latency = parse_latency(latency)
+        self.p429, self.p5xx = p429, p5xx
+        self.p_truncate, self.p_malformed, self.p_fence = truncate, malformed, fence
+        self.canned = canned or Canned()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "5xx": 0, "truncated": 0, "malformed": 0, "fenced": 0}
+
+    def draw(self):
+        with self.lock:
+            self.stats["requests"] += 1
+            return random.Random(self.rng.getrandbits(64))
+
+    def bump(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def respond(self, payload):
+        """(status, body dict, headers) for one request."""
+        rng = self.draw()
+        time.sleep(self.latency(rng))
+        roll = rng.random()
+        if roll < self.p429:
+            self.bump("429")
+            return 429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                   "message": "Resource has been exhausted (e.g. check quota)."}}, {"Retry-After": "1"}
+        if roll < self.p429 + self.p5xx:
+            self.bump("5xx")
+            code = rng.choice([500, 503])
+            return code, {"error": {"code": code, "status": "UNAVAILABLE" if code == 503 else "INTERNAL",
+                                    "message": "The model is overloaded. Please try again later."}}, {}
+
+        style, text = build_reply(payload, self.canned, rng)
+        finish = "STOP"
+        config = payload.get("generationConfig", {})
+        json_mode = config.get("responseMimeType") == "application/json"
+        if rng.random() < self.p_truncate:
+            self.bump("truncated")
+            text, finish = truncate(text, rng), "MAX_TOKENS"
+        elif rng.random() < self.p_malformed:
+            self.bump("malformed")
+            # constrained decoding keeps the syntax; only the content can be off
+            text = violate(text, rng) if "responseSchema" in config else malform(text, rng)
+        if not json_mode and rng.random() < self.p_fence:
+            self.bump("fenced")
+            text = f"Claro, aquí tienes el resultado:\n```json\n{text}\n```"
+        self.bump("ok")
+
+        prompt_tokens = len(request_text(payload)) // 4
+        return 200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": finish}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": len(text) // 4,
+                              "totalTokenCount": prompt_tokens + len(text) // 4},
+            "modelVersion": "stub",
+        }, {}
+
+
+def make_handler(stub: Stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status, body, headers=None):
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                with stub.lock:
+                    self.send_json(200, dict(stub.stats))
+            else:
+                self.send_json(404, {"error": {"code": 404, "message": "not found"}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if ":generateContent" not in self.path:
+                return self.send_json(404, {"error": {"code": 404, "message": "not found"}})
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return self.send_json(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                                      "message": "Invalid JSON payload received."}})
+            self.send_json(*stub.respond(payload))
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def serve(stub: Stub, host="127.0.0.1", port=0):
+    """Start the stub on a background thread; returns (server, base URL for GEMINI_ENDPOINT)."""
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_fault_arguments(parser):
+    parser.add_argument("--latency", default="0", help="0 | fixed:MS | uniform:MIN,MAX | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--p5xx", type=float, default=0.0)
+    parser.add_argument("--truncate", type=float, default=0.0)
+    parser.add_argument("--malformed", type=float, default=0.0)
+    parser.add_argument("--fence", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def stub_from_args(args) -> Stub:
+    return Stub(args.latency, args.p429, args.p5xx, args.truncate, args.malformed, args.fence, args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    add_fault_arguments(ap)
+    args = ap.parse_args()
+
+    server, url = serve(stub_from_args(args), args.host, args.port)
+    print(f"Gemini stub on {url}  (export GEMINI_ENDPOINT={url})", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Golden-output checks: parser and export output against a stored snapshot.
+
+  python3 benchmarks/golden.py snapshot                  # record benchmarks/golden/*.json.gz
+  python3 benchmarks/golden.py check                     # compare, field-level diffs, exit 1 on change
+  python3 benchmarks/golden.py fuzz --reference HEAD --seeds 50
+
+Targets:
+  extract    extract_questions.extract_book() on every registered book, no cache
+  questions  data/questions.json as shipped (parser + fixes + ads + enrichment)
+  min, columnar, msgpack
+             questions.json encoded and decoded again by export_questions;
+             checked against the "questions" snapshot, so it has no file of its own
+
+Records are canonicalised before hashing (sorted keys, flags as a sorted set,
+no insignificant whitespace), so reordering keys or flags is not a change.
+Each record gets a sha256, each exam one over its records' hashes, each
+target one over its exams; check compares top-down and prints the fields of
+the records that differ.
+
+fuzz perturbs the OCR text of a book the way scanned pages vary (bidi marks,
+form feeds, Arabic watermark runs, stray page numbers, doubled and dropped
+lines, swapped words) and runs it through the working tree's parser and the
+one at --reference (a git revision, loaded from `git archive` into its own
+modules; any revision back to the baseline, which had no book registry).
+Both must produce the same records; every line must also clean the same as
+with the legacy clean_line of bench_normalize.py. A failing input is
+saved to benchmarks/results/ so it can be replayed with --replay.
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import corpus  # noqa: E402
+import export_questions  # noqa: E402
+import extract_questions  # noqa: E402
+import normalize  # noqa: E402
+import store  # noqa: E402
+from bench_normalize import legacy_clean_line  # noqa: E402
+
+GOLDEN_DIR = ROOT / "benchmarks" / "golden"
+RESULTS = ROOT / "benchmarks" / "results"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_TARGETS = ["extract", "questions"]
+EXPORT_TARGETS = ["min", "columnar", "msgpack"]  # compared against the "questions" snapshot
+
+
+# ── canonical form and hashes ───────────────────────────────────────────────
+
+def canonical(q: dict) -> dict:
+    out = dict(sorted(q.items()))
+    out["flags"] = sorted(set(q.get("flags") or []))
+    return out
+
+
+def digest(obj) -> str:
+    data = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def exam_key(q: dict) -> str:
+    return f"{q['book']}/{q['exam']}" if q.get("book") else str(q.get("exam"))
+
+
+def summarize(questions) -> dict:
+    """{"hash", "exams": {exam: {"hash", "count"}}, "hashes": {id: hash}, "records": {id: record}}."""
+    records, hashes, by_exam = {}, {}, defaultdict(list)
+    for q in questions:
+        rid = q.get("id")
+        n = 1
+        while rid in records:  # duplicate ids stay visible instead of overwriting each other
+            n += 1
+            rid = f"{q.get('id')}~{n}"
+        records[rid] = canonical(q)
+        hashes[rid] = digest(records[rid])
+        by_exam[exam_key(q)].append(rid)
+    exams = {e: {"hash": digest([[rid, hashes[rid]] for rid in ids]), "count": len(ids)}
+             for e, ids in sorted(by_exam.items())}
+    return {"hash": digest({e: v["hash"] for e, v in exams.items()}), "exams": exams,
+            "hashes": hashes, "records": records}
+
+
+# ── targets ─────────────────────────────────────────────────────────────────
+
+def extract_target(module=extract_questions):
+    questions = []
+    for book in corpus.load_books():
+        questions.extend(module.extract_book(book, use_cache=False)[1])
+    return questions
+
+
+def target_questions(name: str):
+    if name == "extract":
+        return extract_target()
+    questions = store.load_questions()
+    if name == "questions":
+        return questions
+    return export_questions.decode(export_questions.encode(questions, name), name)
+
+
+def golden_path(name: str) -> Path:
+    return GOLDEN_DIR / f"{name}.json.gz"
+
+
+def load_golden(name: str) -> dict:
+    return json.loads(gzip.decompress(golden_path(name).read_bytes()))
+
+
+def write_golden(name: str, summary: dict):
+    doc = {"v": SNAPSHOT_VERSION, "target": name, "parser": extract_questions.parser_sig(), **summary}
+    data = json.dumps(doc, ensure_ascii=False, sort_keys=True, indent=0).encode("utf-8")
+    golden_path(name).parent.mkdir(parents=True, exist_ok=True)
+    golden_path(name).write_bytes(gzip.compress(data, mtime=0))  # no timestamp: same snapshot, same bytes
+    return len(data)
+
+
+# ── diffs ───────────────────────────────────────────────────────────────────
+
+def short(v, width=70) -> str:
+    s = json.dumps(v, ensure_ascii=False)
+    return s if len(s) <= width else s[:width - 1] + "…"
+
+
+def around(a: str, b: str, width=30):
+    """The two strings trimmed to where they first differ, for long texts."""
+    i = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+    lo = max(0, i - width // 2)
+    cut = lambda s: ("…" if lo else "") + s[lo:lo + width] + ("…" if lo + width < len(s) else "")  # noqa: E731
+    return f"@{i}: {cut(a)!r} → {cut(b)!r}"
+
+
+def field_diffs(old, new, path=""):
+    """(path, old, new) for every leaf that differs; "<absent>" for missing keys and list items."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k in sorted(set(old) | set(new)):
+            yield from field_diffs(old.get(k, "<absent>"), new.get(k, "<absent>"), f"{path}.{k}" if path else k)
+    elif isinstance(old, list) and isinstance(new, list) and old != new:
+        for i in range(max(len(old), len(new))):
+            yield from field_diffs(old[i] if i < len(old) else "<absent>",
+                                   new[i] if i < len(new) else "<absent>", f"{path}[{i}]")
+    elif old != new:
+        yield path, old, new
+
+
+def format_diff(path, old, new) -> str:
+    if isinstance(old, str) and isinstance(new, str) and max(len(old), len(new)) > 70 and "<absent>" not in (old, new):
+        return f"      {path}: {around(old, new)}"
+    return f"      {path}: {short(old)} → {short(new)}"
+
+
+def compare(want: dict, got: dict, max_records=10, max_fields=8) -> list:
+    """Report lines for what changed from want to got; empty when the hashes match."""
+    if want["hash"] == got["hash"]:
+        return []
+    lines, shown = [], 0
+    for exam in sorted(set(want["exams"]) | set(got["exams"])):
+        w, g = want["exams"].get(exam), got["exams"].get(exam)
+        if w and g and w["hash"] == g["hash"]:
+            continue
+        if not g:
+            lines.append(f"  {exam}: missing ({w['count']} records in the snapshot)")
+            continue
+        if not w:
+            lines.append(f"  {exam}: new exam ({g['count']} records)")
+            continue
+        ids_w = [i for i in want["hashes"] if exam_key(want["records"][i]) == exam]
+        ids_g = [i for i in got["hashes"] if exam_key(got["records"][i]) == exam]
+        removed = [i for i in ids_w if i not in got["hashes"]]
+        added = [i for i in ids_g if i not in want["hashes"]]
+        changed = [i for i in ids_w if i in got["hashes"] and want["hashes"][i] != got["hashes"][i]]
+        lines.append(f"  {exam}: {w['count']} → {g['count']} records, "
+                     f"{len(changed)} changed, {len(added)} added, {len(removed)} removed")
+        if removed:
+            lines.append(f"    removed: {', '.join(removed[:max_records])}{' …' if len(removed) > max_records else ''}")
+        if added:
+            lines.append(f"    added: {', '.join(added[:max_records])}{' …' if len(added) > max_records else ''}")
+        if not (changed or added or removed):
+            lines.append("    same records in a different order")
+        for rid in changed:
+            if shown >= max_records:
+                lines.append(f"    … {len(changed)} changed in this exam, first {max_records} records overall shown")
+                break
+            shown += 1
+            diffs = list(field_diffs(want["records"][rid], got["records"][rid]))
+            lines.append(f"    {rid}:")
+            lines.extend(format_diff(*d) for d in diffs[:max_fields])
+            if len(diffs) > max_fields:
+                lines.append(f"      … {len(diffs) - max_fields} more fields")
+    return lines
+
+
+# ── reference implementation from git ───────────────────────────────────────
+
+def load_reference(rev: str):
+    """extract_questions (and the modules it imports) as they are at a git revision."""
+    tar = subprocess.run(["git", "-C", str(ROOT), "archive", "--format=tar", rev, "scripts"],
+                         capture_output=True, check=True).stdout
+    tmp = Path(tempfile.mkdtemp(prefix="golden-ref-"))
+    tarfile.open(fileobj=io.BytesIO(tar)).extractall(tmp, filter="data")
+    src = tmp / "scripts"
+    names = {p.stem for p in src.glob("*.py")}
+    current = {n: sys.modules.pop(n) for n in names if n in sys.modules}
+    sys.path.insert(0, str(src))
+    try:
+        return importlib.import_module("extract_questions")
+    finally:
+        # the reference keeps its own module objects through its globals
+        sys.path.remove(str(src))
+        for n in names:
+            sys.modules.pop(n, None)
+        sys.modules.update(current)
+
+
+# ── fuzz ────────────────────────────────────────────────────────────────────
+
+MARKS = ["‎", "‏", "‪", "‬", "\t", "\x0c", "\xa0", "  ", "اللغة"]
+NOISE_LINES = ["ABDELLAH FARHAN", "LANGUAGE Tests", "\x0c", "17", "‏اللغة ‎"]
+
+
+def perturb(lines, rng: random.Random, rate: float):
+    """(OCR lines with random scanner noise, counts per kind of change)."""
+    out, kinds = [], defaultdict(int)
+    for line in lines:
+        if rng.random() >= rate:
+            out.append(line)
+            continue
+        kind = rng.choice(["mark", "mark", "mark", "noise", "duplicate", "drop", "swap", "split"])
+        kinds[kind] += 1
+        if kind == "mark":
+            i = rng.randrange(len(line) + 1)
+            out.append(line[:i] + rng.choice(MARKS) + line[i:])
+        elif kind == "noise":
+            out.extend([line, rng.choice(NOISE_LINES)])
+        elif kind == "duplicate":
+            out.extend([line, line])
+        elif kind == "swap":
+            words = line.split(" ")
+            if len(words) > 2:
+                i = rng.randrange(len(words) - 1)
+                words[i], words[i + 1] = words[i + 1], words[i]
+            out.append(" ".join(words))
+        elif kind == "split" and " " in line:
+            i = rng.choice([i for i, c in enumerate(line) if c == " "])
+            out.extend([line[:i], line[i + 1:]])
+        elif kind != "drop":
+            out.append(line)
+    return out, dict(kinds)
+
+
+def run_parser(module, book: dict, text: str, workdir: Path):
+    """Records from one implementation for a book with the given OCR text.
+
+    Revisions from before the book registry have no extract_book(); their
+    main() is replayed instead (clean_line per line, find_exam_blocks over
+    their fixed exam list, build_exam_questions), with the book's ids and
+    exam names namespaced as the registry does.
+    """
+    if not hasattr(module, "extract_book"):
+        lines = [module.clean_line(x) for x in text.splitlines()]
+        questions = []
+        for ex in module.find_exam_blocks(lines):
+            questions.extend(module.build_exam_questions(ex["name"], lines[ex["start"]:ex["end"]]))
+        questions.sort(key=lambda q: (q["exam"], q["number"]))
+        return corpus.tag(book, questions)
+    path = workdir / f"{book['id']}.txt"
+    path.write_text(text, encoding="utf-8")
+    return module.extract_book({**book, "text": str(path)}, use_cache=False)[1]
+
+
+def clean_mismatch(text: str):
+    want = [legacy_clean_line(l) for l in text.splitlines()]
+    got = normalize.clean_text(text)
+    if got == want:
+        return None
+    i = next((i for i, (a, b) in enumerate(zip(want, got)) if a != b), min(len(want), len(got)))
+    return f"  clean_text line {i}: {got[i:i + 1]!r} != legacy {want[i:i + 1]!r}"
+
+
+def fuzz_case(ref, book, text, workdir):
+    """Report lines for one input; empty when both parsers and both cleaners agree."""
+    lines = []
+    problem = clean_mismatch(text)
+    if problem:
+        lines.append(problem)
+    want = summarize(run_parser(ref, book, text, workdir))
+    got = summarize(run_parser(extract_questions, book, text, workdir))
+    lines.extend(compare(want, got))
+    return lines, len(got["records"])
+
+
+def cmd_fuzz(args):
+    ref = load_reference(args.reference)
+    books = corpus.load_books(args.books.split(",") if args.books else None)
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="golden-fuzz-") as tmp:
+        workdir = Path(tmp)
+        os.chdir(workdir)  # both parsers write their per-book cache below the working directory
+        if args.replay:
+            lines, n = fuzz_case(ref, books[0], args.replay.read_text(encoding="utf-8"), workdir)
+            print("\n".join(lines) if lines else f"{args.replay}: identical ({n} records)")
+            return 1 if lines else 0
+        for book in books:
+            raw = (ROOT / book["text"]).read_text(encoding="utf-8", errors="ignore").splitlines()
+            for seed in range(args.seed, args.seed + args.seeds):
+                rng = random.Random(f"{book['id']}:{seed}")
+                lines, kinds = perturb(raw, rng, args.rate)
+                text = "\n".join(lines) + "\n"
+                report, n = fuzz_case(ref, book, text, workdir)
+                changes = " ".join(f"{k}={v}" for k, v in sorted(kinds.items()))
+                if not report:
+                    print(f"{book['id']} seed {seed}: identical ({n} records; {changes})", flush=True)
+                    continue
+                failures += 1
+                RESULTS.mkdir(parents=True, exist_ok=True)
+                saved = RESULTS / f"golden-fuzz-{book['id']}-{seed}.txt"
+                saved.write_text(text, encoding="utf-8")
+                print(f"{book['id']} seed {seed}: MISMATCH ({changes}), input saved to {saved}")
+                print("\n".join(report[:args.max_lines]))
+    print(f"fuzz: {failures} mismatching input(s) against {args.reference}")
+    return 1 if failures else 0
+
+
+# ── snapshot / check ────────────────────────────────────────────────────────
+
+def parse_targets(arg, default):
+    names = arg.split(",") if arg else default
+    unknown = [n for n in names if n not in SNAPSHOT_TARGETS + EXPORT_TARGETS]
+    if unknown:
+        raise SystemExit(f"unknown target(s): {', '.join(unknown)}")
+    return names
+
+
+def cmd_snapshot(args):
+    for name in parse_targets(args.targets, SNAPSHOT_TARGETS):
+        if name in EXPORT_TARGETS:
+            raise SystemExit(f"{name} is checked against the questions snapshot and has none of its own")
+        summary = summarize(target_questions(name))
+        size = write_golden(name, summary)
+        print(f"{name:<10} {len(summary['records'])} records, {len(summary['exams'])} exams, "
+              f"hash {summary['hash']} → {golden_path(name).relative_to(ROOT)} ({size:,} bytes raw)")
+    return 0
+
+
+def cmd_check(args):
+    failed = False
+    for name in parse_targets(args.targets, SNAPSHOT_TARGETS + EXPORT_TARGETS):
+        against = "questions" if name in EXPORT_TARGETS else name
+        if not golden_path(against).exists():
+            print(f"{name:<10} no snapshot at {golden_path(against).relative_to(ROOT)} (run: snapshot)")
+            failed = True
+            continue
+        want = load_golden(against)
+        got = summarize(target_questions(name))
+        report = compare(want, got, args.max_records, args.max_fields)
+        if report:
+            failed = True
+            print(f"{name:<10} CHANGED: hash {want['hash']} → {got['hash']}")
+            print("\n".join(report[:args.max_lines]))
+            if len(report) > args.max_lines:
+                print(f"  … {len(report) - args.max_lines} more lines")
+        else:
+            print(f"{name:<10} identical: {len(got['records'])} records, {len(got['exams'])} exams, hash {got['hash']}")
+    return 1 if failed else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("snapshot", help="record the golden snapshots")
+    p.add_argument("--targets", help=f"comma-separated (default: {','.join(SNAPSHOT_TARGETS)})")
+
+    p = sub.add_parser("check", help="compare against the golden snapshots")
+    p.add_argument("--targets", help=f"comma-separated (default: {','.join(SNAPSHOT_TARGETS + EXPORT_TARGETS)})")
+    p.add_argument("--max-records", type=int, default=10, help="changed records shown per target")
+    p.add_argument("--max-fields", type=int, default=8, help="differing fields shown per record")
+    p.add_argument("--max-lines", type=int, default=200)
+
+    p = sub.add_parser("fuzz", help="perturbed OCR text through the reference and working-tree parsers")
+    p.add_argument("--reference", default="HEAD", help="git revision of the reference parser (default: HEAD)")
+    p.add_argument("--books", help="comma-separated book ids (default: all)")
+    p.add_argument("--seeds", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0, help="first seed")
+    p.add_argument("--rate", type=float, default=0.02, help="share of OCR lines perturbed")
+    p.add_argument("--replay", type=Path, help="run one saved input (first book's settings) instead")
+    p.add_argument("--max-lines", type=int, default=60)
+
+    args = ap.parse_args()
+    if getattr(args, "replay", None):
+        args.replay = args.replay.resolve()
+    os.chdir(ROOT)  # data paths are relative to the repository root, as in scripts/
+    sys.exit({"snapshot": cmd_snapshot, "check": cmd_check, "fuzz": cmd_fuzz}[args.cmd](args))
+
+
+if __name__ == "__main__":
+    main()
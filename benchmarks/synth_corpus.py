@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Synthetic OCR books for benchmarking: clone and mutate exam blocks of telc-b1.txt.
+
+  python3 benchmarks/synth_corpus.py --scale 10 --out /tmp/synth-10x.txt
+
+Structural lines (section headers, numbered items, option labels, answer
+keys) are kept verbatim so every parser path is exercised; prose lines get
+word swaps, digit changes and OCR-style noise (watermarks, page numbers,
+Arabic fragments, bidi marks).
+"""
+import argparse
+import random
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from extract_questions import clean_line, find_exam_blocks  # noqa: E402
+
+SRC = ROOT / "telc-b1.txt"
+
+STRUCTURAL = re.compile(
+    r"^(\d{1,2}[\.\s]|[A-Oa-o][\)\.]|[a-oA-O]$|Leseverstehen|Sprach.?austeine|Hörverstehen|"
+    r"Schriftlicher|Lösungen|[A-ZÄÖÜ]{3,}\d?$)"
+)
+NOISE = ["ABDELLAH FARHAN", "LANGUAGE Tests", "\x0c", "‏اللغة ‎", "\t"]
+
+
+def mutate(line: str, rng: random.Random) -> str:
+    if len(line) < 30 or STRUCTURAL.match(line.strip()):
+        return line
+    words = line.split(" ")
+    r = rng.random()
+    if r < 0.3 and len(words) > 3:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    elif r < 0.5:
+        words = [re.sub(r"\d", lambda _: str(rng.randrange(10)), w) for w in words]
+    elif r < 0.6:
+        i = rng.randrange(len(words))
+        words[i] = words[i] + "‎"
+    return " ".join(words)
+
+
+def generate(scale: int, seed: int = 42):
+    """Return (raw_lines, blocks) where blocks = [{"name", "start", "end"}] in raw line numbers."""
+    raw = SRC.read_text(encoding="utf-8", errors="ignore").splitlines()
+    cleaned = [clean_line(x) for x in raw]
+    originals = find_exam_blocks(cleaned)
+    rng = random.Random(seed)
+
+    out, blocks = list(raw[: originals[0]["start"]]), []
+    for copy in range(scale):
+        for b in originals:
+            start = len(out)
+            for line in raw[b["start"]:b["end"]]:
+                out.append(line if copy == 0 else mutate(line, rng))
+                if copy and rng.random() < 0.01:
+                    out.append(rng.choice(NOISE))
+                    out.append(str(rng.randrange(1, 240)))
+            blocks.append({"name": b["name"], "start": start, "end": len(out)})
+    return out, blocks
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", type=Path, required=True)
+    args = ap.parse_args()
+
+    lines, blocks = generate(args.scale, args.seed)
+    args.out.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print(f"{args.scale}× → {len(lines):,} lines, {len(blocks)} exam blocks → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""One entry point for the pipeline stages, composable in a single process.
+
+  python -m scripts --help
+  python -m scripts extract                               # OCR text → data/questions.json
+  python -m scripts extract + fix + validate + export     # one read, one write
+  python -m scripts extract --keys-only                   # new answer keys into the enriched data
+  python -m scripts enrich --dry-run
+  python -m scripts ads --engine tesseract
+  python -m scripts --profile bench --repeat 5
+
+Stages joined by "+" share one in-memory copy of data/questions.json: it is
+read once, by the first stage that needs it (none if extract ran first), and
+written once at the end if a stage changed it. Each stage imports its module
+only when it runs, so --help and the offline stages never load the network
+code, and GEMINI_API_KEY is read only by the stages that call the API.
+
+The working directory is switched to the repository root first, so the data
+paths (all relative, as in the standalone scripts) also resolve when the
+package is found through PYTHONPATH from another directory.
+Global options (--profile, --metrics-file) go before the first stage.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))  # the stages import each other by bare module name
+
+import metrics  # noqa: E402  (stdlib only)
+import store  # noqa: E402
+
+
+class Pipeline:
+    """State handed from stage to stage."""
+
+    def __init__(self):
+        self._questions = None
+        self.dirty = False          # questions changed since read; saved at the end
+        self.keys_report = None     # answer key provenance, when extract ran
+        self.failed = False
+
+    @property
+    def questions(self) -> list:
+        if self._questions is None:
+            self._questions = store.load_questions()
+        return self._questions
+
+    @questions.setter
+    def questions(self, value):
+        self._questions = value
+        self.dirty = True
+
+
+def book_ids(args):
+    return args.books.split(",") if args.books else None
+
+
+# ── stages ───────────────────────────────────────────────────────────────────
+# Each is (help, add_arguments(parser), run(pipeline, args)); imports stay inside run.
+
+def _extract_args(ap):
+    ap.add_argument("--books", help="comma-separated book ids from books/ (default: all)")
+    ap.add_argument("--full", action="store_true", help="ignore the per-book cache in data/extracted/")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="books extracted in parallel")
+    ap.add_argument("--keys-only", action="store_true",
+                    help="update only the answer keys of the enriched questions.json instead of rewriting it")
+
+
+def _extract(p, args):
+    import extract_questions
+    ids = book_ids(args)
+    extracted, keys_report = extract_questions.extract_all(ids, args.full, args.jobs)
+    if args.keys_only:
+        changed, cleared = extract_questions.merge_keys(p.questions, extracted)
+        print(f"keys: {changed} changed, {cleared} explanations cleared for enrich")
+    elif ids and store.QUESTIONS.exists():
+        # --books re-extracts those books only; the others keep their records
+        p.questions = extract_questions.keep_other_books(ids, extracted, p.questions)
+    else:
+        p.questions = extracted
+    p.keys_report = extract_questions.keep_other_reports(ids, keys_report)
+    extract_questions.write(p.questions, p.keys_report)
+    p.dirty = False
+
+
+def _fix_args(ap):
+    pass
+
+
+def _fix(p, args):
+    import fix_missing_options
+    fixed, overwritten = fix_missing_options.apply_fixes(p.questions)
+    metrics.count("options.fixed_empty", fixed)
+    metrics.count("options.overwritten", overwritten)
+    p.dirty = p.dirty or bool(fixed or overwritten)
+    print(f"fix: {fixed} empty fixed, {overwritten} corrupted/overwritten")
+
+
+def _ads_args(ap):
+    ap.add_argument("--books", help="comma-separated book ids from books/ (default: all)")
+    ap.add_argument("--engine", choices=["vision", "tesseract"], default="vision")
+    ap.add_argument("--min-confidence", type=float,
+                    help="local OCR results below this go to the vision model (tesseract engine, default 0.80)")
+    ap.add_argument("--jobs", type=int, default=None, help="OCR processes (default: all cores)")
+
+
+def _ads(p, args):
+    import corpus
+    import extract_lv3_ads
+    import ocr_ads
+    if args.engine == "tesseract" and not ocr_ads.available():
+        raise SystemExit("tesseract not found on PATH; use --engine vision")
+    min_confidence = ocr_ads.MIN_CONFIDENCE if args.min_confidence is None else args.min_confidence
+    extract_lv3_ads.extract_all(corpus.load_books(book_ids(args)), args.engine, min_confidence, args.jobs)
+
+
+def _enrich_args(ap):
+    ap.add_argument("--fields", help="comma-separated subset of question_es,explanation_es,vocabulary (default: all)")
+    ap.add_argument("--force", action="store_true", help="re-request the fields even where present and fresh")
+    ap.add_argument("--no-dedup", action="store_true", help="enrich every cluster member on its own")
+    ap.add_argument("--dry-run", action="store_true", help="print the plan without calling the API")
+    ap.add_argument("--fresh", action="store_true", help="ignore a saved work queue and plan from scratch")
+
+
+def _enrich(p, args):
+    import enrich
+    fields = [f for f in enrich.FIELDS if not args.fields or f in args.fields.split(",")]
+    enrich.enrich_all(fields, force=args.force, dedup=not args.no_dedup, dry_run=args.dry_run,
+                      fresh=args.fresh, questions=p.questions)
+    p.dirty = p.dirty or not args.dry_run
+
+
+def _validate_args(ap):
+    ap.add_argument("--quiet", action="store_true", help="only the record checks, not the per-exam reports")
+
+
+def _validate(p, args):
+    import extract_questions
+    import schemas
+    if not args.quiet:
+        extract_questions.verification_reports(p.questions)
+        if p.keys_report is not None:
+            extract_questions.answer_key_report(p.keys_report)
+    problems = schemas.check_questions(p.questions)
+    metrics.count("validate.problems", len(problems))
+    for line in problems[:20]:
+        print(f"  {line}")
+    print(f"validate: {len(p.questions)} records, {len(problems)} problems")
+    p.failed = p.failed or bool(problems)
+
+
+def _export_args(ap):
+    ap.add_argument("--format", "-f", action="append",
+                    choices=["pretty", "min", "columnar", "msgpack"],
+                    help="format(s) to write (default: all compact formats)")
+    ap.add_argument("--out-dir", type=Path, default=Path("data"))
+    ap.add_argument("--no-cards", action="store_true", help="skip the pre-rendered data/cards.json")
+
+
+def _export(p, args):
+    import export_questions
+    export_questions.export(p.questions, args.format or ["min", "columnar", "msgpack"], args.out_dir,
+                            cards=not args.no_cards)
+
+
+def _bench_args(ap):
+    ap.add_argument("--repeat", type=int, default=15)
+
+
+def _bench(p, args):
+    import bench_export
+    rows = bench_export.bench(p.questions, args.repeat)
+    bench_export.print_table(rows, len(p.questions), args.repeat)
+
+
+STAGES = {
+    "extract": ("extract questions from every registered book's OCR text", _extract_args, _extract),
+    "fix": ("patch missing/corrupt options from the vision extraction data", _fix_args, _fix),
+    "ads": ("extract LV3 ads from the PDF pages (vision or local OCR)", _ads_args, _ads),
+    "enrich": ("add question_es, explanation_es and vocabulary through Gemini", _enrich_args, _enrich),
+    "validate": ("completeness reports and record schema checks", _validate_args, _validate),
+    "export": ("write the compact formats (min, columnar, msgpack) and the rendered cards", _export_args, _export),
+    "bench": ("sizes and load times of the export formats", _bench_args, _bench),
+}
+
+
+def parser():
+    ap = argparse.ArgumentParser(prog="python -m scripts", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    metrics.add_arguments(ap)
+    sub = ap.add_subparsers(dest="stage", required=True, metavar="stage")
+    for name, (help_, add_args, _) in STAGES.items():
+        add_args(sub.add_parser(name, help=help_, description=help_))
+    return ap
+
+
+def split_stages(argv):
+    """argv split on "+" into one argument list per stage."""
+    segments = [[]]
+    for arg in argv:
+        if arg == "+":
+            segments.append([])
+        else:
+            segments[-1].append(arg)
+    return segments
+
+
+def main(argv=None):
+    ap = parser()
+    segments = split_stages(sys.argv[1:] if argv is None else argv)
+    steps = [ap.parse_args(seg) for seg in segments]
+    os.chdir(store.ROOT)
+
+    first = steps[0]
+    p = Pipeline()
+    with metrics.run("+".join(s.stage for s in steps), profile=first.profile, metrics_file=first.metrics_file):
+        for args in steps:
+            if len(steps) > 1:
+                print(f"\n── {args.stage} ──", flush=True)
+            with metrics.timer(f"stage.{args.stage}"):
+                STAGES[args.stage][2](p, args)
+        if p.dirty:
+            store.save_questions(p.questions)
+            print(f"saved {store.QUESTIONS} ({len(p.questions)} records)")
+    return 1 if p.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
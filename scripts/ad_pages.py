@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Find the LV3 ad pages of each exam from a book's PDF text layer.
+
+  python3 scripts/ad_pages.py                 # all books: exam → LV3 page and ad page range
+  python3 scripts/ad_pages.py --check         # compare with pinned ads_pages and the lv3-pages/ renders
+
+pdftotext runs once per page; each page's text is cached under
+data/pdftext/<book>/ and reused while the PDF is unchanged. Without the PDF the
+form-feed separated OCR text layer (telc-b1.txt) is used instead.
+
+An exam's LV3 starts on the page with "Leseverstehen, Teil 3" and the
+situations 11–20. The ads follow on up to two pages that are either scanned
+(no text layer beyond the running header) or carry a)–l) labels. The ads can
+also sit on the situations page itself.
+"""
+import argparse
+import json
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import corpus
+import metrics
+
+CACHE_DIR = Path("data/pdftext")
+RENDERS_DIR = Path("lv3-pages")      # exam-p<lv3 page>-<page>.jpg, rendered by hand for telc-b1
+LV3_HEADER = re.compile(r"Leseverstehen,\s*Teil\s*3", re.IGNORECASE)
+SECTION_HEADER = re.compile(r"Sprach.?austeine,\s*Teil|Hörverstehen,\s*Teil|Schriftlicher Ausdruck", re.IGNORECASE)
+EXAM_HEADER = re.compile(r"[A-ZÄÖÜ]{3,}\d?")
+AD_LABEL = re.compile(r"(?:^|\s{2,})([a-l])\)\s", re.MULTILINE)
+NOISE = {"LANGUAGE Tests", "ABDELLAH FARHAN", "ANSWER KEY"}
+SCANNED_CHARS = 80   # body text below this: the page is an image
+MIN_LABELS = 3       # distinct a)–l) labels that make a page an ads page
+MAX_AD_PAGES = 2
+
+
+def pdf_sig(pdf: Path) -> str:
+    st = pdf.stat()
+    return f"{st.st_size}-{int(st.st_mtime)}"
+
+
+def page_count(pdf: Path) -> int:
+    out = subprocess.run(["pdfinfo", str(pdf)], capture_output=True, text=True, check=True).stdout
+    return int(re.search(r"^Pages:\s+(\d+)", out, re.MULTILINE).group(1))
+
+
+def _pdftotext_page(pdf: Path, n: int) -> str:
+    with metrics.timer("pdftotext.page"):
+        return subprocess.run(["pdftotext", "-layout", "-f", str(n), "-l", str(n), str(pdf), "-"],
+                              capture_output=True, text=True, check=True).stdout
+
+
+def page_texts(book, jobs: int = 4):
+    """[page text] (index 0 = page 1) from the cached per-page pdftotext output."""
+    pdf = Path(book["pdf"]) if book.get("pdf") else None
+    if pdf is None or not pdf.exists():
+        metrics.count("pages.from_text_layer")
+        return Path(book["text"]).read_text(encoding="utf-8", errors="ignore").split("\f")
+
+    cache = CACHE_DIR / book["id"]
+    meta_path = cache / "meta.json"
+    sig = pdf_sig(pdf)
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+    if meta.get("sig") != sig:
+        for old in cache.glob("*.txt"):
+            old.unlink()
+        meta = {"sig": sig, "pages": page_count(pdf)}
+        cache.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps(meta))
+
+    todo = [n for n in range(1, meta["pages"] + 1) if not (cache / f"{n:04d}.txt").exists()]
+    metrics.count("pages.cached", meta["pages"] - len(todo))
+    metrics.count("pages.extracted", len(todo))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:  # pdftotext does the work; threads just wait on it
+        for n, text in zip(todo, pool.map(lambda n: _pdftotext_page(pdf, n), todo)):
+            (cache / f"{n:04d}.txt").write_text(text, encoding="utf-8")
+    return [(cache / f"{n:04d}.txt").read_text(encoding="utf-8") for n in range(1, meta["pages"] + 1)]
+
+
+def body_chars(text: str) -> int:
+    """Characters on a page besides running headers, watermarks and the page number."""
+    n = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if (not line or line in NOISE or EXAM_HEADER.fullmatch(line) or LV3_HEADER.search(line)
+                or re.fullmatch(r"\d{1,3}", line) or not re.search(r"[A-Za-zÄÖÜäöüß]", line)):
+            continue
+        n += len(line)
+    return n
+
+
+def ad_labels(text: str) -> set:
+    return set(AD_LABEL.findall(text))
+
+
+def is_ads_page(text: str) -> bool:
+    if SECTION_HEADER.search(text):
+        return False
+    return body_chars(text) < SCANNED_CHARS or len(ad_labels(text)) >= MIN_LABELS
+
+
+def locate(pages, exams=None, exclude=()):
+    """{exam: {"lv3": page, "ads": [first, last]}} with 1-based page numbers."""
+    known = set(exams) if exams else None
+    found, current = {}, None
+    for idx, text in enumerate(pages):
+        for line in text.splitlines()[:8]:
+            name = line.strip()
+            if EXAM_HEADER.fullmatch(name) and (known is None or name in known):
+                current = name
+        if current is None or current in found or current in exclude:
+            continue
+        if not (LV3_HEADER.search(text) and re.search(r"Situation", text)):
+            continue
+        ads = [n for n in range(idx + 1, min(idx + 1 + MAX_AD_PAGES, len(pages)))
+               if is_ads_page(pages[n])]
+        # keep only the run directly after the situations page
+        run = []
+        for n in ads:
+            if n == idx + 1 + len(run):
+                run.append(n)
+        if not run and len(ad_labels(text)) >= MIN_LABELS:
+            run = [idx]
+        if run:
+            found[current] = {"lv3": idx + 1, "ads": [run[0] + 1, run[-1] + 1]}
+    return found
+
+
+def ad_ranges(book, jobs: int = 4):
+    """{exam: [first, last]} ad pages for a book: its configured map, or discovered when "auto"."""
+    pages = book["ads_pages"]
+    if pages != "auto":
+        return {exam: p if isinstance(p, list) else [p, p] for exam, p in pages.items()}
+    exams = None if book["exams"] == "auto" else book["exams"]
+    with metrics.timer("discover.ads_pages"):
+        found = locate(page_texts(book, jobs), exams, book["exclude"])
+    return {exam: loc["ads"] for exam, loc in found.items()}
+
+
+def rendered_ranges(renders_dir=RENDERS_DIR):
+    """{lv3 page: [first, last]} from the hand-rendered LV3 page images."""
+    spans = {}
+    for f in renders_dir.glob("exam-p*-*.jpg"):
+        m = re.fullmatch(r"exam-p(\d+)-(\d+)\.jpg", f.name)
+        if m:
+            lv3, page = int(m.group(1)), int(m.group(2))
+            spans.setdefault(lv3, []).append(page)
+    return {lv3: [min(p), max(p)] for lv3, p in spans.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--books", help=f"comma-separated book ids from {corpus.BOOKS_DIR}/ (default: all)")
+    ap.add_argument("--jobs", type=int, default=4, help="parallel pdftotext processes")
+    ap.add_argument("--check", action="store_true", help="compare with the configured ads_pages")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+
+    mismatches = 0
+    with metrics.run("ad_pages", profile=args.profile, metrics_file=args.metrics_file, quiet=True):
+        for book in corpus.load_books(args.books.split(",") if args.books else None):
+            exams = None if book["exams"] == "auto" else book["exams"]
+            found = locate(page_texts(book, args.jobs), exams, book["exclude"])
+            pinned = ad_ranges(book) if book["ads_pages"] != "auto" else {}
+            rendered = rendered_ranges() if not book["namespace"] else {}
+            print(f"{book['id']}: {len(found)} exams")
+            for exam, loc in sorted(found.items(), key=lambda kv: kv[1]["lv3"]):
+                a, b = loc["ads"]
+                problems = []
+                if args.check and exam in pinned and pinned[exam] != loc["ads"]:
+                    problems.append(f"pinned {pinned[exam]}")
+                if args.check and rendered and rendered.get(loc["lv3"]) != [loc["lv3"], b]:
+                    problems.append(f"rendered {rendered.get(loc['lv3'])}")
+                mismatches += bool(problems)
+                note = ("  MISMATCH: " + ", ".join(problems)) if problems else ("  ok" if args.check else "")
+                print(f"  {exam:10s} lv3 p{loc['lv3']:<4d} ads p{a}" + (f"–{b}" if b != a else "") + note)
+            if args.check:
+                for exam in sorted(set(pinned) - set(found)):
+                    mismatches += 1
+                    print(f"  {exam:10s} pinned {pinned[exam]} but not found")
+                for lv3 in sorted(set(rendered) - {loc["lv3"] for loc in found.values()}):
+                    mismatches += 1
+                    print(f"  lv3-pages/ has p{lv3} but no exam was found there")
+    if args.check:
+        print(f"{mismatches} mismatch(es)")
+        raise SystemExit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
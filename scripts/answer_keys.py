@@ -0,0 +1,142 @@
+"""Answer keys of an exam block, read only from the lines that carry them.
+
+One cheap pass over the block builds a line index: the "Lösungen" answer page
+at the end of every exam (header to the next page footer) and short lines that
+start with a digit. Only those are parsed:
+
+  loesungen         "7 B" / "6C 7C 8A" token lines on the answer page
+  loesungen-column  the answer page's column layout: a run of number lines
+                    ("21" … "30") paired with a run of single-letter lines of
+                    the same length whose letters fit the section
+  inline            key-only lines next to the questions ("11 K", "6C 7C 8A 9 C 10 B")
+
+Keys outside a section's letters (a–c for 21–30, A–L or X for 11–20, …) are
+ignored. When sources disagree the answer page wins, in the order above, and
+the disagreement is reported as a conflict.
+
+The page footer is the book's running footer line ("footer" in
+books/<id>.json); followed by a page number it closes the answer page.
+Without one the answer page runs to the end of the block.
+"""
+import re
+
+HEADER = "Lösungen"
+SOURCES = ["loesungen", "loesungen-column", "inline"]  # precedence, highest first
+KEY_TOKEN = re.compile(r"(?<!\d)([1-9]|[1-3]\d|40)\s*[-–:]?\s*([A-Za-z])(?![A-Za-z])")
+KEY_LINE = re.compile(r"(?:(?:[1-9]|[1-3]\d|40)\s*[-–:]?\s*[A-Za-z](?![A-Za-z])[\s,;|]*)+")
+MAX_KEY_LINE = 60
+ALLOWED = [
+    (range(1, 6), "ABCDEFGHIJ"),
+    (range(6, 11), "ABC"),
+    (range(11, 21), "ABCDEFGHIJKLX"),
+    (range(21, 31), "ABC"),  # a–c in the book, stored in upper case like every other key
+    (range(31, 41), "ABCDEFGHIJKLMNO"),
+]
+
+
+def normalise(number: int, letter: str):
+    """The key as stored (upper case), or None if the section has no such option."""
+    for numbers, letters in ALLOWED:
+        if number in numbers:
+            letter = letter.upper()
+            return letter if letter in letters else None
+    return None
+
+
+def index_lines(lines, start=0, end=None, footer=None):
+    """((answer page start, end) or None, [candidate key line numbers]) from string checks only."""
+    end = len(lines) if end is None else end
+    page, page_end, candidates = None, end, []
+    for i in range(start, end):
+        line = lines[i]
+        if not line:
+            continue
+        if line == HEADER and page is None:
+            page = i
+        elif footer and line == footer and page is not None and page_end == end:
+            nxt = next((l for l in lines[i + 1:i + 3] if l), "")
+            if nxt.isdigit() and len(nxt) <= 3:
+                page_end = i
+        elif line[0].isdigit() and len(line) <= MAX_KEY_LINE:
+            candidates.append(i)
+    return ((page, page_end) if page is not None else None), candidates
+
+
+def token_keys(line: str):
+    """[(number, letter)] for a line made of key tokens only, else []."""
+    if not KEY_LINE.fullmatch(line):
+        return []
+    return [(int(m.group(1)), m.group(2)) for m in KEY_TOKEN.finditer(line)]
+
+
+def runs(lines, start, end, kind):
+    """Maximal runs of single-number lines counting up by one, or of single-letter lines: [(first line, [values])]."""
+    out, cur = [], None
+    for i in range(start, end):
+        line = lines[i]
+        if kind == "number":
+            value = int(line) if line.isdigit() and 1 <= int(line) <= 40 else None
+            extends = value is not None and cur is not None and value == cur[1][-1] + 1
+        else:
+            value = line if len(line) == 1 and line.isalpha() else None
+            extends = value is not None and cur is not None
+        if extends:
+            cur[1].append(value)
+            continue
+        if cur:
+            out.append(cur)
+        cur = (i, [value]) if value is not None else None
+    if cur:
+        out.append(cur)
+    return out
+
+
+def column_keys(lines, start, end):
+    """[(number, letter, line)] from number runs paired with same-length letter runs."""
+    letter_runs = runs(lines, start, end, "letter")
+    used = set()
+    keys = []
+    for num_at, numbers in runs(lines, start, end, "number"):
+        fits = [k for k, (at, letters) in enumerate(letter_runs)
+                if k not in used and len(letters) == len(numbers)
+                and all(normalise(n, c) for n, c in zip(numbers, letters))]
+        if not fits:
+            continue
+        # the nearest run after the numbers, else the nearest before them
+        after = [k for k in fits if letter_runs[k][0] > num_at]
+        k = min(after, key=lambda k: letter_runs[k][0]) if after else max(fits, key=lambda k: letter_runs[k][0])
+        used.add(k)
+        at, letters = letter_runs[k]
+        keys.extend((n, c, at + j) for j, (n, c) in enumerate(zip(numbers, letters)))
+    return keys
+
+
+def locate(lines, start=0, end=None, footer=None):
+    """{"keys": {n: letter}, "sources": {n: {"key", "source", "line"}}, "conflicts": [...]}.
+
+    Line numbers are indexes into `lines`; conflicts list every distinct key
+    seen for a number, with its source and line.
+    """
+    end = len(lines) if end is None else end
+    page, candidates = index_lines(lines, start, end, footer)
+    found = {s: {} for s in SOURCES}  # source -> {n: (letter, line)}, first occurrence kept
+    for i in candidates:
+        source = "loesungen" if page and page[0] < i < page[1] else "inline"
+        for n, c in token_keys(lines[i]):
+            key = normalise(n, c)
+            if key:
+                found[source].setdefault(n, (key, i))
+    if page:
+        for n, c, i in column_keys(lines, page[0] + 1, page[1]):
+            found["loesungen-column"].setdefault(n, (normalise(n, c), i))
+
+    keys, sources, conflicts = {}, {}, []
+    for n in sorted({n for per in found.values() for n in per}):
+        seen = [(s, *found[s][n]) for s in SOURCES if n in found[s]]
+        source, key, line = seen[0]
+        keys[n] = key
+        sources[n] = {"key": key, "source": source, "line": line}
+        if len({k for _, k, _ in seen}) > 1:
+            conflicts.append({"number": n, "chosen": key,
+                              "seen": [{"key": k, "source": s, "line": i} for s, k, i in seen]})
+    return {"keys": keys, "sources": sources, "conflicts": conflicts}
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compare export formats: raw size, compressed size and Python load time."""
+import argparse
+import gzip
+import json
+import statistics
+import time
+import zlib
+from pathlib import Path
+
+from export_questions import FORMATS, decode, encode
+
+INPUT = Path("data/questions.json")
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is what sw.js/static hosts serve by default
+    brotli = None
+
+
+def time_load(data: bytes, fmt: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        decode(data, fmt)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def bench(questions, repeat=15) -> list:
+    """One row per format: raw and compressed bytes, median decode time."""
+    rows = []
+    for fmt in FORMATS:
+        data = encode(questions, fmt)
+        assert decode(data, fmt) == questions, f"{fmt}: round-trip mismatch"
+        row = {
+            "format": fmt,
+            "raw": len(data),
+            "gzip": len(gzip.compress(data, compresslevel=9)),
+            "deflate": len(zlib.compress(data, 6)),
+            "load_ms": round(time_load(data, fmt, repeat) * 1000, 2),
+        }
+        if brotli is not None:
+            row["brotli"] = len(brotli.compress(data, quality=11))
+        rows.append(row)
+    return rows
+
+
+def print_table(rows, n_questions, repeat):
+    base = rows[0]
+    cols = ["raw", "gzip", "deflate"] + (["brotli"] if brotli is not None else [])
+    print(f"{'format':10s}" + "".join(f"{c:>12s}" for c in cols) + f"{'load ms':>10s}")
+    for r in rows:
+        print(f"{r['format']:10s}" + "".join(f"{r[c]:>12,d}" for c in cols) + f"{r['load_ms']:>10.2f}")
+    print(f"\n(sizes in bytes; {n_questions} questions, median of {repeat} loads)")
+    best = min(rows, key=lambda r: (r["gzip"], r["load_ms"]))
+    print(f"smallest over the wire: {best['format']} "
+          f"({best['gzip'] / base['gzip']:.0%} of pretty gzip)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--input", type=Path, default=INPUT)
+    ap.add_argument("--repeat", type=int, default=15)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+
+    questions = json.loads(args.input.read_text(encoding="utf-8"))
+    rows = bench(questions, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print_table(rows, len(questions), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Build a deduplicated DE→ES glossary, word→question index and highlight spans.
+
+Replaces the render-time vocabulary scan in app.js (wrapVocab / optionTranslation)
+with a single build step.
+
+data/glossary.json (loaded by the app)
+{
+  "entries":   [{"lemma", "de", "es", "count", "glosses"}],
+  "spans":     {text_key: [[start, end, entry], ...]},   # UTF-16 offsets, as JS sees them
+  "questions": {id: {"context": text_key, "question": text_key, "options": [[entry, ...], ...]}}
+}
+data/vocab_index.json (build/CLI side only)
+  {lemma: [question ids whose text contains it]}
+"""
+import hashlib
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+INPUT = Path("data/questions.json")
+OUT = Path("data/glossary.json")
+INDEX_OUT = Path("data/vocab_index.json")
+
+WORD_RE = re.compile(r"[A-Za-zÄÖÜäöüß]+")
+# Leading articles/reflexives dropped from multi-word entries ("die Lücke", "sich freuen")
+STRIP_PREFIX = {"der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "sich"}
+
+
+def lemma_key(de: str) -> str:
+    toks = [t.lower() for t in WORD_RE.findall(de)]
+    while len(toks) > 1 and toks[0] in STRIP_PREFIX:
+        toks = toks[1:]
+    return " ".join(toks)
+
+
+def gloss_key(es: str) -> str:
+    return re.sub(r"\s+", " ", es).strip().rstrip(".").lower()
+
+
+def utf16_offsets(text: str):
+    """Map code-point offsets to UTF-16 offsets (identity for pure-BMP text)."""
+    if all(ord(c) <= 0xFFFF for c in text):
+        return None
+    table, pos = [], 0
+    for c in text:
+        table.append(pos)
+        pos += 2 if ord(c) > 0xFFFF else 1
+    table.append(pos)
+    return table
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def build_entries(questions):
+    surfaces = defaultdict(Counter)
+    glosses = defaultdict(Counter)
+    gloss_text = {}
+    for q in questions:
+        for v in q.get("vocabulary") or []:
+            de = str(v.get("de", "")).strip()
+            es = str(v.get("es", "")).strip()
+            key = lemma_key(de)
+            if not key or not es:
+                continue
+            surfaces[key][de] += 1
+            gk = gloss_key(es)
+            glosses[key][gk] += 1
+            gloss_text.setdefault((key, gk), es)
+
+    entries = []
+    for key in sorted(surfaces):
+        # canonical gloss: most frequent, shortest on ties
+        best = min(glosses[key].items(), key=lambda kv: (-kv[1], len(kv[0]), kv[0]))[0]
+        entries.append({
+            "lemma": key,
+            "de": surfaces[key].most_common(1)[0][0],
+            "es": gloss_text[(key, best)],
+            "count": sum(surfaces[key].values()),
+            "glosses": len(glosses[key]),
+        })
+    return entries
+
+
+def find_spans(text, lookup, max_words):
+    """Greedy longest-match of glossary lemmas over word tokens."""
+    toks = [(m.start(), m.end(), m.group().lower()) for m in WORD_RE.finditer(text)]
+    spans = []
+    i = 0
+    while i < len(toks):
+        for n in range(min(max_words, len(toks) - i), 0, -1):
+            key = " ".join(t[2] for t in toks[i:i + n])
+            entry = lookup.get(key)
+            if entry is not None:
+                spans.append([toks[i][0], toks[i + n - 1][1], entry])
+                i += n
+                break
+        else:
+            i += 1
+    table = utf16_offsets(text)
+    if table:
+        spans = [[table[s], table[e], g] for s, e, g in spans]
+    return spans
+
+
+def build(questions):
+    entries = build_entries(questions)
+    lookup = {e["lemma"]: i for i, e in enumerate(entries)}
+    max_words = max((e["lemma"].count(" ") + 1 for e in entries), default=1)
+
+    spans = {}
+    index = defaultdict(list)
+    per_question = {}
+
+    def spans_for(text):
+        key = text_key(text)
+        if key not in spans:
+            spans[key] = find_spans(text, lookup, max_words)
+        return key, spans[key]
+
+    for q in questions:
+        ref = {}
+        hit_entries = set()
+        for field in ("context", "question"):
+            text = q.get(field) or ""
+            if not text:
+                continue
+            key, sp = spans_for(text)
+            if sp:
+                ref[field] = key
+                hit_entries.update(g for _, _, g in sp)
+
+        # option hints: question's own vocabulary contained in the option text
+        own = [lookup[k] for k in (lemma_key(str(v.get("de", ""))) for v in q.get("vocabulary") or []) if k in lookup]
+        opt_hits = []
+        for opt in q.get("options") or []:
+            clean = re.sub(r"^[A-Za-zXx]\)?\s*", "", str(opt)).lower()
+            opt_hits.append([g for g in dict.fromkeys(own) if entries[g]["de"].lower() in clean][:3])
+        if any(opt_hits):
+            ref["options"] = opt_hits
+
+        for g in sorted(hit_entries):
+            index[entries[g]["lemma"]].append(q["id"])
+        if ref:
+            per_question[q["id"]] = ref
+
+    glossary = {
+        "v": 1,
+        "entries": entries,
+        "spans": {k: v for k, v in spans.items() if v},
+        "questions": per_question,
+    }
+    return glossary, dict(sorted(index.items()))
+
+
+def main():
+    questions = json.loads(INPUT.read_text(encoding="utf-8"))
+    glossary, index = build(questions)
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(json.dumps(glossary, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    INDEX_OUT.write_text(json.dumps(index, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+    entries = glossary["entries"]
+    raw = sum(len(q.get("vocabulary") or []) for q in questions)
+    n_spans = sum(len(s) for s in glossary["spans"].values())
+    print(f"vocabulary items={raw} → glossary entries={len(entries)}")
+    print(f"ambiguous (several glosses)={sum(1 for e in entries if e['glosses'] > 1)}")
+    print(f"distinct texts={len(glossary['spans'])} spans={n_spans}")
+    print(f"top: " + ", ".join(f"{e['de']}×{e['count']}" for e in sorted(entries, key=lambda e: -e["count"])[:8]))
+    print(f"Saved to {OUT} ({OUT.stat().st_size:,} bytes) and {INDEX_OUT} ({INDEX_OUT.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Cluster gap-fill questions by option set into grammar patterns (den/der/des, als/wann/wenn…).
+
+Output data/patterns.json:
+{
+  "families":    {family: [pattern keys]},   # article, pronoun, preposition, …
+  "patterns":    {key: {"family", "options", "ids", "exams", "answers": {option: n}}},
+  "by_question": {id: key},
+  "signatures":  {id: hash of (options, correct)}   # incremental rebuild cache
+}
+Only questions whose signature changed since the last run are re-normalised.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+INPUT = Path("data/questions.json")
+OUT = Path("data/patterns.json")
+TYPES = ["gap_fill", "fill_blank"]  # fill_blank: the three-option Sprachbausteine 1 of SONJA3 and RITA
+
+ARTICLES = {"der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "einem", "einer", "eines"}
+PRONOUNS = {"ich", "mich", "mir", "du", "dich", "dir", "er", "ihn", "ihm", "sie", "ihnen", "es", "wir", "uns",
+            "ihr", "euch", "sich", "mein", "dein", "sein", "unser", "euer", "denen", "deren", "dessen",
+            "welche", "welchen", "welcher", "welches", "was", "wer", "wie"}
+PREPOSITIONS = {"an", "am", "auf", "aus", "bei", "durch", "für", "gegen", "im", "in", "mit", "nach", "neben",
+                "ohne", "seit", "über", "um", "unter", "von", "vor", "wegen", "zu", "zum", "zur", "zwischen",
+                "außer", "trotz", "während"}
+CONJUNCTIONS = {"als", "wann", "wenn", "dass", "weil", "obwohl", "ob", "aber", "sondern", "denn", "oder",
+                "und", "damit", "darum", "deshalb", "trotzdem", "außerdem", "nämlich", "danach"}
+
+
+def option_text(opt) -> str:
+    return re.sub(r"^[A-Za-z]\)\s*", "", str(opt)).strip()
+
+
+def signature(q) -> str:
+    raw = json.dumps([q.get("options") or [], q.get("correct")], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def pattern_key(options):
+    """Sorted, casefolded option words; case is kept when it is the distinction (ihnen/Ihnen)."""
+    words = [option_text(o) for o in options if option_text(o)]
+    folded = {w.casefold() for w in words}
+    if len(folded) < len(set(words)):
+        return "/".join(sorted(set(words)))
+    return "/".join(sorted(folded))
+
+
+def family(key: str) -> str:
+    words = [w.casefold() for w in key.split("/")]
+    for name, lex in (("article", ARTICLES), ("pronoun", PRONOUNS),
+                      ("preposition", PREPOSITIONS), ("conjunction", CONJUNCTIONS)):
+        if all(w in lex for w in words):
+            return name
+    stem = os.path.commonprefix(words)
+    if len(stem) >= 3:
+        return "inflection"  # adjective endings / verb forms of one stem
+    return "lexical"
+
+
+def build(questions, previous=None, types=TYPES):
+    prev_sig = (previous or {}).get("signatures", {})
+    prev_key = (previous or {}).get("by_question", {})
+
+    by_question, signatures = {}, {}
+    reused = 0
+    for q in questions:
+        if q.get("type") not in types or len(q.get("options") or []) < 2:
+            continue
+        sig = signature(q)
+        signatures[q["id"]] = sig
+        if prev_sig.get(q["id"]) == sig and q["id"] in prev_key:
+            by_question[q["id"]] = prev_key[q["id"]]
+            reused += 1
+        else:
+            by_question[q["id"]] = pattern_key(q["options"])
+
+    by_id = {q["id"]: q for q in questions}
+    groups = defaultdict(list)
+    for qid, key in by_question.items():
+        groups[key].append(qid)
+
+    patterns = {}
+    for key, ids in sorted(groups.items(), key=lambda kv: (-len(kv[1]), kv[0])):
+        answers = Counter()
+        opts = key.split("/")
+        for qid in ids:
+            q = by_id[qid]
+            corr = str(q.get("correct") or "").strip().upper()[:1]
+            for o in q["options"]:
+                if str(o)[:1].upper() == corr:
+                    ans = option_text(o)
+                    answers[ans if ans in opts else ans.casefold()] += 1
+        patterns[key] = {
+            "family": family(key),
+            "options": opts,
+            "ids": ids,
+            "exams": len({by_id[i]["exam"] for i in ids}),
+            "answers": dict(answers.most_common()),
+        }
+
+    families = defaultdict(list)
+    for key, p in patterns.items():
+        families[p["family"]].append(key)
+
+    return {
+        "v": 1,
+        "families": dict(families),
+        "patterns": patterns,
+        "by_question": by_question,
+        "signatures": signatures,
+    }, reused
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--types", default=",".join(TYPES), help="question types to cluster")
+    ap.add_argument("--full", action="store_true", help="ignore the previous output and rebuild everything")
+    args = ap.parse_args()
+
+    questions = json.loads(INPUT.read_text(encoding="utf-8"))
+    previous = None
+    if OUT.exists() and not args.full:
+        previous = json.loads(OUT.read_text(encoding="utf-8"))
+
+    doc, reused = build(questions, previous, args.types.split(","))
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(json.dumps(doc, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    pats = doc["patterns"]
+    shared = {k: p for k, p in pats.items() if len(p["ids"]) > 1}
+    print(f"questions={len(doc['by_question'])} (reused {reused}) patterns={len(pats)} repeated={len(shared)}")
+    for fam, n in Counter(p["family"] for p in pats.values()).most_common():
+        print(f"  {fam:12s} {n}")
+    for key, p in list(shared.items())[:10]:
+        print(f"  {key:32s} ×{len(p['ids'])} in {p['exams']} exams, answers={p['answers']}")
+    print(f"Saved to {OUT}")
+
+
+if __name__ == "__main__":
+    main()
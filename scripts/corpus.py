@@ -0,0 +1,63 @@
+"""Source-book registry: one books/<id>.json per exam book.
+
+{
+  "id": "telc-b1",
+  "namespace": "",                   # id prefix; "" keeps the original ids (petra-lv1-1)
+  "text": "telc-b1.txt",             # OCR text layer, one line per line
+  "pdf": "telc-b1-pruefungsbuch.pdf",
+  "exams": "auto",                   # or an explicit list of exam header names
+  "exclude": [],                     # discovered names to leave out
+  "ads_pages": "auto",               # or {exam: ads page or [first, last]} to pin them
+  "footer": "ABDELLAH FARHAN"        # running page footer line, closes the answer page (optional)
+}
+
+Ids and exam names from a book with a namespace become "<namespace>:<id>"
+and "<namespace>:<EXAM>", so same-named exams of two books never group
+together, and its records carry "book"; exam keys elsewhere (lv3_ads.json)
+get the same prefix.
+"""
+import json
+from pathlib import Path
+
+BOOKS_DIR = Path("books")
+DEFAULTS = {"namespace": "", "pdf": None, "exams": "auto", "exclude": [], "ads_pages": "auto", "footer": None}
+
+
+def load_books(ids=None, books_dir=BOOKS_DIR):
+    """Book configs in id order (the default, namespace "" book first), optionally filtered by id."""
+    books = []
+    for path in sorted(Path(books_dir).glob("*.json")):
+        book = {**DEFAULTS, **json.loads(path.read_text(encoding="utf-8"))}
+        book.setdefault("id", path.stem)
+        books.append(book)
+    namespaces = [b["namespace"] for b in books]
+    dup = {n for n in namespaces if namespaces.count(n) > 1}
+    if dup:
+        raise ValueError(f"books share a namespace: {sorted(dup)}")
+    if ids:
+        wanted = set(ids)
+        unknown = wanted - {b["id"] for b in books}
+        if unknown:
+            raise ValueError(f"unknown book(s): {', '.join(sorted(unknown))}")
+        books = [b for b in books if b["id"] in wanted]
+    return sorted(books, key=lambda b: (b["namespace"] != "", b["id"]))
+
+
+def namespaced(book, key: str) -> str:
+    return f"{book['namespace']}:{key}" if book["namespace"] else key
+
+
+def book_of(q, books) -> str:
+    """Id of the book a record came from; records of the namespace "" book carry no "book"."""
+    return q.get("book") or next((b["id"] for b in books if not b["namespace"]), None)
+
+
+def tag(book, questions):
+    """Namespace the ids and exam names of freshly extracted questions in place."""
+    if not book["namespace"]:
+        return questions
+    for q in questions:
+        q["id"] = namespaced(book, q["id"])
+        q["exam"] = namespaced(book, q["exam"])
+        q["book"] = book["id"]
+    return questions
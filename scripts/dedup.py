@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Near-duplicate detection for questions and exam blocks with MinHash + LSH.
+
+  python3 scripts/dedup.py              # question clusters → data/duplicates.json
+  python3 scripts/dedup.py --apply      # copy enrichment from each cluster's representative
+  python3 scripts/dedup.py --blocks     # near-duplicate exam blocks in telc-b1.txt
+
+Candidate pairs come from LSH banding (sub-quadratic), then are verified on
+the estimated Jaccard similarity of word 3-shingles. Questions must also share
+section/teil/number to cluster, so gaps 31 and 32 of one text never merge.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from search_index import fold
+
+INPUT = Path("data/questions.json")
+OUT = Path("data/duplicates.json")
+SRC = Path("telc-b1.txt")
+
+NUM_PERM = 64
+BANDS = 16           # 16 bands × 4 rows: ~50% pair recall at J=0.5, ~99% at J=0.8
+THRESHOLD = 0.8
+SHINGLE = 3
+ENRICH_FIELDS = ["question_es", "explanation_es", "vocabulary"]
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1234)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str):
+    words = fold(text).split()
+    if len(words) < SHINGLE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def minhash(sh):
+    if not sh:
+        return [_PRIME] * NUM_PERM
+    xs = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in sh]
+    return [min([(a * x + b) % _PRIME for x in xs]) for a, b in _PERMS]
+
+
+def merge(*sigs):
+    """MinHash of a union is the element-wise min of the parts' signatures."""
+    return [min(vals) for vals in zip(*sigs)]
+
+
+def similarity(s1, s2) -> float:
+    return sum(a == b for a, b in zip(s1, s2)) / NUM_PERM
+
+
+def lsh_candidates(sigs, bands=BANDS):
+    rows = NUM_PERM // bands
+    buckets = defaultdict(list)
+    for key, sig in sigs.items():
+        for b in range(bands):
+            buckets[(b, tuple(sig[b * rows:(b + 1) * rows]))].append(key)
+    pairs = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                pairs.add((members[i], members[j]) if members[i] < members[j] else (members[j], members[i]))
+    return pairs
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+# ── questions ───────────────────────────────────────────────────────────────
+
+def item_text(q) -> str:
+    return " ".join([q.get("question") or "", " ".join(str(o) for o in q.get("options") or []),
+                     f"answer {q.get('correct', '?')}"])
+
+
+def question_signatures(questions):
+    ctx_cache = {}
+    sigs = {}
+    for q in questions:
+        ctx = q.get("context") or ""
+        if ctx not in ctx_cache:
+            ctx_cache[ctx] = minhash(shingles(ctx))
+        sigs[q["id"]] = merge(ctx_cache[ctx], minhash(shingles(item_text(q))))
+    return sigs
+
+
+def enrichment_score(q) -> int:
+    return sum(1 for f in ENRICH_FIELDS if q.get(f))
+
+
+def question_clusters(questions, threshold=THRESHOLD):
+    by_id = {q["id"]: q for q in questions}
+    sigs = question_signatures(questions)
+    slot = lambda q: (q["section"], q["teil"], q["number"])
+
+    candidates = lsh_candidates(sigs)
+    uf = UnionFind()
+    sims = {}
+    for a, b in candidates:
+        # same slot and same key, otherwise an explanation can't be shared
+        if slot(by_id[a]) != slot(by_id[b]) or by_id[a].get("correct") != by_id[b].get("correct"):
+            continue
+        s = similarity(sigs[a], sigs[b])
+        if s >= threshold:
+            uf.union(a, b)
+            sims[(a, b)] = s
+
+    groups = defaultdict(list)
+    for qid in uf.parent:
+        groups[uf.find(qid)].append(qid)
+
+    order = {q["id"]: i for i, q in enumerate(questions)}
+    clusters = []
+    for members in groups.values():
+        members = sorted(set(members), key=order.get)
+        if len(members) < 2:
+            continue
+        rep = max(members, key=lambda i: (enrichment_score(by_id[i]), -order[i]))
+        pair_sims = [s for (a, b), s in sims.items() if a in members]
+        clusters.append({
+            "rep": rep,
+            "members": members,
+            "min_similarity": round(min(pair_sims), 3),
+        })
+    clusters.sort(key=lambda c: order[c["rep"]])
+    return clusters, len(candidates)
+
+
+def exam_overlap(questions, clusters):
+    exam_of = {q["id"]: q["exam"] for q in questions}
+    totals = defaultdict(int)
+    for q in questions:
+        totals[q["exam"]] += 1
+    shared = defaultdict(int)
+    for c in clusters:
+        exams = sorted({exam_of[m] for m in c["members"]})
+        for i in range(len(exams)):
+            for j in range(i + 1, len(exams)):
+                shared[(exams[i], exams[j])] += 1
+    return [
+        {"a": a, "b": b, "shared": n, "of": min(totals[a], totals[b])}
+        for (a, b), n in sorted(shared.items(), key=lambda kv: -kv[1])
+    ]
+
+
+def representatives(questions, clusters):
+    """Ids that need their own enrichment call: singletons plus one per cluster."""
+    skip = {m for c in clusters for m in c["members"] if m != c["rep"]}
+    return [q["id"] for q in questions if q["id"] not in skip]
+
+
+def propagate(questions, clusters, fields=ENRICH_FIELDS):
+    """Copy enrichment fields from each representative to members that lack them."""
+    by_id = {q["id"]: q for q in questions}
+    copied = 0
+    for c in clusters:
+        rep = by_id[c["rep"]]
+        for m in c["members"]:
+            if m == c["rep"]:
+                continue
+            q = by_id[m]
+            for f in fields:
+                if rep.get(f) and not q.get(f):
+                    q[f] = json.loads(json.dumps(rep[f]))
+                    copied += 1
+    return copied
+
+
+# ── exam blocks in the OCR text ─────────────────────────────────────────────
+
+def exam_block_clusters(threshold=0.5):
+    """Compare every exam section slice of the book with every other one.
+
+    Whole exams only share a few sections (J≈0.2), so blocks are compared per
+    section (lv1…sb2). Every exam-name header is used, not just the first
+    one per name, so copies that find_exam_blocks skips are included too.
+    """
+    from extract_questions import section_slices, skip_noise
+    from normalize import clean_text
+
+    lines = clean_text(SRC.read_text(encoding="utf-8", errors="ignore"))
+    starts = []
+    for i, line in enumerate(lines):
+        if re.fullmatch(r"[A-ZÄÖÜ]{3,}\d?", line) and any(
+            re.search(r"Leseverstehen,\s*Teil\s*1", w, re.IGNORECASE) for w in lines[i + 1:i + 21]
+        ):
+            # skip the repeated page header of the same block
+            if not starts or line != starts[-1][0] or i - starts[-1][1] > 60:
+                starts.append((line, i))
+
+    sigs = {}
+    for k, (name, s) in enumerate(starts):
+        e = starts[k + 1][1] if k + 1 < len(starts) else len(lines)
+        for sec, block in section_slices(lines, s, e).items():
+            sh = shingles(" ".join(l for l in block if not skip_noise(l)))
+            if len(sh) >= 20:
+                sigs[f"{name}@{s}/{sec}"] = minhash(sh)
+
+    pairs = []
+    for a, b in lsh_candidates(sigs, bands=32):
+        if a.rsplit("/", 1)[1] != b.rsplit("/", 1)[1]:
+            continue
+        s = similarity(sigs[a], sigs[b])
+        if s >= threshold:
+            pairs.append({"a": a, "b": b, "similarity": round(s, 3)})
+    return sorted(pairs, key=lambda p: -p["similarity"]), len(starts)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    ap.add_argument("--apply", action="store_true", help="propagate enrichment within clusters into questions.json")
+    ap.add_argument("--blocks", action="store_true", help="compare exam blocks of the OCR book instead")
+    args = ap.parse_args()
+
+    if args.blocks:
+        pairs, n = exam_block_clusters()
+        print(f"exam blocks={n} near-duplicate section pairs={len(pairs)}")
+        for p in pairs:
+            print(f"  {p['a']:22s} ~ {p['b']:22s} J≈{p['similarity']:.2f}")
+        return
+
+    questions = json.loads(INPUT.read_text(encoding="utf-8"))
+    clusters, n_candidates = question_clusters(questions, args.threshold)
+    exams = exam_overlap(questions, clusters)
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(json.dumps({"v": 1, "threshold": args.threshold, "clusters": clusters, "exams": exams},
+                              ensure_ascii=False, indent=1), encoding="utf-8")
+
+    dup = sum(len(c["members"]) - 1 for c in clusters)
+    print(f"questions={len(questions)} lsh_candidates={n_candidates} clusters={len(clusters)} "
+          f"redundant={dup} → enrichment calls saved={dup}/{len(questions)}")
+    for e in exams[:8]:
+        print(f"  {e['a']:10s} ~ {e['b']:10s} shared {e['shared']}/{e['of']}")
+    print(f"Saved to {OUT}")
+
+    if args.apply:
+        copied = propagate(questions, clusters)
+        INPUT.write_text(json.dumps(questions, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"propagated {copied} fields into {INPUT}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""One enrichment pass: question_es, explanation_es and vocabulary in a single call per batch.
+
+  python3 scripts/enrich.py                                   # every missing or stale field
+  python3 scripts/enrich.py --fields question_es,explanation_es
+  python3 scripts/enrich.py --dry-run                         # plan and call count only
+
+Replaces running generate_translations/translate_fast and then
+generate_explanations, which asked for explanation_es and vocabulary twice.
+Each question is asked only for the fields it needs; batches are grouped by
+that field set so every request carries one response schema. A field is stale
+when the question/options/key it was generated from changed since (tracked in
+data/enrich_state.json) or when it is a generate_explanations local fallback.
+Near-duplicate clusters from data/duplicates.json are enriched once through
+their representative and copied to the other members.
+
+Work is ordered by --priority (flagged questions, then the app's exam order)
+and kept in data/enrich_queue.json, so an interrupted run picks up where it
+stopped and the ETA uses throughput observed so far.
+"""
+import argparse
+import hashlib
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import gemini
+import metrics
+import schemas
+import store
+from json_salvage import salvage
+from work_queue import DEFAULT_PRIORITY, QUEUE, WorkQueue, priority_key
+
+DATA = store.QUESTIONS
+STATE = Path("data/enrich_state.json")
+DUPLICATES = Path("data/duplicates.json")
+FIELDS = ["question_es", "explanation_es", "vocabulary"]
+BATCH_SIZE = 10
+WORKERS = 4
+RETRY_BACKOFF = 2  # seconds × attempt
+MAX_REQUEUE = 2
+
+# Text generate_explanations.local_fallback writes when the API was unavailable
+FALLBACK_MARKERS = ("El OCR no permite ver la clave", "Encaja mejor con el contexto del ejercicio",
+                    "(revisar significado)")
+
+FIELD_PROMPTS = {
+    "question_es": "question_es: traducción al español de la pregunta alemana",
+    "explanation_es": "explanation_es: 2-3 frases cortas en español simple: por qué la respuesta correcta es "
+                      "correcta y por qué falla una opción típica. Si correcta='?', dilo claramente",
+    "vocabulary": "vocabulary: 3-5 palabras clave alemanas de la pregunta o del contexto con su traducción "
+                  "({\"de\", \"es\"})",
+}
+LEGACY_BATCHES = {"translate": 5, "explain": 8}  # generate_translations + generate_explanations
+
+
+def source_sig(q) -> str:
+    raw = json.dumps([q.get("question"), q.get("options"), q.get("correct"), (q.get("context") or "")[:600]],
+                     ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def is_fallback(value) -> bool:
+    text = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else value
+    return any(m in text for m in FALLBACK_MARKERS)
+
+
+def needed_fields(q, fields, state, force=False):
+    """Fields of q to request: missing, local fallbacks, or generated from an older source."""
+    if force:
+        return list(fields)
+    sig = source_sig(q)
+    known = state.get(q["id"], {})
+    need = []
+    for f in fields:
+        value = q.get(f)
+        if not value or is_fallback(value) or (f in known and known[f] != sig):
+            need.append(f)
+    return need
+
+
+def load_clusters(path=DUPLICATES):
+    if not Path(path).exists():
+        return []
+    return json.loads(Path(path).read_text(encoding="utf-8")).get("clusters", [])
+
+
+def plan(questions, fields, state, clusters, force=False):
+    """(needs, member_needs) as {id: [fields]}.
+
+    A cluster member's needs are asked for on its representative (unless the
+    representative already has them fresh) and land in member_needs to be
+    copied over afterwards.
+    """
+    member_of = {m: c["rep"] for c in clusters for m in c["members"] if m != c["rep"]}
+    by_id = {q["id"]: q for q in questions}
+    needs = {}
+    for q in questions:
+        need = needed_fields(q, fields, state, force)
+        if need:
+            needs[q["id"]] = need
+    member_needs = {}
+    for qid in list(needs):
+        rep = member_of.get(qid)
+        if rep in by_id:
+            member_needs[qid] = needs.pop(qid)
+            missing_on_rep = set(member_needs[qid]) & set(needed_fields(by_id[rep], fields, state, force))
+            if missing_on_rep:
+                needs[rep] = [f for f in fields if f in missing_on_rep | set(needs.get(rep, []))]
+    return needs, member_needs
+
+
+def make_batches(items, by_id):
+    """[(fields tuple, [questions])] keeping queue order; one field set per batch."""
+    batches, open_ = [], {}
+    for qid, fields in items:
+        key = tuple(fields)
+        open_.setdefault(key, []).append(by_id[qid])
+        if len(open_[key]) == BATCH_SIZE:
+            batches.append((key, open_.pop(key)))
+    batches.extend(open_.items())
+    return batches
+
+
+def legacy_calls(questions, force=False):
+    """API calls the old translate-then-explain scripts would make for the same corpus."""
+    translate = sum(1 for q in questions if force or not q.get("question_es"))
+    explain = sum(
+        1 for i in range(0, len(questions), LEGACY_BATCHES["explain"])
+        if force or not all(q.get("explanation_es") for q in questions[i:i + LEGACY_BATCHES["explain"]])
+    )
+    return -(-translate // LEGACY_BATCHES["translate"]) + explain
+
+
+def build_prompt(batch, fields) -> str:
+    compact = []
+    for q in batch:
+        item = {
+            "id": q["id"],
+            "tipo": f"{q['section']} T{q['teil']} {q['type']}",
+            "pregunta": q.get("question", ""),
+            "opciones": [str(o)[:80] for o in (q.get("options") or [])[:15]],
+            "correcta": q.get("correct", ""),
+        }
+        if "explanation_es" in fields or "vocabulary" in fields:
+            item["contexto"] = (q.get("context") or "")[:600]
+        compact.append(item)
+    wanted = "\n".join(f"- {FIELD_PROMPTS[f]}" for f in fields)
+    return (
+        "Eres profesor de alemán para hispanohablantes que preparan el examen telc B1.\n"
+        f"Para cada pregunta devuelve su id y solo estos campos:\n{wanted}\n\n"
+        "Preguntas:\n" + json.dumps(compact, ensure_ascii=False)
+    )
+
+
+def call_gemini(api_key, prompt, fields) -> str:
+    body = gemini.request_body(prompt, schemas.batch(list(fields)))
+    return gemini.generate(api_key, body, backoff=RETRY_BACKOFF) or ""
+
+
+def process_batch(api_key, fields, batch):
+    text = call_gemini(api_key, build_prompt(batch, fields), fields)
+    got, lost = salvage(text, [q["id"] for q in batch])
+    if lost:
+        print(f"  {'+'.join(fields)}: lost from reply: {', '.join(lost)}", flush=True)
+    got, _ = schemas.check(got, schemas.item(list(fields)))  # invalid ids are printed by check()
+    return fields, batch, got
+
+
+def clean(field, value):
+    if field == "vocabulary":
+        return [{"de": v["de"].strip(), "es": v["es"].strip()} for v in value[:5] if v["de"].strip()]
+    return value.strip()[:900] if field == "explanation_es" else value.strip()
+
+
+def merge(q, item, fields, state):
+    sig = source_sig(q)
+    for f in fields:
+        q[f] = clean(f, item[f])
+        state.setdefault(q["id"], {})[f] = sig
+
+
+def share(questions, clusters, member_needs, state):
+    """Copy the representative's (now fresh) fields to cluster members that needed them."""
+    rep_of = {m: c["rep"] for c in clusters for m in c["members"] if m != c["rep"]}
+    by_id = {q["id"]: q for q in questions}
+    copied = 0
+    for qid, fields in member_needs.items():
+        q, rep = by_id[qid], by_id[rep_of[qid]]
+        for f in fields:
+            if rep.get(f) and not needed_fields(rep, [f], state):
+                q[f] = json.loads(json.dumps(rep[f]))
+                state.setdefault(qid, {})[f] = source_sig(q)
+                copied += 1
+    return copied
+
+
+def save(questions, state):
+    store.save_questions(questions, DATA)
+    with metrics.timer("data.save"):
+        STATE.write_text(json.dumps(state, ensure_ascii=False, indent=0, sort_keys=True), encoding="utf-8")
+
+
+def enrich_all(fields=FIELDS, force=False, dedup=True, dry_run=False, priority=DEFAULT_PRIORITY, fresh=False,
+               questions=None):
+    """Enrich `questions` in place (default: load questions.json); saves to questions.json as it goes."""
+    if questions is None:
+        questions = store.load_questions(DATA)
+    with metrics.timer("data.load"):
+        state = json.loads(STATE.read_text(encoding="utf-8")) if STATE.exists() else {}
+    by_id = {q["id"]: q for q in questions}
+    clusters = load_clusters() if dedup else []
+
+    needs, member_needs = plan(questions, fields, state, clusters, force)
+    spec = {"fields": fields, "force": force, "dedup": dedup, "priority": priority}
+    queue = None if fresh else WorkQueue.resume(spec, QUEUE)
+    if queue:
+        items = [(qid, f) for qid, f in queue.pending() if qid in by_id]
+        print(f"resuming {QUEUE}: {len(queue.done)} done, {len(items)} left", flush=True)
+    else:
+        key = priority_key(priority)
+        order = sorted(needs, key=lambda qid: key(by_id[qid]))  # stable: file order breaks ties
+        items = [(qid, needs[qid]) for qid in order]
+        queue = WorkQueue([[qid, f] for qid, f in items], spec, QUEUE)
+    batches = make_batches(items, by_id)
+
+    per_field = {f: sum(f in n for _, n in items) for f in fields}
+    print(f"questions={len(questions)} to request={len(items)} covered by duplicates={len(member_needs)} "
+          + " ".join(f"{f}={n}" for f, n in per_field.items()), flush=True)
+    print(f"calls: {len(batches)} (translate-then-explain would make {legacy_calls(questions, force)})"
+          f"  ETA {queue.eta()}", flush=True)
+    if items:
+        print("first: " + ", ".join(qid for qid, _ in items[:8]), flush=True)
+    if dry_run or not (batches or member_needs):
+        return
+    api_key = gemini.api_key() if batches else ""
+
+    done = 0
+    pending = batches
+    try:
+        for round_no in range(MAX_REQUEUE + 1):
+            if not pending:
+                break
+            if round_no:
+                n = sum(len(b) for _, b in pending)
+                metrics.count("questions.requeued", n)
+                print(f"Requeue round {round_no}: {n} questions lost from replies", flush=True)
+            lost = defaultdict(list)
+            with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+                # the pool takes work FIFO, so submission order is priority order
+                futures = [pool.submit(process_batch, api_key, f, b) for f, b in pending]
+                try:
+                    for k, future in enumerate(as_completed(futures), 1):
+                        fields_, batch, got = future.result()
+                        for q in batch:
+                            if q["id"] in got:
+                                merge(q, got[q["id"]], fields_, state)
+                                done += 1
+                            else:
+                                lost[fields_].append(q)
+                        queue.mark_done(got)
+                        print(f"  +{len(got)}/{len(batch)} [{', '.join(fields_)}] ({done}/{len(items)}) "
+                              f"ETA {queue.eta()}", flush=True)
+                        if k % 20 == 0:
+                            save(questions, state)
+                            queue.save()
+                except KeyboardInterrupt:
+                    # don't let the pool drain the queued batches on the way out
+                    for f in futures:
+                        f.cancel()
+                    raise
+            pending = [(f, qs[i:i + BATCH_SIZE]) for f, qs in lost.items() for i in range(0, len(qs), BATCH_SIZE)]
+    finally:
+        copied = share(questions, clusters, member_needs, state)
+        save(questions, state)
+        queue.finish()
+    metrics.count("questions.enriched", done)
+    metrics.count("fields.shared", copied)
+    gave_up = sum(len(b) for _, b in pending)
+    print(f"\nDone! enriched {done}, copied {copied} fields to duplicates, gave up on {gave_up}"
+          + (f" (left in {QUEUE})" if gave_up else ""), flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fields", default=",".join(FIELDS), help="comma-separated subset of " + ",".join(FIELDS))
+    ap.add_argument("--force", action="store_true", help="re-request the fields even where present and fresh")
+    ap.add_argument("--no-dedup", action="store_true", help="enrich every cluster member on its own")
+    ap.add_argument("--dry-run", action="store_true", help="print the plan without calling the API")
+    ap.add_argument("--priority", default=";".join(DEFAULT_PRIORITY),
+                    help="';'-separated rules: flags:F1,F2 | exam_order | section_order (default: %(default)s)")
+    ap.add_argument("--fresh", action="store_true", help=f"ignore a saved {QUEUE} and plan from scratch")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        ap.error(f"unknown field(s): {', '.join(unknown)}")
+    fields = [f for f in FIELDS if f in fields]
+    with metrics.run("enrich", profile=args.profile, metrics_file=args.metrics_file):
+        enrich_all(fields, force=args.force, dedup=not args.no_dedup, dry_run=args.dry_run,
+                   priority=[r for r in args.priority.split(";") if r], fresh=args.fresh)
+
+
+if __name__ == "__main__":
+    main()
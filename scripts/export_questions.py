@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Export questions.json in compact formats (minified, columnar JSON, MessagePack) and the rendered cards."""
+import argparse
+import json
+import struct
+from pathlib import Path
+
+try:
+    import msgpack
+except ImportError:  # optional C codec; the pure-Python subset below is used otherwise
+    msgpack = None
+
+INPUT = Path("data/questions.json")
+OUT_DIR = Path("data")
+
+FORMATS = {
+    "pretty": "questions.json",
+    "min": "questions.min.json",
+    "columnar": "questions.columnar.json",
+    "msgpack": "questions.msgpack",
+}
+
+# Low-cardinality / heavily repeated fields stored once in a string table
+# and referenced by index from the column.
+TABLE_FIELDS = ["exam", "section", "type", "instruction", "context"]
+COLUMNAR_VERSION = 1
+
+
+# ── columnar JSON ───────────────────────────────────────────────────────────
+
+def to_columnar(questions):
+    fields = []
+    for q in questions:
+        for k in q:
+            if k not in fields:
+                fields.append(k)
+
+    tables = {f: [] for f in TABLE_FIELDS if f in fields}
+    lookup = {f: {} for f in tables}
+    option_banks, bank_lookup = [], {}
+    columns = {f: [] for f in fields}
+    # Rows where an optional field (e.g. ads_extracted) is not set at all,
+    # so decoding restores the record exactly instead of adding nulls.
+    absent = {}
+
+    for row, q in enumerate(questions):
+        for f in fields:
+            if f not in q:
+                absent.setdefault(f, []).append(row)
+            v = q.get(f)
+            if f in tables:
+                idx = lookup[f].get(v)
+                if idx is None:
+                    idx = lookup[f][v] = len(tables[f])
+                    tables[f].append(v)
+                columns[f].append(idx)
+            elif f == "options":
+                key = tuple(v or [])
+                idx = bank_lookup.get(key)
+                if idx is None:
+                    idx = bank_lookup[key] = len(option_banks)
+                    option_banks.append(list(key))
+                columns[f].append(idx)
+            else:
+                columns[f].append(v)
+
+    tables["options"] = option_banks
+    return {
+        "v": COLUMNAR_VERSION,
+        "n": len(questions),
+        "fields": fields,
+        "tables": tables,
+        "columns": columns,
+        "absent": absent,
+    }
+
+
+def from_columnar(doc):
+    fields = doc["fields"]
+    tables = doc["tables"]
+    columns = doc["columns"]
+    resolved = []
+    for f in fields:
+        col = columns[f]
+        if f in tables:
+            tbl = tables[f]
+            if f == "options":
+                col = [list(tbl[i]) for i in col]
+            else:
+                col = [tbl[i] for i in col]
+        resolved.append(col)
+    records = [dict(zip(fields, row)) for row in zip(*resolved)]
+    for f, rows in doc.get("absent", {}).items():
+        for row in rows:
+            del records[row][f]
+    return records
+
+
+# ── MessagePack (subset: nil/bool/int/float/str/array/map) ──────────────────
+
+def msgpack_dumps(obj) -> bytes:
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(0xC0)
+    elif obj is True:
+        out.append(0xC3)
+    elif obj is False:
+        out.append(0xC2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xFF)
+        elif 0 <= obj <= 0xFFFF:
+            out += struct.pack(">BH", 0xCD, obj)
+        elif 0 <= obj <= 0xFFFFFFFF:
+            out += struct.pack(">BI", 0xCE, obj)
+        else:
+            out += struct.pack(">Bq", 0xD3, obj)
+    elif isinstance(obj, float):
+        out += struct.pack(">Bd", 0xCB, obj)
+    elif isinstance(obj, str):
+        b = obj.encode("utf-8")
+        n = len(b)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n <= 0xFF:
+            out += struct.pack(">BB", 0xD9, n)
+        elif n <= 0xFFFF:
+            out += struct.pack(">BH", 0xDA, n)
+        else:
+            out += struct.pack(">BI", 0xDB, n)
+        out += b
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xFFFF:
+            out += struct.pack(">BH", 0xDC, n)
+        else:
+            out += struct.pack(">BI", 0xDD, n)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n <= 0xFFFF:
+            out += struct.pack(">BH", 0xDE, n)
+        else:
+            out += struct.pack(">BI", 0xDF, n)
+        for k, v in obj.items():
+            _pack(k, out)
+            _pack(v, out)
+    else:
+        raise TypeError(f"cannot msgpack {type(obj).__name__}")
+
+
+def msgpack_loads(data: bytes):
+    obj, pos = _unpack(memoryview(data), 0)
+    if pos != len(data):
+        raise ValueError(f"trailing bytes at offset {pos}")
+    return obj
+
+
+def _unpack(buf, pos):
+    b = buf[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    if b >= 0xE0:
+        return b - 0x100, pos
+    if 0xA0 <= b <= 0xBF:
+        n = b & 0x1F
+        return str(buf[pos:pos + n], "utf-8"), pos + n
+    if 0x90 <= b <= 0x9F:
+        return _unpack_array(buf, pos, b & 0x0F)
+    if 0x80 <= b <= 0x8F:
+        return _unpack_map(buf, pos, b & 0x0F)
+    if b == 0xC0:
+        return None, pos
+    if b == 0xC2:
+        return False, pos
+    if b == 0xC3:
+        return True, pos
+    if b == 0xCB:
+        return struct.unpack_from(">d", buf, pos)[0], pos + 8
+    if b == 0xCD:
+        return struct.unpack_from(">H", buf, pos)[0], pos + 2
+    if b == 0xCE:
+        return struct.unpack_from(">I", buf, pos)[0], pos + 4
+    if b == 0xD3:
+        return struct.unpack_from(">q", buf, pos)[0], pos + 8
+    if b in (0xD9, 0xDA, 0xDB):
+        fmt, width = {0xD9: (">B", 1), 0xDA: (">H", 2), 0xDB: (">I", 4)}[b]
+        n = struct.unpack_from(fmt, buf, pos)[0]
+        pos += width
+        return str(buf[pos:pos + n], "utf-8"), pos + n
+    if b in (0xDC, 0xDD):
+        fmt, width = (">H", 2) if b == 0xDC else (">I", 4)
+        return _unpack_array(buf, pos + width, struct.unpack_from(fmt, buf, pos)[0])
+    if b in (0xDE, 0xDF):
+        fmt, width = (">H", 2) if b == 0xDE else (">I", 4)
+        return _unpack_map(buf, pos + width, struct.unpack_from(fmt, buf, pos)[0])
+    raise ValueError(f"unsupported msgpack type 0x{b:02x} at offset {pos - 1}")
+
+
+def _unpack_array(buf, pos, n):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(buf, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(buf, pos, n):
+    d = {}
+    for _ in range(n):
+        k, pos = _unpack(buf, pos)
+        v, pos = _unpack(buf, pos)
+        d[k] = v
+    return d, pos
+
+
+# ── encode / decode by format name ──────────────────────────────────────────
+
+def encode(questions, fmt: str) -> bytes:
+    if fmt == "pretty":
+        return json.dumps(questions, ensure_ascii=False, indent=2).encode("utf-8")
+    if fmt == "min":
+        return json.dumps(questions, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if fmt == "columnar":
+        doc = to_columnar(questions)
+        return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if fmt == "msgpack":
+        if msgpack is not None:
+            return msgpack.packb(questions, use_bin_type=True)
+        return msgpack_dumps(questions)
+    raise ValueError(f"unknown format: {fmt}")
+
+
+def decode(data: bytes, fmt: str):
+    if fmt in ("pretty", "min"):
+        return json.loads(data)
+    if fmt == "columnar":
+        return from_columnar(json.loads(data))
+    if fmt == "msgpack":
+        if msgpack is not None:
+            return msgpack.unpackb(data, raw=False)
+        return msgpack_loads(data)
+    raise ValueError(f"unknown format: {fmt}")
+
+
+def load_questions(path: Path):
+    """Load questions from any exported format, picked by file name."""
+    name = Path(path).name
+    fmt = next((f for f, fname in FORMATS.items() if name == fname), None)
+    if fmt is None:
+        fmt = "msgpack" if name.endswith(".msgpack") else "pretty"
+    return decode(Path(path).read_bytes(), fmt)
+
+
+def export(questions, formats=("min", "columnar", "msgpack"), out_dir=OUT_DIR, cards=True):
+    """Write each format to out_dir after checking it decodes back to `questions`, then the card fragments."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for fmt in formats:
+        data = encode(questions, fmt)
+        if decode(data, fmt) != questions:
+            raise SystemExit(f"{fmt}: round-trip mismatch, not writing")
+        path = out_dir / FORMATS[fmt]
+        path.write_bytes(data)
+        print(f"{fmt:9s} → {path} ({len(data):,} bytes)")
+    if cards:
+        import render_cards
+        render_cards.write(questions, out_dir / "cards.json")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--format", "-f", action="append", choices=sorted(FORMATS),
+                    help="format(s) to write (default: all compact formats)")
+    ap.add_argument("--input", type=Path, default=INPUT)
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    ap.add_argument("--no-cards", action="store_true", help="skip the pre-rendered cards.json (scripts/render_cards.py)")
+    args = ap.parse_args()
+
+    questions = json.loads(args.input.read_text(encoding="utf-8"))
+    export(questions, args.format or ["min", "columnar", "msgpack"], args.out_dir, cards=not args.no_cards)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,24 @@
 #!/usr/bin/env python3
-"""Extract LV3 Anzeigen (ads) from PDF pages using Gemini Vision API."""
-import base64, json, os, subprocess, sys, time, urllib.request
+"""Extract LV3 Anzeigen (ads) from PDF pages using Gemini Vision API.
+
+With --engine tesseract the pages are OCR'd locally in a process pool first
+(scripts/ocr_ads.py) and only pages below --min-confidence go to Gemini.
+Without GEMINI_API_KEY it stays offline: those exams keep their OCR result
+(possibly no ads) and are listed as low-confidence at the end."""
+import argparse, base64, json, os, subprocess, sys
+from pathlib import Path
+
+import ad_pages
+import corpus
+import gemini
+import metrics
+import ocr_ads
+import schemas
+from json_salvage import parse_items
 
-GEMINI_KEY = os.environ["GEMINI_API_KEY"]
-PDF = "telc-b1-pruefungsbuch.pdf"
 OUT = "data/lv3_ads.json"
 
-# Exam name → ads page number (page AFTER the LV3 questions page)
-EXAM_ADS_PAGES = {
-    "PETRA": 6, "EVA1": 19, "SOPHIE": 34, "NADIA2": 47,
-    "NICOLE": 60, "ANDREAS": 73, "ANNIKA3": 87, "IRIS1": 100,
-    "CAROLINA": 126, "VERA": 139, "JENNIFER": 152, "ANDREAS2": 163,
-    "THOMAS": 174, "TAMARA": 187, "JAN": 200, "VIKTOR": 213,
-}
-
-PROMPT = """This is a page from a German telc B1 exam (Leseverstehen Teil 3) containing Anzeigen (classified ads) labeled a) through l).
+PROMPT = """These are the page(s) from a German telc B1 exam (Leseverstehen Teil 3) containing Anzeigen (classified ads) labeled a) through l).
 
 Extract ALL ads with their exact German text. Return ONLY a JSON array like:
 [
@@ -28,71 +32,130 @@ Rules:
 - Keep the EXACT German text, including phone numbers, addresses, prices
 - Do NOT translate or modify the text
 - Include line breaks as spaces
-- Return ONLY valid JSON, no markdown fences"""
-
-
-def extract_ads_from_page(page_num: int) -> list:
-    """Convert PDF page to image and send to Gemini Vision."""
-    # Convert page to JPEG
-    tmp = f"/tmp/lv3_page_{page_num}.jpg"
-    subprocess.run(
-        ["pdftoppm", "-jpeg", "-f", str(page_num), "-l", str(page_num),
-         "-r", "250", PDF, f"/tmp/lv3_page_{page_num}"],
-        capture_output=True
-    )
-    # pdftoppm adds page suffix
+"""
+
+
+def render_pages(pdf: str, first: int, last: int = None) -> list:
+    """Render a PDF page range to JPEGs; returns the image paths in page order."""
+    last = last or first
     import glob
-    files = glob.glob(f"/tmp/lv3_page_{page_num}*.jpg")
+    stem = f"/tmp/lv3_{Path(pdf).stem}_{first}"
+    for old in glob.glob(f"{stem}-*.jpg"):  # a previous run may have rendered a longer range
+        os.remove(old)
+    with metrics.timer("render.pdftoppm"):
+        subprocess.run(
+            ["pdftoppm", "-jpeg", "-f", str(first), "-l", str(last),
+             "-r", "250", pdf, stem],
+            capture_output=True
+        )
+    # pdftoppm adds page suffix
+    files = sorted(glob.glob(f"{stem}-*.jpg"))
+    if not files:
+        print(f"  ERROR: No image generated for pages {first}-{last}")
+    return files
+
+
+def extract_ads_from_page(api_key: str, pdf: str, first: int, last: int = None, files: list = None) -> list:
+    """Convert the PDF page range to images and send them to Gemini Vision in one request."""
+    files = files or render_pages(pdf, first, last)
     if not files:
-        print(f"  ERROR: No image generated for page {page_num}")
         return []
-    img_path = files[0]
-
-    with open(img_path, "rb") as f:
-        img_b64 = base64.b64encode(f.read()).decode()
-
-    body = json.dumps({
-        "contents": [{"parts": [
-            {"inlineData": {"mimeType": "image/jpeg", "data": img_b64}},
-            {"text": PROMPT}
-        ]}],
-        "generationConfig": {"temperature": 0.1}
-    }).encode()
-
-    req = urllib.request.Request(
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}",
-        data=body,
-        headers={"Content-Type": "application/json"}
-    )
-
-    for attempt in range(3):
-        try:
-            resp = urllib.request.urlopen(req, timeout=90)
-            result = json.loads(resp.read())
-            text = result["candidates"][0]["content"]["parts"][0]["text"]
-            # Parse JSON from response
-            text = text.strip()
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1].rsplit("```", 1)[0]
-            ads = json.loads(text)
-            return ads
-        except Exception as e:
-            print(f"  Attempt {attempt+1} failed: {e}")
-            if attempt < 2:
-                time.sleep(3 * (attempt + 1))
-    return []
+
+    images = []
+    for img_path in files:
+        with open(img_path, "rb") as f:
+            images.append({"inlineData": {"mimeType": "image/jpeg", "data": base64.b64encode(f.read()).decode()}})
+
+    body = gemini.request_body(images + [{"text": PROMPT}], schemas.ADS, temperature=0.1)
+    return gemini.generate(api_key, body, backoff=3, timeout=90, parse=parse_ads) or []
+
+
+def parse_ads(text: str) -> list:
+    # Keep every complete ad even if the reply is cut off or one ad is broken
+    with metrics.timer("json.parse_model_output"):
+        ads, broken = parse_items(text)
+    bad = [a for a in ads if schemas.validate(a, schemas.AD)]
+    metrics.count("schema.valid", len(ads) - len(bad))
+    metrics.count("schema.invalid", len(bad))
+    ads = [a for a in ads if a not in bad]
+    if not ads:
+        raise ValueError("no ads in response")
+    if broken:
+        print(f"  {len(broken)} ad(s) unparseable, kept {len(ads)}")
+    return ads
 
 
 def main():
-    all_ads = {}
-    for exam, page in sorted(EXAM_ADS_PAGES.items(), key=lambda x: x[1]):
-        print(f"Extracting {exam} (page {page})...", flush=True)
-        ads = extract_ads_from_page(page)
-        print(f"  → {len(ads)} ads extracted", flush=True)
-        all_ads[exam] = ads
-        time.sleep(1)  # Rate limit
-
-    with open(OUT, "w") as f:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--books", help=f"comma-separated book ids from {corpus.BOOKS_DIR}/ (default: all)")
+    ap.add_argument("--engine", choices=["vision", "tesseract"], default="vision")
+    ap.add_argument("--min-confidence", type=float, default=ocr_ads.MIN_CONFIDENCE,
+                    help="local OCR results below this go to the vision model (tesseract engine)")
+    ap.add_argument("--jobs", type=int, default=None, help="OCR processes (default: all cores)")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+    if args.engine == "tesseract" and not ocr_ads.available():
+        sys.exit("tesseract not found on PATH; use --engine vision")
+    with metrics.run("extract_lv3_ads", profile=args.profile, metrics_file=args.metrics_file):
+        extract_all(corpus.load_books(args.books.split(",") if args.books else None),
+                    args.engine, args.min_confidence, args.jobs)
+
+
+def local_ads(pdf: str, ranges: dict, min_confidence: float, jobs: int = None, api_key: str = "") -> tuple:
+    """({exam: ads} accepted from local OCR, {exam: rendered images} left for the vision model, [exams
+    accepted below min_confidence because there is no api_key])."""
+    rendered = {exam: render_pages(pdf, first, last) for exam, (first, last) in ranges.items()}
+    results = ocr_ads.ocr_all({e: f for e, f in rendered.items() if f}, jobs)
+    accepted, doubtful, low = {}, {}, []
+    for exam, files in rendered.items():
+        res = results.get(exam, {"ads": [], "confidence": 0.0})
+        metrics.observe("ocr.confidence", res["confidence"])
+        if res["confidence"] >= min_confidence or not api_key:
+            accepted[exam] = res["ads"]
+            metrics.count("ocr.accepted")
+            if res["confidence"] < min_confidence:
+                low.append(exam)
+                metrics.count("ocr.low_confidence")
+                print(f"  {exam}: OCR confidence {res['confidence']:.2f}, {len(res['ads'])} ads kept "
+                      f"(no GEMINI_API_KEY)", flush=True)
+        else:
+            doubtful[exam] = files
+            metrics.count("ocr.fallback")
+            print(f"  {exam}: OCR confidence {res['confidence']:.2f} < {min_confidence}, using vision", flush=True)
+    return accepted, doubtful, low
+
+
+def extract_all(books, engine="vision", min_confidence=ocr_ads.MIN_CONFIDENCE, jobs=None):
+    api_key = gemini.api_key(required=engine == "vision")  # the tesseract engine only falls back to vision with a key
+    all_ads, low_confidence = {}, []
+    for book in books:
+        if not book["pdf"]:
+            print(f"{book['id']}: no pdf configured, skipped", flush=True)
+            continue
+        ranges = ad_pages.ad_ranges(book)
+        if book["ads_pages"] == "auto":
+            print(f"{book['id']}: discovered ads pages for {len(ranges)} exams", flush=True)
+        accepted, rendered = {}, {}
+        if engine == "tesseract":
+            accepted, rendered, low = local_ads(book["pdf"], ranges, min_confidence, jobs, api_key)
+            low_confidence.extend(corpus.namespaced(book, exam) for exam in low)
+            print(f"{book['id']}: {len(accepted)} exams from local OCR, {len(rendered)} to vision", flush=True)
+        for exam, (first, last) in sorted(ranges.items(), key=lambda x: x[1]):
+            key = corpus.namespaced(book, exam)
+            if exam in accepted:
+                all_ads[key] = accepted[exam]
+                metrics.observe("page.ads", len(accepted[exam]))
+                continue
+            span = f"page {first}" if first == last else f"pages {first}-{last}"
+            print(f"Extracting {key} ({span})...", flush=True)
+            with metrics.timer("page.total"):
+                ads = extract_ads_from_page(api_key, book["pdf"], first, last, rendered.get(exam))
+            metrics.observe("page.ads", len(ads))
+            print(f"  → {len(ads)} ads extracted", flush=True)
+            all_ads[key] = ads
+            metrics.sleep(1)  # Rate limit
+
+    with metrics.timer("data.save"), open(OUT, "w") as f:
         json.dump(all_ads, f, ensure_ascii=False, indent=2)
     print(f"\nSaved to {OUT}")
 
@@ -102,6 +165,8 @@ def main():
     print(f"Total ads: {total} across {len(all_ads)} exams")
     if missing:
         print(f"WARNING: Exams with <10 ads: {missing}")
+    if low_confidence:
+        print(f"WARNING: Low-confidence OCR kept without a vision check (no GEMINI_API_KEY): {low_confidence}")
 
 
 if __name__ == "__main__":
@@ -1,25 +1,26 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
 import json
+import os
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-SRC = Path("telc-b1.txt")
-OUT = Path("data/questions.json")
-
-EXAMS = [
-    "ANDREAS", "ANDREAS2", "ANNIKA3", "CAROLINA", "EVA1", "IRIS1", "JAN", "JENNIFER",
-    "NADIA2", "NICOLE", "PETRA", "SOPHIE", "TAMARA", "THOMAS", "VERA", "VIKTOR",
-]
+import answer_keys
+import corpus
+import metrics
+import normalize
+from normalize import clean_line  # noqa: F401  (re-exported for the benchmarks)
 
+OUT = Path("data/questions.json")
+KEYS_REPORT = Path("data/answer_keys.json")  # where each answer key was read, and conflicts
+CACHE_DIR = Path("data/extracted")  # per-book output, reused while text and parser are unchanged
 
-def clean_line(s: str) -> str:
-    s = s.replace("\x0c", " ").replace("\u200f", " ").replace("\u200e", " ")
-    s = s.replace("\u202a", " ").replace("\u202c", " ")
-    s = re.sub(r"[\u0600-\u06FF]+", " ", s)
-    s = s.replace("\t", " ")
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+EXAM_HEADER = re.compile(r"[A-ZÄÖÜ]{3,}\d?")
+LV1_HEADER = re.compile(r"Leseverstehen,\s*Teil\s*1", re.IGNORECASE)
+MIN_EXAM_LINES = 200  # a header with less than this before the next exam is a stray page header
 
 
 def skip_noise(line: str) -> bool:
@@ -40,19 +41,33 @@ def first_idx(lines, start, end, patterns):
     return None
 
 
-def find_exam_blocks(lines):
-    starts = []
-    for exam in EXAMS:
-        pos = None
-        for i, line in enumerate(lines):
-            if line != exam:
-                continue
-            win = lines[i : i + 20]
-            if any(re.search(r"Leseverstehen,\s*Teil\s*1", w, re.IGNORECASE) for w in win):
-                pos = i
-                break
-        if pos is not None:
-            starts.append((exam, pos))
+def exam_starts(lines):
+    """{name: first line} for every all-caps header followed within 20 lines by Leseverstehen Teil 1."""
+    first = {}
+    for i, line in enumerate(lines):
+        if line in first or not EXAM_HEADER.fullmatch(line):
+            continue
+        if any(LV1_HEADER.search(w) for w in lines[i + 1 : i + 21]):
+            first[line] = i
+    return first
+
+
+def discover_exams(lines, min_lines=MIN_EXAM_LINES):
+    """Exam names in book order, without headers that have no exam body behind them."""
+    starts = sorted(exam_starts(lines).items(), key=lambda x: x[1])
+    names = []
+    for idx, (name, start) in enumerate(starts):
+        end = starts[idx + 1][1] if idx + 1 < len(starts) else len(lines)
+        if end - start >= min_lines:
+            names.append(name)
+    return names
+
+
+def find_exam_blocks(lines, exams=None):
+    first = exam_starts(lines)
+    if exams is None:
+        exams = discover_exams(lines)
+    starts = [(exam, first[exam]) for exam in exams if exam in first]
 
     starts = sorted(starts, key=lambda x: x[1])
     blocks = []
@@ -62,23 +77,8 @@ def find_exam_blocks(lines):
     return blocks
 
 
-def parse_answer_map(exam_lines):
-    mapping = {}
-    for line in exam_lines:
-        # 11-G / 10 B / 6C
-        for m in re.finditer(r"(?<!\d)([1-9]|[1-3]\d|40)\s*[-–:]?\s*([A-Za-zXx])\b", line):
-            n = int(m.group(1))
-            mapping[n] = m.group(2).upper()
-
-        # 31 J SCHON / 33 ZWAR (ignore latter if no letter)
-        m2 = re.match(r"^([1-9]|[1-3]\d|40)\s+([A-Za-zXx])\b", line)
-        if m2:
-            mapping[int(m2.group(1))] = m2.group(2).upper()
-
-    for n in range(21, 31):
-        if n in mapping:
-            mapping[n] = mapping[n].lower()
-    return mapping
+def parse_answer_map(exam_lines, footer=None):
+    return answer_keys.locate(exam_lines, footer=footer)["keys"]
 
 
 def section_slices(lines, start, end):
@@ -327,8 +327,9 @@ def parse_sb2_word_bank(block):
     return options
 
 
-def build_exam_questions(exam_name, ex_lines):
-    answers = parse_answer_map(ex_lines)
+def build_exam_questions(exam_name, ex_lines, answers=None):
+    if answers is None:
+        answers = parse_answer_map(ex_lines)
     sections = section_slices(ex_lines, 0, len(ex_lines))
 
     lv1_texts, lv1_opts = parse_lv1(sections["lv1"])
@@ -455,7 +456,7 @@ def build_exam_questions(exam_name, ex_lines):
             "question": item["question"] or f"Lücke {n}",
             "question_es": "",
             "options": item["options"],
-            "correct": answers.get(n, "?").lower() if n in answers else "?",
+            "correct": answers.get(n, "?"),
             "explanation_es": "",
             "vocabulary": [],
             "flags": flags,
@@ -536,24 +537,174 @@ def verification_reports(questions):
     print(f"Sample matches: {ok}/{len(samples)}")
 
 
-def main():
-    raw = SRC.read_text(encoding="utf-8", errors="ignore").splitlines()
-    lines = [clean_line(x) for x in raw]
-
-    exam_blocks = find_exam_blocks(lines)
-    all_questions = []
-
+def answer_key_report(keys_report):
+    print("\n=== Verification pass 3: Answer key sources ===")
+    for book_id, exams in keys_report.items():
+        for exam, rep in exams.items():
+            by_source = defaultdict(int)
+            for src in rep["sources"].values():
+                by_source[src["source"]] += 1
+            print(f"{book_id} {exam}: {len(rep['sources'])}/40 keys "
+                  + " ".join(f"{k}={v}" for k, v in sorted(by_source.items())))
+            for c in rep["conflicts"]:
+                seen = ", ".join(f"{s['key']} ({s['source']}, line {s['line']})" for s in c["seen"])
+                print(f"  CONFLICT #{c['number']}: chose {c['chosen']}; seen {seen}")
+    n = sum(len(rep["conflicts"]) for exams in keys_report.values() for rep in exams.values())
+    metrics.count("answer_keys.conflicts", n)
+    print(f"Conflicts: {n}  (details in {KEYS_REPORT})")
+
+
+def parser_sig() -> str:
+    src = b"".join(Path(m.__file__).read_bytes() for m in (answer_keys, normalize))
+    src += Path(__file__).read_bytes()
+    return hashlib.sha1(src).hexdigest()[:12]
+
+
+def key_provenance(found, line_no):
+    """answer_keys.locate() output with the 1-based line numbers of the book's text file (line_no[i])."""
+    sources = {str(n): {**src, "line": line_no[src["line"]]} for n, src in found["sources"].items()}
+    conflicts = [{**c, "seen": [{**s, "line": line_no[s["line"]]} for s in c["seen"]]} for c in found["conflicts"]]
+    return {"sources": sources, "conflicts": conflicts}
+
+
+def extract_book(book, use_cache=True):
+    """(book id, questions, exam count, answer key provenance, from cache) for one registry entry."""
+    src = Path(book["text"])
+    raw_bytes = src.read_bytes()
+    sig = hashlib.sha1(raw_bytes + json.dumps(book, sort_keys=True).encode() + parser_sig().encode()).hexdigest()
+    cache = CACHE_DIR / f"{book['id']}.json"
+    if use_cache and cache.exists():
+        cached = json.loads(cache.read_text(encoding="utf-8"))
+        if cached.get("sig") == sig:
+            return book["id"], cached["questions"], cached["exams"], cached["answer_keys"], True
+
+    with metrics.timer("read"):
+        raw = raw_bytes.decode("utf-8", errors="ignore")
+    with metrics.timer("clean_line"):
+        lines = normalize.clean_text(raw)
+
+    with metrics.timer("find_exam_blocks"):
+        exams = None if book["exams"] == "auto" else book["exams"]
+        if exams is None:
+            exams = [e for e in discover_exams(lines) if e not in set(book["exclude"])]
+        exam_blocks = find_exam_blocks(lines, exams)
+
+    questions, keys_report, line_no = [], {}, None
     for ex in exam_blocks:
         ex_lines = lines[ex["start"]:ex["end"]]
-        all_questions.extend(build_exam_questions(ex["name"], ex_lines))
+        with metrics.timer("answer_keys"):
+            found = answer_keys.locate(lines, ex["start"], ex["end"], book["footer"])
+        line_no = line_no or normalize.file_lines(raw)
+        keys_report[ex["name"]] = key_provenance(found, line_no)
+        with metrics.timer("build_exam_questions"):
+            questions.extend(build_exam_questions(ex["name"], ex_lines, found["keys"]))
+    questions.sort(key=lambda q: (q["exam"], q["number"]))
+    corpus.tag(book, questions)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache.write_text(json.dumps({"sig": sig, "exams": len(exam_blocks), "questions": questions,
+                                 "answer_keys": keys_report}, ensure_ascii=False), encoding="utf-8")
+    return book["id"], questions, len(exam_blocks), keys_report, False
+
+
+def extract_all(book_ids=None, full=False, jobs=1):
+    """(questions, answer key report by book) for the registered books, one progress line per book."""
+    books = corpus.load_books(book_ids)
+    jobs = min(jobs, len(books))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(extract_book, books, [not full] * len(books)))
+    else:
+        results = [extract_book(b, not full) for b in books]
+
+    all_questions, keys_report = [], {}
+    for book_id, questions, n_exams, keys, cached in results:
+        print(f"{book_id}: exams={n_exams} questions={len(questions)}{' (cached)' if cached else ''}")
+        all_questions.extend(questions)
+        keys_report[book_id] = keys
+        metrics.count("books.cached" if cached else "books.extracted")
+    metrics.count("questions", len(all_questions))
+    print(f"books={len(books)} exams={sum(r[2] for r in results)} questions={len(all_questions)}")
+    return all_questions, keys_report
+
+
+def keep_other_books(book_ids, extracted, existing):
+    """Records for a --books run: the listed books' extracted ones, every other book's as in existing, in registry order."""
+    if not book_ids:
+        return extracted
+    books = corpus.load_books()
+    fresh, kept = defaultdict(list), defaultdict(list)
+    for q in extracted:
+        fresh[corpus.book_of(q, books)].append(q)
+    for q in existing:
+        kept[corpus.book_of(q, books)].append(q)
+    return [q for b in books for q in (fresh if b["id"] in book_ids else kept)[b["id"]]]
+
+
+def keep_other_reports(book_ids, keys_report):
+    """Answer key report for a --books run: the other books' entries kept from KEYS_REPORT."""
+    if not book_ids:
+        return keys_report
+    old = json.loads(KEYS_REPORT.read_text(encoding="utf-8")) if KEYS_REPORT.exists() else {}
+    return {b["id"]: keys_report[b["id"]] if b["id"] in book_ids else old[b["id"]]
+            for b in corpus.load_books() if b["id"] in book_ids or b["id"] in old}
+
+
+def merge_keys(questions, extracted):
+    """Carry freshly extracted answer keys into enriched records in place; (keys changed, explanations cleared).
+
+    Only "correct" and the missing_answer_key flag change. Where the parser
+    found no key the record keeps its own. An explanation written for a
+    different letter argues for the wrong answer, so it is emptied and the
+    next enrich run writes a new one.
+    """
+    by_id = {q["id"]: q for q in extracted}
+    changed = cleared = 0
+    for q in questions:
+        new = by_id.get(q["id"])
+        if new is None or new["correct"] == "?" or new["correct"] == q.get("correct"):
+            continue
+        if str(q.get("correct")).upper() != new["correct"].upper() and q.get("explanation_es"):
+            q["explanation_es"] = ""
+            cleared += 1
+        q["correct"] = new["correct"]
+        q["flags"] = [f for f in q.get("flags") or [] if f != "missing_answer_key"]
+        changed += 1
+    metrics.count("answer_keys.merged", changed)
+    return changed, cleared
+
 
-    all_questions.sort(key=lambda q: (q["exam"], q["number"]))
+def write(questions, keys_report):
+    with metrics.timer("write_json"):
+        OUT.parent.mkdir(parents=True, exist_ok=True)
+        OUT.write_text(json.dumps(questions, ensure_ascii=False, indent=2), encoding="utf-8")
+        KEYS_REPORT.write_text(json.dumps(keys_report, ensure_ascii=False, indent=1), encoding="utf-8")
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(all_questions, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(f"exams={len(exam_blocks)} questions={len(all_questions)}")
-    verification_reports(all_questions)
+def main():
+    ap = argparse.ArgumentParser(description="Extract questions from the OCR text of every registered book into questions.json.")
+    ap.add_argument("--books", help=f"comma-separated book ids from {corpus.BOOKS_DIR}/ (default: all)")
+    ap.add_argument("--full", action="store_true", help=f"ignore the per-book cache in {CACHE_DIR}/")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="books extracted in parallel")
+    ap.add_argument("--keys-only", action="store_true",
+                    help=f"update only the answer keys of the enriched {OUT} instead of rewriting it")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+
+    book_ids = args.books.split(",") if args.books else None
+    with metrics.run("extract_questions", profile=args.profile, metrics_file=args.metrics_file):
+        questions, keys_report = extract_all(book_ids, args.full, args.jobs)
+        if args.keys_only:
+            extracted, questions = questions, json.loads(OUT.read_text(encoding="utf-8"))
+            changed, cleared = merge_keys(questions, extracted)
+            print(f"keys: {changed} changed, {cleared} explanations cleared for enrich")
+        elif book_ids and OUT.exists():
+            questions = keep_other_books(book_ids, questions, json.loads(OUT.read_text(encoding="utf-8")))
+        keys_report = keep_other_reports(book_ids, keys_report)
+        write(questions, keys_report)
+        with metrics.timer("verification"):
+            verification_reports(questions)
+            answer_key_report(keys_report)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 """Fix missing/corrupt options in questions.json using Gemini Vision extraction data."""
-import json
+import argparse
 
-DATA = "data/questions.json"
+import metrics
+import store
+
+DATA = store.QUESTIONS
 
 # Extracted via Gemini Vision from actual PDF pages
 # Format: {exam: {question_number: {options: [...], correct: "X"}}}
@@ -119,44 +122,56 @@ def normalize_option(opt):
     return opt
 
 
-with open(DATA) as f:
-    data = json.load(f)
-
-fixed = 0
-corrupted_fixed = 0
-
-for q in data:
-    exam = q.get("exam")
-    num = q.get("number")
-    if exam in FIXES and num in FIXES[exam]:
-        fix = FIXES[exam][num]
-        new_opts = [normalize_option(o) for o in fix["options"]]
-        old_opts = q.get("options", [])
-        
-        if not old_opts:
-            q["options"] = new_opts
-            fixed += 1
-            print(f"  FIXED (empty): {exam} Q{num}")
-        else:
-            # Check if old options are corrupted (contain mixed data)
-            old_joined = " ".join(str(o) for o in old_opts)
-            if len(old_joined) > 100 or any(len(str(o)) > 40 for o in old_opts):
+def apply_fixes(data):
+    fixed = 0
+    corrupted_fixed = 0
+
+    for q in data:
+        exam = q.get("exam")
+        num = q.get("number")
+        if exam in FIXES and num in FIXES[exam]:
+            fix = FIXES[exam][num]
+            new_opts = [normalize_option(o) for o in fix["options"]]
+            old_opts = q.get("options", [])
+
+            if not old_opts:
                 q["options"] = new_opts
-                corrupted_fixed += 1
-                print(f"  FIXED (corrupt): {exam} Q{num}: was {old_opts[:2]}...")
+                fixed += 1
+                print(f"  FIXED (empty): {exam} Q{num}")
             else:
-                # Options exist and look OK - still overwrite with Vision data (more accurate)
-                if old_opts != new_opts:
+                # Check if old options are corrupted (contain mixed data)
+                old_joined = " ".join(str(o) for o in old_opts)
+                if len(old_joined) > 100 or any(len(str(o)) > 40 for o in old_opts):
                     q["options"] = new_opts
                     corrupted_fixed += 1
-                    print(f"  FIXED (overwrite): {exam} Q{num}")
+                    print(f"  FIXED (corrupt): {exam} Q{num}: was {old_opts[:2]}...")
+                else:
+                    # Options exist and look OK - still overwrite with Vision data (more accurate)
+                    if old_opts != new_opts:
+                        q["options"] = new_opts
+                        corrupted_fixed += 1
+                        print(f"  FIXED (overwrite): {exam} Q{num}")
+
+    return fixed, corrupted_fixed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+
+    with metrics.run("fix_missing_options", profile=args.profile, metrics_file=args.metrics_file):
+        data = store.load_questions(DATA)
+
+        with metrics.timer("apply_fixes"):
+            fixed, corrupted_fixed = apply_fixes(data)
+        metrics.count("options.fixed_empty", fixed)
+        metrics.count("options.overwritten", corrupted_fixed)
+
+        store.save_questions(data, DATA)
 
-# Also fix correct answer format for ANDREAS (lowercase -> uppercase)
-for q in data:
-    if isinstance(q.get("correct"), str) and len(q["correct"]) == 1:
-        q["correct"] = q["correct"].upper()
+        print(f"\nDone: {fixed} empty fixed, {corrupted_fixed} corrupted/overwritten")
 
-with open(DATA, "w") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
 
-print(f"\nDone: {fixed} empty fixed, {corrupted_fixed} corrupted/overwritten")
+if __name__ == "__main__":
+    main()
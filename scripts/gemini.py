@@ -0,0 +1,84 @@
+"""Gemini endpoint configuration and the instrumented generateContent call shared by the scripts.
+
+GEMINI_ENDPOINT overrides the API base URL, e.g. to run against the offline
+stand-in server instead of burning quota:
+
+    python3 benchmarks/gemini_stub.py --port 8765 &
+    GEMINI_ENDPOINT=http://127.0.0.1:8765 GEMINI_API_KEY=x python3 scripts/translate_fast.py
+
+Nothing here reads the environment at import time, so offline stages can
+import the scripts that use it without a key.
+"""
+import json
+import os
+import urllib.request
+
+import metrics
+
+DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+def endpoint() -> str:
+    return os.environ.get("GEMINI_ENDPOINT", DEFAULT_ENDPOINT).rstrip("/")
+
+
+def generate_url(api_key: str, model: str = None) -> str:
+    model = model or os.environ.get("GEMINI_MODEL", DEFAULT_MODEL)
+    return f"{endpoint()}/models/{model}:generateContent?key={api_key}"
+
+
+def request_body(parts, schema: dict = None, temperature: float = 0.2) -> dict:
+    """generateContent payload; with a schema the reply is constrained to JSON of that shape.
+
+    `parts` is a prompt string or a list of Gemini parts (text / inlineData).
+    """
+    if isinstance(parts, str):
+        parts = [{"text": parts}]
+    config = {"temperature": temperature}
+    if schema:
+        config["responseMimeType"] = "application/json"
+        config["responseSchema"] = schema
+    return {"contents": [{"parts": parts}], "generationConfig": config}
+
+
+def api_key(required: bool = True) -> str:
+    """GEMINI_API_KEY, read when a stage is about to call the API; exits when a required key is not set."""
+    key = os.environ.get("GEMINI_API_KEY", "")
+    if required and not key:
+        raise SystemExit("GEMINI_API_KEY is not set")
+    return key
+
+
+def post(api_key: str, body: dict, timeout: float = 120) -> dict:
+    """One generateContent call, timed and counted; the parsed JSON response."""
+    req = urllib.request.Request(generate_url(api_key), data=json.dumps(body).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    metrics.count("api.requests")
+    with metrics.timer("api.latency"), urllib.request.urlopen(req, timeout=timeout) as resp:
+        raw = resp.read()
+    with metrics.timer("json.parse_response"):
+        result = json.loads(raw)
+    metrics.record_usage(result)
+    return result
+
+
+def generate(api_key: str, body: dict, retries: int = 3, backoff: float = 2, timeout: float = 120,
+             parse=None, verbose: bool = True):
+    """Reply text of post(), or parse(text), retried with a linear backoff; None when every attempt failed.
+
+    parse may raise to reject a reply (e.g. nothing usable in it), which counts as a failed attempt.
+    """
+    for attempt in range(retries):
+        try:
+            text = post(api_key, body, timeout)["candidates"][0]["content"]["parts"][0]["text"]
+            return parse(text) if parse else text
+        except Exception as e:
+            metrics.count("api.errors")
+            if verbose:
+                print(f"  attempt {attempt + 1}: {e}", flush=True)
+            if attempt < retries - 1:
+                metrics.count("api.retries")
+                metrics.sleep(backoff * (attempt + 1), "retry_backoff")
+    metrics.count("api.failed_calls")
+    return None
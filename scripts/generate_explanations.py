@@ -1,39 +1,23 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import os
 import re
-import time
-import urllib.request
-from pathlib import Path
 
-INPUT = Path("data/questions.json")
+import gemini
+import metrics
+import schemas
+import store
+from json_salvage import salvage
+
+INPUT = store.QUESTIONS
+FIELDS = ["explanation_es", "vocabulary"]
 BATCH_SIZE = 8
 DELAY_SECONDS = 1.4
 
 
 def call_gemini(api_key: str, payload: dict) -> dict:
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={api_key}"
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    with urllib.request.urlopen(req, timeout=90) as resp:
-        return json.loads(resp.read().decode("utf-8"))
-
-
-def extract_json(text: str):
-    text = text.strip()
-    m = re.search(r"```json\s*(\{.*?\})\s*```", text, re.S)
-    if m:
-        text = m.group(1)
-    else:
-        m = re.search(r"(\{.*\})", text, re.S)
-        if m:
-            text = m.group(1)
-    return json.loads(text)
+    return gemini.post(api_key, payload, timeout=90)
 
 
 def local_fallback(q):
@@ -68,26 +52,51 @@ def build_prompt(batch):
         "Para cada pregunta: explica brevemente por qué la respuesta correcta es correcta, menciona por qué fallan opciones típicas, "
         "y da 3-5 palabras clave. Español simple, frases cortas. Si correcta='?' dilo claramente."
     )
-    return {
-        "contents": [
-            {
-                "parts": [
-                    {
-                        "text": system + "\n\nPreguntas:\n" + json.dumps(compact, ensure_ascii=False)
-                    }
-                ]
-            }
-        ],
-        "generationConfig": {
-            "temperature": 0.2,
-            "responseMimeType": "application/json",
-        },
-    }
+    return gemini.request_body(system + "\n\nPreguntas:\n" + json.dumps(compact, ensure_ascii=False),
+                               schemas.batch(FIELDS, wrap="results"))
+
+
+def request_explanations(api_key, batch, batch_no):
+    """{id: item}; questions lost from a partly broken reply are asked for once more on their own."""
+    mapped = {}
+    todo = batch
+    for attempt in range(2):
+        try:
+            resp = call_gemini(api_key, build_prompt(todo))
+        except Exception as e:
+            metrics.count("api.errors")
+            print(f"batch {batch_no}: gemini_error={e}")
+            continue
+        cands = resp.get("candidates", [])
+        text = ""
+        if cands:
+            parts = cands[0].get("content", {}).get("parts", [])
+            text = "".join(p.get("text", "") for p in parts)
+        got, lost = salvage(text, [q["id"] for q in todo], key="results")
+        got, invalid = schemas.check(got, schemas.item(FIELDS))
+        lost += invalid
+        mapped.update(got)
+        if not lost:
+            break
+        print(f"batch {batch_no}: lost {', '.join(lost)}" + ("; requeued" if attempt == 0 else ""))
+        todo = [q for q in todo if q["id"] in lost]
+        if attempt == 0:
+            metrics.count("questions.requeued", len(todo))
+    return mapped
 
 
 def main():
-    api_key = os.environ.get("GEMINI_API_KEY", "")
-    data = json.loads(INPUT.read_text(encoding="utf-8"))
+    ap = argparse.ArgumentParser(description="Generate Spanish explanations and vocabulary for questions.json.")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+    with metrics.run("generate_explanations", profile=args.profile, metrics_file=args.metrics_file):
+        explain_all()
+
+
+def explain_all(data=None):
+    api_key = os.environ.get("GEMINI_API_KEY", "")  # optional: without it every batch gets local_fallback()
+    if data is None:
+        data = store.load_questions(INPUT)
 
     for i in range(0, len(data), BATCH_SIZE):
         batch = data[i : i + BATCH_SIZE]
@@ -96,19 +105,7 @@ def main():
 
         mapped = {}
         if api_key:
-            try:
-                payload = build_prompt(batch)
-                resp = call_gemini(api_key, payload)
-                cands = resp.get("candidates", [])
-                text = ""
-                if cands:
-                    parts = cands[0].get("content", {}).get("parts", [])
-                    text = "".join(p.get("text", "") for p in parts)
-                parsed = extract_json(text)
-                for item in parsed.get("results", []):
-                    mapped[item.get("id", "")] = item
-            except Exception as e:
-                print(f"batch {i//BATCH_SIZE+1}: gemini_error={e}")
+            mapped = request_explanations(api_key, batch, i // BATCH_SIZE + 1)
 
         for q in batch:
             item = mapped.get(q["id"])
@@ -123,13 +120,14 @@ def main():
                         clean_vocab.append({"de": de, "es": es})
                 q["vocabulary"] = clean_vocab
             else:
+                metrics.count("questions.local_fallback")
                 exp, vocab = local_fallback(q)
                 q["explanation_es"] = exp
                 q["vocabulary"] = vocab
 
-        INPUT.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        store.save_questions(data, INPUT)
         print(f"batch {i//BATCH_SIZE+1}: processed {min(i+BATCH_SIZE,len(data))}/{len(data)}")
-        time.sleep(DELAY_SECONDS)
+        metrics.sleep(DELAY_SECONDS)
 
     print("done")
 
@@ -1,49 +1,25 @@
 #!/usr/bin/env python3
 """Generate Spanish translations and explanations for all questions using Gemini API."""
-import json, os, sys, time, urllib.request
+import argparse
+from collections import deque
 
-GEMINI_KEY = os.environ["GEMINI_API_KEY"]
-DATA = "data/questions.json"
+import gemini
+import metrics
+import schemas
+import store
+from json_salvage import salvage
+
+DATA = store.QUESTIONS
+FIELDS = ["question_es", "explanation_es", "vocabulary"]
 BATCH_SIZE = 5  # questions per API call
+DELAY_SECONDS = 0.5
+RETRY_BACKOFF = 3  # seconds × attempt
+MAX_REQUEUE = 2  # times a question lost from a reply goes back on the queue
 
 
-def call_gemini(prompt: str, retries=3) -> str:
-    body = json.dumps({
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 0.2}
-    }).encode()
-    req = urllib.request.Request(
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}",
-        data=body, headers={"Content-Type": "application/json"}
-    )
-    for attempt in range(retries):
-        try:
-            resp = urllib.request.urlopen(req, timeout=90)
-            result = json.loads(resp.read())
-            return result["candidates"][0]["content"]["parts"][0]["text"]
-        except Exception as e:
-            print(f"  Retry {attempt+1}: {e}", flush=True)
-            if attempt < retries - 1:
-                time.sleep(3 * (attempt + 1))
-    return ""
-
-
-def parse_json_response(text: str) -> list:
-    text = text.strip()
-    if text.startswith("```"):
-        text = text.split("\n", 1)[1].rsplit("```", 1)[0]
-    try:
-        return json.loads(text)
-    except:
-        # Try to find JSON array in response
-        start = text.find("[")
-        end = text.rfind("]") + 1
-        if start >= 0 and end > start:
-            try:
-                return json.loads(text[start:end])
-            except:
-                pass
-    return []
+def call_gemini(api_key: str, prompt: str, retries=3) -> str:
+    body = gemini.request_body(prompt, schemas.batch(FIELDS))
+    return gemini.generate(api_key, body, retries=retries, backoff=RETRY_BACKOFF, timeout=90) or ""
 
 
 def build_prompt(batch: list) -> str:
@@ -79,46 +55,49 @@ Return ONLY a JSON array like:
 ]
 
 Questions:
-{questions_text}
-
-Return ONLY valid JSON array, no markdown."""
+{questions_text}"""
 
 
 def main():
-    with open(DATA) as f:
-        questions = json.load(f)
+    ap = argparse.ArgumentParser(description=__doc__)
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+    with metrics.run("generate_translations", profile=args.profile, metrics_file=args.metrics_file):
+        translate_all()
+
+
+def translate_all(questions=None):
+    api_key = gemini.api_key()
+    if questions is None:
+        questions = store.load_questions(DATA)
 
     # Find questions needing translations
     needs_translation = [q for q in questions if not q.get("question_es")]
     print(f"Total questions: {len(questions)}", flush=True)
     print(f"Needing translation: {len(needs_translation)}", flush=True)
 
-    # Process in batches
+    # Process in batches; questions missing from a reply are requeued on their own
+    queue = deque((q, 0) for q in needs_translation)
     translated = 0
     failed = 0
-    for i in range(0, len(needs_translation), BATCH_SIZE):
-        batch = needs_translation[i:i+BATCH_SIZE]
-        batch_num = i // BATCH_SIZE + 1
-        total_batches = (len(needs_translation) + BATCH_SIZE - 1) // BATCH_SIZE
-        print(f"Batch {batch_num}/{total_batches} ({len(batch)} questions)...", flush=True)
-
-        prompt = build_prompt(batch)
-        response = call_gemini(prompt)
+    batch_num = 0
+    while queue:
+        batch = [queue.popleft() for _ in range(min(BATCH_SIZE, len(queue)))]
+        batch_num += 1
+        print(f"Batch {batch_num} ({len(batch)} questions, {len(queue)} queued)...", flush=True)
+
+        prompt = build_prompt([q for q, _ in batch])
+        response = call_gemini(api_key, prompt)
         if not response:
             print(f"  FAILED - empty response", flush=True)
             failed += len(batch)
             continue
 
-        results = parse_json_response(response)
-        if not results:
-            print(f"  FAILED - couldn't parse JSON", flush=True)
-            failed += len(batch)
-            continue
-
-        # Map results by ID
-        results_map = {r["id"]: r for r in results if "id" in r}
+        results_map, lost = salvage(response, [q["id"] for q, _ in batch])
+        results_map, invalid = schemas.check(results_map, schemas.item(FIELDS))
+        lost += invalid
 
-        for q in batch:
+        for q, tries in batch:
             if q["id"] in results_map:
                 r = results_map[q["id"]]
                 # Find the question in the main list and update
@@ -129,22 +108,26 @@ def main():
                         questions[j]["vocabulary"] = r.get("vocabulary", questions[j].get("vocabulary", []))
                         translated += 1
                         break
+            elif tries < MAX_REQUEUE:
+                queue.append((q, tries + 1))
+                metrics.count("questions.requeued")
             else:
                 failed += 1
 
-        print(f"  → {len(results_map)}/{len(batch)} translated", flush=True)
+        print(f"  → {len(results_map)}/{len(batch)} translated"
+              + (f", missing {len(lost)}: {', '.join(lost)}" if lost else ""), flush=True)
 
         # Save periodically
         if batch_num % 10 == 0:
-            with open(DATA, "w") as f:
-                json.dump(questions, f, ensure_ascii=False, indent=2)
+            store.save_questions(questions, DATA)
             print(f"  [checkpoint saved]", flush=True)
 
-        time.sleep(0.5)  # Rate limit
+        metrics.sleep(DELAY_SECONDS)  # Rate limit
 
     # Final save
-    with open(DATA, "w") as f:
-        json.dump(questions, f, ensure_ascii=False, indent=2)
+    store.save_questions(questions, DATA)
+    metrics.count("questions.translated", translated)
+    metrics.count("questions.failed", failed)
 
     print(f"\nDone! Translated: {translated}, Failed: {failed}", flush=True)
     has_es = sum(1 for q in questions if q.get("question_es"))
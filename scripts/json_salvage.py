@@ -0,0 +1,108 @@
+"""Item-by-item parsing of model JSON replies that may be fenced, truncated or partly broken.
+
+    items, lost = salvage(text, expected_ids=[q["id"] for q in batch])
+
+A reply is a JSON array of objects, or an object wrapping one ({"results": [...]}),
+optionally inside ```json fences or after a prose preamble. Each array element is
+decoded on its own, so one bad item no longer discards the whole batch:
+
+  - a clean item is kept as-is
+  - a broken item (trailing comma, stray quote…) gets one cheap repair attempt,
+    otherwise parsing resynchronises at the start of the next sibling item
+  - a truncated tail ends parsing; everything before it is kept
+
+`lost` lists the expected ids that did not come back, so callers requeue only those.
+"""
+import json
+import re
+
+import metrics
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"[\s,]*")
+_FIRST_KEY = re.compile(r'\{\s*"([^"]+)"\s*:')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_ID = re.compile(r'"id"\s*:\s*"([^"]+)"')
+
+
+def _decode_at(text, pos):
+    try:
+        return _decoder.raw_decode(text, pos)
+    except ValueError:
+        return None, pos
+
+
+def _array_start(text: str, key: str = None) -> int:
+    """Index of the first item: just past the '[' of the array (or of `key` in a wrapper object)."""
+    start = min((i for i in (text.find("["), text.find("{")) if i >= 0), default=-1)
+    if start < 0 or text[start] == "[":
+        return start + 1 if start >= 0 else -1
+    if key:
+        m = re.compile(rf'"{re.escape(key)}"\s*:\s*\[').search(text, start)
+        if m:
+            return m.end()
+    return start  # a single bare object
+
+
+def parse_items(text: str, key: str = None):
+    """(items, broken) — decoded objects in order and the raw text of items that failed."""
+    items, broken = [], []
+    text = (text or "").strip()
+    pos = _array_start(text, key)
+    if pos < 0:
+        return items, broken
+
+    n = len(text)
+    while pos < n:
+        pos = _WS.match(text, pos).end()
+        if pos >= n or text[pos] == "]":
+            break
+        if text[pos] != "{":
+            # a scalar or garbage between items: skip to the next object
+            nxt = text.find("{", pos)
+            if nxt < 0:
+                break
+            pos = nxt
+            continue
+
+        obj, end = _decode_at(text, pos)
+        if obj is not None:
+            items.append(obj)
+            pos = end
+            continue
+
+        # items of one reply share their first key ("id", "letter"); nested
+        # objects (vocabulary pairs) don't, so this skips to the next sibling
+        first = _FIRST_KEY.match(text, pos)
+        m = re.compile(r'\{\s*"%s"\s*:' % re.escape(first.group(1))).search(text, pos + 1) if first else None
+        seg_end = m.start() if m else n
+        segment = text[pos:seg_end].rstrip().rstrip(",")
+        repaired, _ = _decode_at(_TRAILING_COMMA.sub(r"\1", segment), 0)
+        if isinstance(repaired, dict):
+            metrics.count("salvage.repaired")
+            items.append(repaired)
+        else:
+            broken.append(segment)
+        if not m:
+            break
+        pos = m.start()
+    return items, broken
+
+
+def salvage(text: str, expected_ids=None, key: str = None):
+    """({id: item}, lost ids). Ids not in expected_ids are dropped as hallucinated."""
+    with metrics.timer("json.salvage"):
+        items, broken = parse_items(text, key)
+    expected = list(expected_ids) if expected_ids is not None else None
+    allowed = set(expected) if expected is not None else None
+    by_id = {}
+    for item in items:
+        qid = item.get("id") if isinstance(item, dict) else None
+        if qid and (allowed is None or qid in allowed):
+            by_id.setdefault(qid, item)
+    lost = [i for i in expected if i not in by_id] if expected is not None else \
+        [m.group(1) for seg in broken for m in _ID.finditer(seg)]
+    metrics.count("salvage.items", len(by_id))
+    metrics.count("salvage.broken", len(broken))
+    metrics.count("salvage.lost", len(lost))
+    return by_id, lost
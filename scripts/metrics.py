@@ -0,0 +1,188 @@
+"""Shared run instrumentation: timers, counters, histograms, optional cProfile.
+
+    import metrics
+
+    def main():
+        ap = argparse.ArgumentParser()
+        metrics.add_arguments(ap)
+        args = ap.parse_args()
+        with metrics.run("generate_translations", profile=args.profile):
+            with metrics.timer("api.latency"):
+                ...
+            metrics.count("api.retries")
+            metrics.observe("api.tokens.prompt", 812)
+
+At the end of the run (also on Ctrl-C or an exception) a timing summary is
+printed and appended as one JSON line to logs/metrics.jsonl. Its status is
+"ok", "interrupted", "error" (an exception) or "exit" with the exit_code of
+a sys.exit() other than 0.
+"""
+import functools
+import io
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+METRICS_FILE = Path("logs/metrics.jsonl")
+PROFILE_DIR = Path("logs/profiles")
+
+_lock = threading.Lock()
+_timers = defaultdict(list)   # name -> [seconds, ...]
+_counters = defaultdict(int)
+_hist = defaultdict(list)     # name -> [value, ...]
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _hist.clear()
+
+
+@contextmanager
+def timer(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        with _lock:
+            _timers[name].append(elapsed)
+
+
+def timed(name: str = None):
+    """Decorator form of timer(); defaults to the function name."""
+    def deco(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def count(name: str, n: int = 1):
+    with _lock:
+        _counters[name] += n
+
+
+def observe(name: str, value: float):
+    with _lock:
+        _hist[name].append(value)
+
+
+def sleep(seconds: float, reason: str = "rate_limit"):
+    """time.sleep that is accounted for under sleep.<reason>."""
+    with timer(f"sleep.{reason}"):
+        time.sleep(seconds)
+
+
+def record_usage(response: dict):
+    """Record token counts from a Gemini generateContent response."""
+    usage = (response or {}).get("usageMetadata") or {}
+    for key, label in (("promptTokenCount", "prompt"), ("candidatesTokenCount", "output"),
+                       ("totalTokenCount", "total")):
+        if key in usage:
+            observe(f"api.tokens.{label}", usage[key])
+            count(f"tokens.{label}", usage[key])
+
+
+def _summary_stats(values):
+    vals = sorted(values)
+    n = len(vals)
+    pick = lambda p: vals[min(n - 1, int(p * n))]
+    return {
+        "n": n,
+        "sum": round(sum(vals), 6),
+        "min": round(vals[0], 6),
+        "p50": round(pick(0.50), 6),
+        "p90": round(pick(0.90), 6),
+        "p99": round(pick(0.99), 6),
+        "max": round(vals[-1], 6),
+    }
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "timers": {k: _summary_stats(v) for k, v in sorted(_timers.items()) if v},
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {k: _summary_stats(v) for k, v in sorted(_hist.items()) if v},
+        }
+
+
+def print_summary(data: dict, wall: float, out=sys.stdout):
+    print(f"\n── timing summary ({wall:.1f}s wall) ──", file=out)
+    for name, s in data["timers"].items():
+        share = s["sum"] / wall if wall else 0
+        print(f"  {name:28s} n={s['n']:<6d} total={s['sum']:9.2f}s {share:6.1%}  "
+              f"p50={s['p50'] * 1000:8.1f}ms p90={s['p90'] * 1000:8.1f}ms max={s['max'] * 1000:8.1f}ms", file=out)
+    for name, n in data["counters"].items():
+        print(f"  {name:28s} {n}", file=out)
+    for name, s in data["histograms"].items():
+        print(f"  {name:28s} n={s['n']:<6d} p50={s['p50']:g} p90={s['p90']:g} max={s['max']:g}", file=out)
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help=f"run under cProfile and dump pstats to {PROFILE_DIR}/")
+    parser.add_argument("--metrics-file", type=Path, default=METRICS_FILE,
+                        help="JSONL file the run summary is appended to")
+
+
+@contextmanager
+def run(script: str, profile: bool = False, metrics_file: Path = METRICS_FILE, quiet: bool = False):
+    reset()
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    t0 = time.perf_counter()
+    if profile:  # imported here: pstats alone costs more start-up time than the rest of this module
+        import cProfile
+        import pstats
+    prof = cProfile.Profile() if profile else None
+    status = "ok"
+    exit_code = None
+    if prof:
+        prof.enable()
+    try:
+        yield
+    except KeyboardInterrupt:
+        status = "interrupted"
+        raise
+    except SystemExit as e:  # sys.exit() / sys.exit(msg): the script's own exit, not a crash
+        exit_code = 0 if e.code is None else e.code if isinstance(e.code, int) else 1
+        if exit_code:
+            status = "exit"
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        if prof:
+            prof.disable()
+        wall = time.perf_counter() - t0
+        data = snapshot()
+        record = {"script": script, "started": started, "status": status, "wall_s": round(wall, 3), **data}
+        if exit_code:
+            record["exit_code"] = exit_code
+
+        if prof:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            path = PROFILE_DIR / f"{script}-{started.replace(':', '')}.pstats"
+            prof.dump_stats(path)
+            buf = io.StringIO()
+            pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(25)
+            print(buf.getvalue())
+            record["profile"] = str(path)
+
+        if not quiet:
+            print_summary(data, wall)
+        metrics_file = Path(metrics_file)
+        metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        with metrics_file.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,218 @@
+"""Compact in-process form of questions.json: slotted records, shared values.
+
+    import model
+    corpus = model.load()                       # data/questions.json
+    for q in corpus.slice("PETRA", "Leseverstehen", 1):
+        print(q.number, q.context[:40])
+    corpus.to_dicts()                           # back to the plain records
+
+A plain dict per record repeats everything: every record of a Teil carries
+its own copy of the same exam name, section, instruction and context, and
+the json module makes a new string for each of them. Here each record is a
+Question with __slots__ (no per-record __dict__), and values are pooled while
+loading so equal values are one object held by reference:
+
+  exam, section, type, correct, flags   sys.intern'd (a few dozen distinct values)
+  instruction, context, question texts  one str per distinct text
+  options                               one tuple per distinct option bank
+  vocabulary                            one tuple per distinct list of entries
+  flags                                 one tuple per distinct flag set
+
+Records are read-only by convention and also answer q["field"], q.get()
+and `in` like the dicts they came from, so a read-only stage can switch
+loaders unchanged; a stage that edits questions keeps working on the dicts
+of store.load_questions(). Fields missing from a record hold ABSENT (falsy)
+and stay missing in to_dict(), which gives records equal to the ones loaded
+(keys in Question field order, then unknown fields kept in `extra`);
+vocabulary entries keep all their keys.
+"""
+import sys
+from dataclasses import dataclass
+
+import metrics
+import store
+
+INTERNED = ("exam", "section", "type", "correct")
+POOLED = ("instruction", "context", "question", "question_es", "explanation_es")
+
+
+class _Absent:
+    """Marks a field the record does not have."""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "ABSENT"
+
+
+ABSENT = _Absent()
+
+
+@dataclass(slots=True)
+class Question:
+    id: str
+    exam: str = ABSENT
+    section: str = ABSENT
+    teil: int = ABSENT
+    type: str = ABSENT
+    number: int = ABSENT
+    instruction: str = ABSENT
+    context: str = ABSENT
+    question: str = ABSENT
+    question_es: str = ABSENT
+    options: tuple = ABSENT
+    correct: str = ABSENT
+    explanation_es: str = ABSENT
+    vocabulary: tuple = ABSENT    # entries as tuples of (key, value) pairs
+    flags: tuple = ABSENT
+    ads_extracted: bool = ABSENT
+    book: str = ABSENT
+    extra: dict = None            # fields this class does not know, kept for to_dict()
+
+    def __getitem__(self, key):
+        value = getattr(self, key) if key in FIELDS else (self.extra or {}).get(key, ABSENT)
+        if value is ABSENT:
+            raise KeyError(key)
+        return _plain(key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key, ABSENT) is not ABSENT
+
+    def to_dict(self) -> dict:
+        d = {f: _plain(f, v) for f in FIELDS if (v := getattr(self, f)) is not ABSENT}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+FIELDS = [f for f in Question.__slots__ if f != "extra"]
+SEQUENCES = ("options", "flags", "vocabulary")
+
+
+def _plain(field, value):
+    """A field as the JSON record has it: lists for the pooled tuples, dicts for the entries pooled as pairs."""
+    if field not in SEQUENCES or not isinstance(value, tuple):
+        return value
+    return [dict(e) if isinstance(e, tuple) else e for e in value]
+
+
+class Pool:
+    """One shared object per distinct value, for the lifetime of a load.
+
+    Values are keyed with their type: True, 1 and 1.0 are equal (and hash
+    alike) but must not come back as one another. A tuple is keyed on the
+    identity of its items, so they must come from the pool themselves.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def __call__(self, value):
+        return self._values.setdefault(value if type(value) is str else _typed(value), value)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def _typed(value):
+    """Pool key of value; a str, or a tuple of them, only equals its own kind and is its own key."""
+    if type(value) is tuple:
+        if all(type(v) is str for v in value):
+            return value
+        return tuple, tuple(map(id, value))
+    if type(value) is str:
+        return value
+    if type(value) is float:
+        return float, repr(value)  # 0.0 == -0.0
+    return type(value), value
+
+
+class Corpus:
+    """Questions in file order, plus O(1) lookup by id and by (exam, section, teil)."""
+
+    __slots__ = ("questions", "by_id", "slices")
+
+    def __init__(self, questions):
+        self.questions = tuple(questions)
+        self.by_id = {q.id: q for q in self.questions}
+        slices = {}
+        for q in self.questions:
+            slices.setdefault((q.exam, q.section, q.teil), []).append(q)
+        self.slices = {k: tuple(v) for k, v in slices.items()}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __iter__(self):
+        return iter(self.questions)
+
+    def __getitem__(self, i):
+        return self.questions[i]
+
+    def get(self, qid):
+        return self.by_id.get(qid)
+
+    def slice(self, exam, section, teil) -> tuple:
+        return self.slices.get((exam, section, teil), ())
+
+    def exams(self) -> list:
+        return list(dict.fromkeys(q.exam for q in self.questions))
+
+    def to_dicts(self) -> list:
+        return [q.to_dict() for q in self.questions]
+
+
+def _item(pool, v):
+    if isinstance(v, dict):  # a vocabulary entry: a tuple of (key, value) pairs
+        return pool(tuple(pool((pool(k), pool(x))) for k, x in v.items()))
+    return pool(v)
+
+
+def _pooled(pool, value):
+    """value shared through pool, a list as a tuple of pooled items. A value holding anything
+    unhashable (a list inside a list or entry) is kept as it is."""
+    try:
+        if isinstance(value, list):
+            return pool(tuple(_item(pool, v) for v in value))
+        return pool(value)
+    except TypeError:
+        return value
+
+
+def from_dicts(records) -> Corpus:
+    pool = Pool()
+    intern = sys.intern
+    questions = []
+    for r in records:
+        fields = {}
+        for f in FIELDS:
+            if f not in r:
+                continue
+            v = r[f]
+            if isinstance(v, str) and (f in INTERNED or f == "book"):
+                fields[f] = intern(v)
+            elif f == "flags" and isinstance(v, list):
+                fields[f] = _pooled(pool, [intern(x) if isinstance(x, str) else x for x in v])
+            elif f in POOLED or f in SEQUENCES:
+                fields[f] = _pooled(pool, v)
+            else:
+                fields[f] = v
+        extra = {k: v for k, v in r.items() if k not in FIELDS}
+        questions.append(Question(**fields, extra=extra or None))
+    metrics.count("model.pooled_values", len(pool))
+    return Corpus(questions)
+
+
+def load(path=store.QUESTIONS) -> Corpus:
+    records = store.load_questions(path)
+    with metrics.timer("model.build"):
+        return from_dicts(records)
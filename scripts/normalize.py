@@ -0,0 +1,39 @@
+"""OCR line normalisation: one str.translate pass plus one whitespace collapse.
+
+The OCR text carries form feeds, bidi marks (U+200E/U+200F, U+202A/U+202C),
+tabs and stray Arabic-script runs from the scanner's watermark. All of them
+become spaces through a precomputed table, then split()/join collapses runs of
+whitespace and strips the ends, so each line is copied a few times instead of
+once per replace and regex.
+
+clean_text() does the same for a whole buffer before splitting it. Form feed
+is a line boundary for str.splitlines(), so the buffer table leaves it alone
+and the split happens before the whitespace collapse; the lines come out
+exactly as [clean_line(l) for l in text.splitlines()]. Since splitlines()
+also breaks at form feeds (one per scanned page), index i of those lines is
+not line i + 1 of the file; file_lines() maps one to the other.
+"""
+_SPACE = "\x0c\u200f\u200e\u202a\u202c\t" + "".join(map(chr, range(0x0600, 0x0700)))
+LINE_TABLE = str.maketrans(dict.fromkeys(_SPACE, " "))
+TEXT_TABLE = str.maketrans(dict.fromkeys(_SPACE.replace("\x0c", ""), " "))
+
+
+def clean_line(s: str) -> str:
+    # str.split() splits on exactly what re's \s matches, so this is re.sub(r"\s+", " ", s).strip()
+    return " ".join(s.translate(LINE_TABLE).split())
+
+
+def clean_text(text: str) -> list:
+    """Cleaned lines of a whole OCR buffer, identical to clean_line() over splitlines()."""
+    return [" ".join(line.split()) for line in text.translate(TEXT_TABLE).splitlines()]
+
+
+def file_lines(text: str) -> list:
+    """1-based "\n" line number in text of every line of clean_text(text)."""
+    segments = text.split("\n")
+    out = []
+    for k, seg in enumerate(segments, 1):
+        # a segment's own breaks (form feed, \r, ...) add lines; the "\n" after it ends the last one
+        n = len((seg + "\n").splitlines()) if k < len(segments) else len(seg.splitlines())
+        out.extend([k] * n)
+    return out
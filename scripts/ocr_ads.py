@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Local Tesseract OCR for LV3 ad pages, as an offline alternative to the vision call.
+
+  python3 scripts/ocr_ads.py lv3-pages/exam-p5-6.jpg      # print the a)–l) ads found on a page
+
+Each rendered page goes through `tesseract ... tsv`, which gives every word
+with its box and confidence. The ad labels a) … l) anchor the boxes: labels are
+grouped into columns by their x position, and every word belongs to the
+nearest label above it in its column. Text before the first label (the
+running header, the task line) is dropped.
+
+A page's confidence is the mean word confidence of the ad text, scaled down
+when labels are missing, so extract_lv3_ads.py can send only the doubtful
+pages to the vision model.
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+LANG = "deu"
+PSM = 3              # fully automatic layout; the ad boxes come out as separate blocks
+MIN_CONFIDENCE = 0.80
+EXPECTED_ADS = 10    # fewest ads an LV3 has (a–j); most have twelve
+LABEL = re.compile(r"^([a-l])\)(.*)$")
+
+
+def available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+def tesseract_words(image: str, lang: str = LANG) -> list:
+    """Words on an image as dicts with text, box, confidence and tesseract's line key."""
+    out = subprocess.run(["tesseract", image, "stdout", "-l", lang, "--psm", str(PSM), "tsv"],
+                         capture_output=True, text=True, check=True).stdout
+    words = []
+    for row in csv.DictReader(io.StringIO(out), delimiter="\t", quoting=csv.QUOTE_NONE):
+        text = (row.get("text") or "").strip()
+        if row["level"] != "5" or not text or float(row["conf"]) < 0:
+            continue
+        words.append({
+            "text": text,
+            "left": int(row["left"]), "top": int(row["top"]),
+            "width": int(row["width"]), "height": int(row["height"]),
+            "conf": float(row["conf"]),
+            "line": (int(row["block_num"]), int(row["par_num"]), int(row["line_num"])),
+            "first": row["word_num"] == "1",
+        })
+    return words
+
+
+def find_labels(words) -> dict:
+    """{letter: word index} for the a)–l) labels, preferring labels that start a line."""
+    labels = {}
+    for i, w in enumerate(words):
+        m = LABEL.match(w["text"])
+        if not m:
+            continue
+        letter = m.group(1)
+        if letter not in labels or (w["first"] and not words[labels[letter]]["first"]):
+            labels[letter] = i
+    return labels
+
+
+def segment(words, labels) -> dict:
+    """{letter: [word]} by label position: same column, nearest label above."""
+    if not labels:
+        return {}
+    width = max(w["left"] + w["width"] for w in words)
+    tol = width * 0.05
+    anchors = sorted(((words[i]["left"], words[i]["top"], letter) for letter, i in labels.items()))
+    columns = []
+    for left, top, letter in anchors:
+        if columns and left - columns[-1]["left"] <= tol:
+            columns[-1]["labels"].append((top, letter))
+        else:
+            columns.append({"left": left, "labels": [(top, letter)]})
+    for col in columns:
+        col["labels"].sort()
+
+    boxes = {letter: [] for letter in labels}
+    for w in words:
+        col = None
+        for c in columns:
+            if c["left"] <= w["left"] + tol:
+                col = c
+        if col is None:
+            continue
+        owner = None
+        for top, letter in col["labels"]:
+            if top <= w["top"] + w["height"] / 2:
+                owner = letter
+        if owner is not None:
+            boxes[owner].append(w)
+    return boxes
+
+
+def ads_from_words(words) -> tuple:
+    """([{"letter", "text"}], confidence 0–1) for one page's words."""
+    labels = find_labels(words)
+    boxes = segment(words, labels)
+    ads, confs = [], []
+    for letter in sorted(boxes):
+        parts = []
+        for w in boxes[letter]:
+            text = w["text"]
+            if w is words[labels[letter]]:
+                text = LABEL.match(text).group(2)
+            if text:
+                parts.append(text)
+            confs.append(w["conf"])
+        text = " ".join(parts).strip()
+        if text:
+            ads.append({"letter": letter, "text": text})
+    if not ads:
+        return [], 0.0
+    expected = max(EXPECTED_ADS, ord(max(a["letter"] for a in ads)) - ord("a") + 1)
+    coverage = min(1.0, len(ads) / expected)
+    return ads, round(sum(confs) / len(confs) / 100 * coverage, 3)
+
+
+def ocr_pages(images, lang: str = LANG) -> dict:
+    """OCR one exam's rendered page range; labels may continue on the second page."""
+    ads, weighted, n = {}, 0.0, 0
+    for image in images:
+        page_ads, conf = ads_from_words(tesseract_words(image, lang))
+        for ad in page_ads:
+            ads.setdefault(ad["letter"], ad)
+        weighted += conf * len(page_ads)
+        n += len(page_ads)
+    ads = [ads[k] for k in sorted(ads)]
+    if len(images) > 1 and ads:
+        expected = max(EXPECTED_ADS, ord(ads[-1]["letter"]) - ord("a") + 1)
+        conf = weighted / n * min(1.0, len(ads) / expected)
+    else:
+        conf = weighted / n if n else 0.0
+    return {"ads": ads, "confidence": round(conf, 3)}
+
+
+def ocr_all(jobs_by_key: dict, jobs: int = None, lang: str = LANG) -> dict:
+    """{key: ocr_pages(images)} for {key: [image paths]}, one process per page range."""
+    keys = list(jobs_by_key)
+    with metrics.timer("ocr.total"), ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(ocr_pages, [jobs_by_key[k] for k in keys], [lang] * len(keys))
+        out = dict(zip(keys, results))
+    metrics.count("ocr.pages", sum(len(v) for v in jobs_by_key.values()))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("images", nargs="+", help="rendered page image(s) of one exam's ads")
+    ap.add_argument("--lang", default=LANG)
+    args = ap.parse_args()
+    if not available():
+        sys.exit("tesseract not found on PATH (apt install tesseract-ocr tesseract-ocr-deu)")
+    print(json.dumps(ocr_pages(args.images, args.lang), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Responsive WebP/AVIF variants of the lv3-pages/ scans, with a manifest.
+
+  python3 scripts/optimize_images.py              # build what changed
+  python3 scripts/optimize_images.py --force      # rebuild everything
+  python3 scripts/optimize_images.py --jobs 4
+
+Every lv3-pages/*.jpg is resized to each of WIDTHS (never upscaled) and saved
+as every format Pillow can write here, without EXIF, ICC or comment data, into
+lv3-pages/variants/. lv3-pages/variants/manifest.json records, per source, its
+hash and size and every variant's path, size, bytes and hash.
+
+The variants are build output: lv3-pages/variants/ is not committed and is
+built at deploy time. The app does not show the scans yet; a view that does
+picks its <picture> sources from the manifest.
+
+A source is rebuilt only when its hash, the settings or one of its outputs
+changed; variants of deleted sources are removed. Pages are encoded in a
+process pool, one page per task.
+"""
+import argparse
+import hashlib
+import io
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import metrics
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional; only this stage needs it
+    Image = None
+
+SRC_DIR = Path("lv3-pages")
+OUT_DIR = SRC_DIR / "variants"
+MANIFEST = OUT_DIR / "manifest.json"
+WIDTHS = [480, 828, 1240]   # phone, phone @2x / small tablet, tablet @2x; scans are 1654 px wide
+FORMATS = {
+    "avif": {"quality": 50, "speed": 6},
+    "webp": {"quality": 72, "method": 6},
+}
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def writable_formats() -> list:
+    """FORMATS this Pillow build can encode (AVIF needs Pillow 11.2+ built with libavif)."""
+    return [f for f in FORMATS if features.check(f)]
+
+
+def settings(formats) -> dict:
+    return {"widths": WIDTHS, "formats": {f: FORMATS[f] for f in formats}}
+
+
+def variant_path(src: Path, width: int, fmt: str) -> Path:
+    return OUT_DIR / f"{src.stem}-{width}.{fmt}"
+
+
+def encode(src: str, formats: list) -> dict:
+    """Manifest entry for one source, writing its variants. Runs in a worker process."""
+    src = Path(src)
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        im = im.convert("L" if im.mode in ("1", "L", "LA") else "RGB")  # also drops any alpha and palette
+        source = {"width": im.width, "height": im.height}
+        variants = []
+        for width in sorted({min(w, im.width) for w in WIDTHS}):
+            height = round(im.height * width / im.width)
+            resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buf = io.BytesIO()
+                resized.save(buf, fmt.upper(), **FORMATS[fmt])  # no exif=/icc_profile=: metadata is not copied
+                data = buf.getvalue()
+                out = variant_path(src, width, fmt)
+                out.write_bytes(data)
+                variants.append({"path": out.as_posix(), "format": fmt, "width": width, "height": height,
+                                 "bytes": len(data), "sha256": file_hash(data)})
+    return {**source, "variants": variants}
+
+
+def stale(entry, digest) -> bool:
+    if not entry or entry["sha256"] != digest:
+        return True
+    return any(not Path(v["path"]).exists() for v in entry["variants"])
+
+
+def build(jobs: int = None, force: bool = False) -> dict:
+    formats = writable_formats()
+    config = settings(formats)
+    manifest = json.loads(MANIFEST.read_text(encoding="utf-8")) if MANIFEST.exists() else {}
+    old = manifest.get("images", {}) if manifest.get("settings") == config else {}
+
+    sources = sorted(SRC_DIR.glob("*.jpg"))
+    with metrics.timer("images.hash"):
+        digests = {}
+        for src in sources:
+            data = src.read_bytes()
+            digests[src.name] = (file_hash(data), len(data))
+    todo = [s for s in sources if force or stale(old.get(s.name), digests[s.name][0])]
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    images = {s.name: old[s.name] for s in sources if s not in todo}
+    with metrics.timer("images.encode"), ProcessPoolExecutor(max_workers=jobs) as pool:
+        for src, entry in zip(todo, pool.map(encode, [str(s) for s in todo], [formats] * len(todo))):
+            digest, size = digests[src.name]
+            images[src.name] = {"sha256": digest, "bytes": size, **entry}
+    metrics.count("images.encoded", len(todo))
+    metrics.count("images.skipped", len(sources) - len(todo))
+
+    keep = {v["path"] for e in images.values() for v in e["variants"]}
+    for f in OUT_DIR.iterdir():
+        if f != MANIFEST and f.as_posix() not in keep:
+            f.unlink()
+
+    images = dict(sorted(images.items()))
+    manifest = {"settings": config, "images": images}
+    MANIFEST.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return {"formats": formats, "encoded": len(todo), "skipped": len(sources) - len(todo), "manifest": manifest}
+
+
+def summary(manifest) -> None:
+    images = manifest["images"].values()
+    source = sum(e["bytes"] for e in images)
+    print(f"{len(manifest['images'])} scans, {source:,} bytes as JPEG")
+    by_kind = {}
+    for e in images:
+        for v in e["variants"]:
+            by_kind.setdefault((v["format"], v["width"]), []).append(v["bytes"])
+    for (fmt, width), sizes in sorted(by_kind.items()):
+        print(f"  {fmt:4s} {width:>5} px  {sum(sizes):>11,} bytes  ({sum(sizes) / source:.0%} of the JPEGs)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jobs", type=int, help="encoder processes (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="re-encode every scan even if unchanged")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+    if Image is None:
+        sys.exit("Pillow is not installed (pip install Pillow; AVIF needs Pillow 11.2+)")
+
+    with metrics.run("optimize_images", profile=args.profile, metrics_file=args.metrics_file):
+        result = build(args.jobs, args.force)
+        missing = [f for f in FORMATS if f not in result["formats"]]
+        if missing:
+            print(f"this Pillow cannot write {', '.join(missing)}; skipped")
+        print(f"encoded {result['encoded']}, unchanged {result['skipped']}")
+        summary(result["manifest"])
+
+
+if __name__ == "__main__":
+    main()
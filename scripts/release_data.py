@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Version data/questions.json and emit per-release deltas for installed clients.
+
+  python3 scripts/release_data.py              # release the current questions.json if it changed
+  python3 scripts/release_data.py --report     # delta vs full-download bytes for typical fixes
+
+Each release compares questions.json with the previous release (kept gzipped
+in data/releases/) and writes data/deltas/<from>-<to>.json:
+
+  {"from": 3, "to": 4, "added": [record, ...], "removed": [id, ...],
+   "changed": {id: {"set": {field: value}, "unset": [field]}}, "order": [id, ...]}
+
+"order" is only present when applying the other three would leave the records
+in a different order. data/versions.json lists the current version and the
+deltas still kept; sw.js walks that chain from its cached version and falls
+back to the full file when a step is missing.
+"""
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import random
+from pathlib import Path
+
+import metrics
+
+INPUT = Path("data/questions.json")
+VERSIONS = Path("data/versions.json")
+DELTA_DIR = Path("data/deltas")
+SNAPSHOT = Path("data/releases/questions.json.gz")
+KEEP_DELTAS = 20  # older clients download the full file
+
+
+def dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def content_hash(questions) -> str:
+    return hashlib.sha256(json.dumps(questions, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def diff(old, new) -> dict:
+    """Delta turning the `old` record list into `new`, keyed by id."""
+    old_by = {q["id"]: q for q in old}
+    new_ids = {q["id"] for q in new}
+    removed = [q["id"] for q in old if q["id"] not in new_ids]
+    added, changed = [], {}
+    for q in new:
+        prev = old_by.get(q["id"])
+        if prev is None:
+            added.append(q)
+            continue
+        if prev == q:
+            continue
+        patch = {"set": {k: v for k, v in q.items() if prev.get(k, object()) != v}}
+        unset = [k for k in prev if k not in q]
+        if unset:
+            patch["unset"] = unset
+        changed[q["id"]] = patch
+    delta = {"added": added, "removed": removed, "changed": changed}
+    if [q["id"] for q in apply(old, delta)] != [q["id"] for q in new]:
+        delta["order"] = [q["id"] for q in new]
+    return delta
+
+
+def apply(base, delta):
+    """The same steps as applyDelta() in sw.js."""
+    removed = set(delta["removed"])
+    out = []
+    for q in base:
+        if q["id"] in removed:
+            continue
+        patch = delta["changed"].get(q["id"])
+        if patch:
+            q = {**q, **patch["set"]}
+            for k in patch.get("unset", []):
+                q.pop(k, None)
+        out.append(q)
+    out.extend(delta["added"])
+    if "order" in delta:
+        by_id = {q["id"]: q for q in out}
+        out = [by_id[i] for i in delta["order"]]
+    return out
+
+
+def sizes(data: bytes) -> dict:
+    return {"bytes": len(data), "gzip": len(gzip.compress(data, 9))}
+
+
+def load_versions():
+    if VERSIONS.exists():
+        return json.loads(VERSIONS.read_text(encoding="utf-8"))
+    return {"current": 0, "hash": None, "full": {"path": str(INPUT)}, "deltas": {}}
+
+
+def release(questions):
+    versions = load_versions()
+    digest = content_hash(questions)
+    if digest == versions["hash"]:
+        print(f"unchanged since v{versions['current']} ({digest})")
+        return versions
+
+    version = versions["current"] + 1
+    if SNAPSHOT.exists() and versions["current"]:
+        with metrics.timer("release.diff"):
+            previous = json.loads(gzip.decompress(SNAPSHOT.read_bytes()))
+            delta = diff(previous, questions)
+        if apply(previous, delta) != questions:
+            raise SystemExit("delta does not reproduce questions.json, not releasing")
+        data = dumps({"from": versions["current"], "to": version, **delta})
+        path = DELTA_DIR / f"{versions['current']}-{version}.json"
+        DELTA_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        versions["deltas"][str(versions["current"])] = {"to": version, "path": str(path), **sizes(data)}
+        print(f"delta v{versions['current']}→v{version}: +{len(delta['added'])} -{len(delta['removed'])} "
+              f"~{len(delta['changed'])}  {len(data):,} bytes → {path}")
+
+    # keep the newest KEEP_DELTAS steps
+    for start in sorted(versions["deltas"], key=int)[:-KEEP_DELTAS or None]:
+        Path(versions["deltas"].pop(start)["path"]).unlink(missing_ok=True)
+
+    full = sizes(INPUT.read_bytes()) if INPUT.exists() else sizes(dumps(questions))
+    versions.update({"current": version, "hash": digest, "full": {"path": str(INPUT), **full}})
+    SNAPSHOT.parent.mkdir(parents=True, exist_ok=True)
+    SNAPSHOT.write_bytes(gzip.compress(dumps(questions), 9))
+    VERSIONS.write_text(json.dumps(versions, indent=1), encoding="utf-8")
+    print(f"released v{version} ({digest}), full download {full['bytes']:,} bytes ({full['gzip']:,} gzip)")
+    return versions
+
+
+# ── size report ──────────────────────────────────────────────────────────────
+
+def scenarios(questions, rng):
+    """(name, edited copy) pairs for the kinds of fixes a release usually carries."""
+    def edit(n, fn):
+        out = copy.deepcopy(questions)
+        for q in rng.sample(out, n):
+            fn(q)
+        return out
+
+    exam = questions[0]["exam"]
+    new_exam = [dict(copy.deepcopy(q), id=f"neu-{q['number']}-{i}", exam="NEU")
+                for i, q in enumerate(questions) if q["exam"] == exam]
+    return [
+        ("1 explanation edited", edit(1, lambda q: q.update(explanation_es=q.get("explanation_es", "") + " (corregido)"))),
+        ("10 answer keys fixed", edit(10, lambda q: q.update(correct="A" if q.get("correct") != "A" else "B"))),
+        ("50 vocabulary lists extended",
+         edit(50, lambda q: q.update(vocabulary=(q.get("vocabulary") or []) + [{"de": "Prüfung", "es": "examen"}]))),
+        ("flag removed from 100 records", edit(100, lambda q: q.update(flags=[]))),
+        ("new exam (40 records)", questions + new_exam),
+        ("exam removed (40 records)", [q for q in questions if q["exam"] != exam]),
+    ]
+
+
+def report(questions, seed=0):
+    full = sizes(INPUT.read_bytes()) if INPUT.exists() else sizes(dumps(questions))
+    print(f"{'change':32s} {'delta':>10s} {'gzip':>8s} {'full':>11s} {'gzip':>9s} {'saved':>7s}")
+    for name, edited in scenarios(questions, random.Random(seed)):
+        delta = diff(questions, edited)
+        assert apply(questions, delta) == edited
+        d = sizes(dumps({"from": 1, "to": 2, **delta}))
+        print(f"{name:32s} {d['bytes']:>10,} {d['gzip']:>8,} {full['bytes']:>11,} {full['gzip']:>9,} "
+              f"{1 - d['gzip'] / full['gzip']:>7.1%}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--report", action="store_true", help="print delta sizes for typical fixes, release nothing")
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+
+    questions = json.loads(INPUT.read_text(encoding="utf-8"))
+    with metrics.run("release_data", profile=args.profile, metrics_file=args.metrics_file, quiet=args.report):
+        if args.report:
+            report(questions)
+        else:
+            release(questions)
+
+
+if __name__ == "__main__":
+    main()
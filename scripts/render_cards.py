@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Pre-rendered question card fragments for app.js, built once per export.
+
+  python3 scripts/render_cards.py        # data/questions.json + data/glossary.json → data/cards.json
+
+renderQuestionCard used to escape every field, walk the glossary spans of the
+context, parse option labels (parseOptKey) and look up option and question
+translations each time a card was shown. The same HTML is produced here, so
+the client only fills its template:
+
+  {"v": 2,
+   "strings": [html, ...],                       # every distinct fragment once
+   "banks":   [[[val, label, translation], ...]], # option lists, string indexes
+   "cards":   {id: [tag, context, question, question_es, instruction, bank, source]}}
+
+Values are indexes into "strings" (or "banks" for the bank field) and
+already HTML-escaped; question_es and the option translations are shown only
+while translations are switched on. "source" is source_hash() of the fields
+the card was rendered from: sw.js patches questions.json between releases
+but leaves cards.json as installed, so app.js uses a card only while its
+question still has that hash and renders the others itself. Functions here mirror app.js one for one
+(escape_html → escapeHtml, wrap_vocab → wrapVocab, ...), glossary path only:
+without data/glossary.json no cards are written and the app renders at runtime.
+"""
+import json
+import re
+import zlib
+from pathlib import Path
+
+import metrics
+import store
+
+GLOSSARY = Path("data/glossary.json")
+OUT = Path("data/cards.json")
+CARDS_VERSION = 2
+SOURCE_FIELDS = ["id", "exam", "section", "teil", "number", "instruction", "context", "question",
+                 "question_es", "explanation_es", "options"]
+HIDDEN_FLAG = "page_missing_from_pdf"  # filtered out by app.js init(), so never rendered
+
+_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})
+_OPT_KEY = re.compile(r"^([A-Za-zXx])\)?")
+_SENTENCE_END = re.compile(r"[.!?]\s")
+
+
+def escape_html(s) -> str:
+    return str(s).translate(_ESCAPE)
+
+
+def wrap_vocab(text: str, spans, entries) -> str:
+    if not text:
+        return ""
+    # the glossary spans are UTF-16 offsets (what JS slices by); they equal str offsets for BMP-only text
+    if max(text) > "\uffff":
+        units = text.encode("utf-16-le")
+        cut = lambda s, e: units[2 * s:2 * max(s, e)].decode("utf-16-le")  # noqa: E731
+        end = len(units) // 2
+    else:
+        cut, end = (lambda s, e: text[s:e]), len(text)
+    out, pos = [], 0
+    for s, e, idx in spans:
+        v = entries[idx]
+        out.append(escape_html(cut(pos, s)))
+        out.append(f'<span class="vocab-hit" data-tip="{escape_html(v["de"] + " = " + v["es"])}">'
+                   f'{escape_html(cut(s, e))}</span>')
+        pos = e
+    return "".join(out) + escape_html(cut(pos, end))
+
+
+def parse_opt_key(opt: str, i: int) -> str:
+    m = _OPT_KEY.match(opt)
+    return m.group(1).upper() if m else chr(65 + i % 26)
+
+
+def option_translation(refs, i, entries) -> str:
+    idx = (refs and i < len(refs) and refs[i]) or []
+    return " · ".join(f"{entries[g]['de']} = {entries[g]['es']}" for g in idx)
+
+
+def infer_question_translation(q) -> str:
+    if q.get("question_es"):
+        return q["question_es"]
+    if not q.get("explanation_es"):
+        return ""
+    first = _SENTENCE_END.split(q["explanation_es"])[0]
+    return first if len(first.encode("utf-16-le")) // 2 > 8 else ""
+
+
+def source_hash(q) -> int:
+    """CRC-32 of the UTF-8 JSON array of SOURCE_FIELDS, as cardSourceHash() computes it in app.js."""
+    data = json.dumps([q.get(f) for f in SOURCE_FIELDS], ensure_ascii=False, separators=(",", ":"))
+    return zlib.crc32(data.encode("utf-8"))
+
+
+def render(q, glossary) -> dict:
+    """One card's fragments: exactly what renderQuestionCard would put into the DOM."""
+    refs = glossary["questions"].get(q["id"]) or {}
+    spans = glossary["spans"].get(refs.get("context"), []) if refs.get("context") else []
+    options = []
+    for i, opt in enumerate(q.get("options") or []):
+        label = str(opt)
+        options.append((escape_html(parse_opt_key(label, i)), escape_html(label),
+                        escape_html(option_translation(refs.get("options"), i, glossary["entries"]))))
+    return {
+        "tag": escape_html(f"{q['exam']} · {q['section']} T{q['teil']} · #{q['number']}"),
+        "context": wrap_vocab(q.get("context") or "", spans, glossary["entries"]),
+        "question": escape_html(q.get("question") or "Pregunta"),
+        "question_es": escape_html(infer_question_translation(q)),
+        "instruction": escape_html(q.get("instruction") or ""),
+        "options": tuple(options),
+    }
+
+
+def build(questions, glossary) -> dict:
+    strings, string_ids = [], {}
+    banks, bank_ids = [], {}
+
+    def sid(s):
+        if s not in string_ids:
+            string_ids[s] = len(strings)
+            strings.append(s)
+        return string_ids[s]
+
+    cards = {}
+    for q in questions:
+        if HIDDEN_FLAG in (q.get("flags") or []):
+            continue
+        c = render(q, glossary)
+        bank = tuple(tuple(sid(s) for s in opt) for opt in c["options"])
+        if bank not in bank_ids:
+            bank_ids[bank] = len(banks)
+            banks.append([list(o) for o in bank])
+        cards[q["id"]] = [sid(c["tag"]), sid(c["context"]), sid(c["question"]), sid(c["question_es"]),
+                          sid(c["instruction"]), bank_ids[bank], source_hash(q)]
+    return {"v": CARDS_VERSION, "strings": strings, "banks": banks, "cards": cards}
+
+
+def write(questions, out=OUT, glossary_path=GLOSSARY):
+    """Build and write the cards; None (nothing written) when there is no glossary yet."""
+    if not Path(glossary_path).exists():
+        print(f"cards: {glossary_path} not found (run scripts/build_glossary.py), skipped")
+        return None
+    glossary = json.loads(Path(glossary_path).read_text(encoding="utf-8"))
+    with metrics.timer("cards.render"):
+        cards = build(questions, glossary)
+    data = json.dumps(cards, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    Path(out).write_bytes(data)
+    print(f"cards     → {out} ({len(data):,} bytes, {len(cards['cards'])} cards, "
+          f"{len(cards['strings'])} fragments, {len(cards['banks'])} option banks)")
+    return cards
+
+
+def main():
+    write(store.load_questions())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Response schemas for the enrichment calls and a validator for what comes back.
+
+Schemas use the OpenAPI subset Gemini accepts as `responseSchema`
+(type/properties/required/items). The same dicts are checked locally before a
+result is merged, since a reply can still be cut off (MAX_TOKENS) or carry an
+item with a field missing or of the wrong type.
+"""
+import metrics
+
+STRING = {"type": "STRING"}
+VOCAB = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"de": STRING, "es": STRING},
+        "required": ["de", "es"],
+    },
+}
+FIELDS = {
+    "question_es": STRING,
+    "explanation_es": STRING,
+    "vocabulary": VOCAB,
+}
+AD = {
+    "type": "OBJECT",
+    "properties": {"letter": STRING, "text": STRING},
+    "required": ["letter", "text"],
+}
+ADS = {"type": "ARRAY", "items": AD}
+INTEGER = {"type": "INTEGER"}
+STRINGS = {"type": "ARRAY", "items": STRING}
+QUESTION = {
+    "type": "OBJECT",
+    "properties": {"id": STRING, "exam": STRING, "section": STRING, "teil": INTEGER, "type": STRING,
+                   "number": INTEGER, "question": STRING, "options": STRINGS, "correct": STRING,
+                   "flags": STRINGS, **FIELDS},
+    "required": ["id", "exam", "section", "teil", "type", "number"],
+}
+
+_TYPES = {"STRING": str, "OBJECT": dict, "ARRAY": list, "BOOLEAN": bool,
+          "INTEGER": int, "NUMBER": (int, float)}
+
+
+def item(fields) -> dict:
+    """Schema of one enrichment result: id plus the requested fields."""
+    return {
+        "type": "OBJECT",
+        "properties": {"id": STRING, **{f: FIELDS[f] for f in fields}},
+        "required": ["id", *fields],
+    }
+
+
+def batch(fields, wrap: str = None) -> dict:
+    """Array of item(fields), optionally wrapped as {wrap: [...]}."""
+    arr = {"type": "ARRAY", "items": item(fields)}
+    if not wrap:
+        return arr
+    return {"type": "OBJECT", "properties": {wrap: arr}, "required": [wrap]}
+
+
+def validate(value, schema, path="$"):
+    """List of problems; empty when value matches. Required strings must be non-empty."""
+    kind = schema.get("type")
+    if kind and not isinstance(value, _TYPES[kind]):
+        return [f"{path}: expected {kind.lower()}, got {type(value).__name__}"]
+    errors = []
+    if kind == "OBJECT":
+        props = schema.get("properties", {})
+        for key in schema.get("required", []):
+            v = value.get(key)
+            if v is None:
+                errors.append(f"{path}.{key}: missing")
+            elif isinstance(v, str) and not v.strip():
+                errors.append(f"{path}.{key}: empty")
+        for key, sub in props.items():
+            if value.get(key) is not None:
+                errors.extend(validate(value[key], sub, f"{path}.{key}"))
+    elif kind == "ARRAY" and "items" in schema:
+        for i, v in enumerate(value):
+            errors.extend(validate(v, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def check(items: dict, schema: dict):
+    """Split salvaged {id: item} into (valid, invalid ids), counting both in metrics."""
+    valid, invalid = {}, []
+    for qid, it in items.items():
+        problems = validate(it, schema)
+        if problems:
+            invalid.append(qid)
+            print(f"  schema: {qid}: {'; '.join(problems[:3])}", flush=True)
+        else:
+            valid[qid] = it
+    metrics.count("schema.valid", len(valid))
+    metrics.count("schema.invalid", len(invalid))
+    return valid, invalid
+
+
+def check_questions(questions) -> list:
+    """Problems in a questions.json record list: records not matching QUESTION, and repeated ids."""
+    problems, seen = [], set()
+    for i, q in enumerate(questions):
+        qid = q.get("id", f"#{i}")
+        problems.extend(f"{qid}: {p[2:]}" for p in validate(q, QUESTION))
+        if qid in seen:
+            problems.append(f"{qid}: duplicate id")
+        seen.add(qid)
+    return problems
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Trigram full-text index over questions, contexts, options and Spanish fields.
+
+  python3 scripts/search_index.py build
+  python3 scripts/search_index.py query Termin
+  python3 scripts/search_index.py query answer:wegen type:gap_fill
+
+Text is folded before indexing and querying (case, umlauts/ß, Spanish
+accents), so "Prufung" and "Prüfung" match. The ae/oe/ue digraphs are folded
+only in German text, so "Pruefung" matches too while Spanish "que" or
+"puede" stay as they are; a query is folded both ways and each text is
+checked with the form for its language (vocabulary entries have both).
+Indexed units are distinct (field, text) pairs — a shared reading text is
+indexed once, not once per question — and posting lists are delta-encoded.
+Questions are read through model.load(), so a long-lived index holds the
+compact records rather than one dict per question.
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+import model
+
+INPUT = Path("data/questions.json")
+OUT = Path("data/search_index.json")
+
+FIELDS = ["question", "context", "options", "answer", "question_es", "explanation_es", "vocabulary"]
+FILTERS = {"exam", "section", "type", "teil"}
+GERMAN = {"question", "context", "options", "answer"}
+SPANISH = {"question_es", "explanation_es"}
+
+_DIGRAPHS = re.compile(r"(?<=[aou])e")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: str, german: bool = True) -> str:
+    """Lowercase, strip diacritics, ß→ss, ae/oe/ue→a/o/u if German; words separated by one space."""
+    text = text.casefold().replace("ß", "ss")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    if german:
+        text = _DIGRAPHS.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def grams(word: str):
+    if len(word) >= 3:
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+    # short words: anchor at word start (" zu")
+    return {(" " + word)[:3]} if len(word) == 2 else set()
+
+
+def delta_encode(nums):
+    out, prev = [], 0
+    for n in nums:
+        out.append(n - prev)
+        prev = n
+    return out
+
+
+def delta_decode(deltas):
+    out, acc = [], 0
+    for d in deltas:
+        acc += d
+        out.append(acc)
+    return out
+
+
+def answer_text(q):
+    corr = str(q.get("correct") or "").strip().upper()[:1]
+    for o in q.get("options") or []:
+        m = re.match(r"^([A-Za-z])\)\s*(.*)$", str(o))
+        if m and m.group(1).upper() == corr:
+            return m.group(2)
+    return ""
+
+
+def field_texts(q):
+    yield "question", q.get("question") or ""
+    yield "context", q.get("context") or ""
+    yield "options", " | ".join(str(o) for o in q.get("options") or [])
+    yield "answer", answer_text(q)
+    yield "question_es", q.get("question_es") or ""
+    yield "explanation_es", q.get("explanation_es") or ""
+    yield "vocabulary", " | ".join(f"{v.get('de', '')} {v.get('es', '')}" for v in q.get("vocabulary") or [])
+
+
+def folded_texts(q):
+    """field_texts() folded for their language; vocabulary folds each "de" and "es" on its own."""
+    for field, text in field_texts(q):
+        if field == "vocabulary":
+            yield field, " ".join(f"{fold(v.get('de', ''))} {fold(v.get('es', ''), german=False)}".strip()
+                                  for v in q.get("vocabulary") or []).strip()
+        else:
+            yield field, fold(text, german=field not in SPANISH)
+
+
+# ── build ───────────────────────────────────────────────────────────────────
+
+def build(questions):
+    text_ids = {}
+    owners = []
+    postings = defaultdict(set)
+
+    for qi, q in enumerate(questions):
+        for field, folded in folded_texts(q):
+            if not folded:
+                continue
+            key = (field, folded)
+            ti = text_ids.get(key)
+            if ti is None:
+                ti = text_ids[key] = len(owners)
+                owners.append([FIELDS.index(field), []])
+                for word in set(folded.split()):
+                    for g in grams(word):
+                        postings[g].add(ti)
+                    # word-start gram so 2-letter queries and prefixes anchor correctly
+                    postings[(" " + word)[:3]].add(ti)
+            owners[ti][1].append(qi)
+
+    return {
+        "v": 1,
+        "fields": FIELDS,
+        "ids": [q["id"] for q in questions],
+        "texts": [[f, delta_encode(qs)] for f, qs in owners],
+        "grams": {g: delta_encode(sorted(ts)) for g, ts in sorted(postings.items())},
+    }
+
+
+# ── query ───────────────────────────────────────────────────────────────────
+
+class SearchIndex:
+    def __init__(self, doc, questions=None):
+        self.fields = doc["fields"]
+        self.ids = doc["ids"]
+        self.texts = [(f, delta_decode(qs)) for f, qs in doc["texts"]]
+        self._grams = doc["grams"]
+        self._decoded = {}
+        self.questions = questions
+        self._folded = {}
+
+    @classmethod
+    def load(cls, path=OUT, questions_path=INPUT):
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(doc, model.load(questions_path))
+
+    def posting(self, gram):
+        p = self._decoded.get(gram)
+        if p is None:
+            p = self._decoded[gram] = set(delta_decode(self._grams.get(gram, [])))
+        return p
+
+    def _candidates(self, word):
+        gs = grams(word) or {(" " + word)[:3]}
+        if len(word) < 3:
+            gs = {(" " + word)[:3]}
+        sets = sorted((self.posting(g) for g in gs), key=len)
+        if not sets:
+            return set()
+        out = set(sets[0])
+        for s in sets[1:]:
+            out &= s
+            if not out:
+                break
+        return out
+
+    def _folded_text(self, ti):
+        # Verification text is folded lazily from the question it came from.
+        t = self._folded.get(ti)
+        if t is None:
+            field_idx, qs = self.texts[ti]
+            field = self.fields[field_idx]
+            t = self._folded[ti] = " " + dict(folded_texts(self.questions[qs[0]]))[field] + " "
+        return t
+
+    def _phrases(self, field_idx, de, es):
+        field = self.fields[field_idx]
+        if field in GERMAN:
+            return (de,)
+        return (es,) if field in SPANISH else (de, es)
+
+    def search(self, query):
+        """Return matching question ids (index order) for a query string.
+
+        Terms are ANDed; `field:term` restricts a term to one indexed field,
+        `exam:`, `section:`, `type:` and `teil:` filter question metadata.
+        """
+        terms, filters = [], {}
+        for tok in query.split():
+            name, sep, val = tok.partition(":")
+            if sep and name in FILTERS:
+                filters[name] = val.lower()
+            elif sep and name in self.fields:
+                terms.append((self.fields.index(name), val))
+            else:
+                terms.append((None, tok))
+
+        result = None
+        for field_idx, raw in terms:
+            de, es = fold(raw), fold(raw, german=False)
+            if not de:
+                continue
+            cand = set()
+            for phrase in {de, es}:
+                words = phrase.split()
+                c = self._candidates(words[0])
+                for w in words[1:]:
+                    c &= self._candidates(w)
+                cand |= c
+            hits = set()
+            for ti in cand:
+                f, qs = self.texts[ti]
+                if field_idx is not None and f != field_idx:
+                    continue
+                if self.questions is not None:
+                    text = self._folded_text(ti)
+                    needles = [p if len(p) >= 3 else " " + p for p in self._phrases(f, de, es)]
+                    if not any(n in text for n in needles):
+                        continue
+                hits.update(qs)
+            result = hits if result is None else result & hits
+            if not result:
+                return []
+
+        if result is None:
+            result = set(range(len(self.ids)))
+        if filters and self.questions is not None:
+            result = {qi for qi in result if self._passes(self.questions[qi], filters)}
+        return [self.ids[qi] for qi in sorted(result)]
+
+    @staticmethod
+    def _passes(q, filters):
+        return all(str(q.get(k, "")).lower() == v for k, v in filters.items())
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+
+def cmd_build(args):
+    questions = model.load(args.input)
+    t0 = time.perf_counter()
+    doc = build(questions)
+    elapsed = time.perf_counter() - t0
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(doc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"texts={len(doc['texts'])} grams={len(doc['grams'])} "
+          f"postings={sum(len(p) for p in doc['grams'].values())} built in {elapsed * 1000:.0f} ms")
+    print(f"Saved to {args.out} ({args.out.stat().st_size:,} bytes)")
+
+
+def cmd_query(args):
+    idx = SearchIndex.load(args.out, args.input)
+    query = " ".join(args.terms)
+    idx.search(query)  # warm gram cache for timing
+    t0 = time.perf_counter()
+    ids = idx.search(query)
+    elapsed = time.perf_counter() - t0
+    for qid in ids[: args.limit]:
+        q = idx.questions.get(qid)
+        print(f"{qid:22s} {q['type']:15s} {(q.get('question') or '')[:70]}")
+    if len(ids) > args.limit:
+        print(f"... {len(ids) - args.limit} more")
+    print(f"{len(ids)} hits in {elapsed * 1000:.3f} ms", file=sys.stderr)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--input", type=Path, default=INPUT)
+    ap.add_argument("--out", type=Path, default=OUT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build").set_defaults(func=cmd_build)
+    q = sub.add_parser("query")
+    q.add_argument("terms", nargs="+")
+    q.add_argument("--limit", type=int, default=20)
+    q.set_defaults(func=cmd_query)
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Where the pipeline's files live and how questions.json is read and written.
+
+Paths are relative to the repository root, like everywhere else in scripts/;
+`python -m scripts` changes into ROOT first, so they resolve from any working
+directory. questions.json is always written the same way (UTF-8, indent=2) so
+diffs between stages stay readable.
+"""
+import json
+from pathlib import Path
+
+import metrics
+
+ROOT = Path(__file__).resolve().parent.parent
+QUESTIONS = Path("data/questions.json")
+
+
+def load_questions(path=QUESTIONS) -> list:
+    with metrics.timer("data.load"):
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def save_questions(questions, path=QUESTIONS) -> None:
+    with metrics.timer("data.save"):
+        Path(path).write_text(json.dumps(questions, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -1,39 +1,25 @@
 #!/usr/bin/env python3
 """Fast translation - larger batches, parallel requests."""
-import json, os, sys, time, urllib.request
+import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-GEMINI_KEY = os.environ["GEMINI_API_KEY"]
-DATA = "data/questions.json"
+import gemini
+import metrics
+import schemas
+import store
+from json_salvage import salvage
+
+DATA = store.QUESTIONS
+FIELDS = ["question_es", "explanation_es", "vocabulary"]
 BATCH_SIZE = 20
 WORKERS = 4
+RETRY_BACKOFF = 2  # seconds × attempt
+MAX_REQUEUE = 2  # extra rounds for questions lost from a reply
 
 
-def call_gemini(prompt):
-    body = json.dumps({
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {"temperature": 0.2}
-    }).encode()
-    req = urllib.request.Request(
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_KEY}",
-        data=body, headers={"Content-Type": "application/json"}
-    )
-    for attempt in range(3):
-        try:
-            resp = urllib.request.urlopen(req, timeout=120)
-            result = json.loads(resp.read())
-            text = result["candidates"][0]["content"]["parts"][0]["text"].strip()
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1].rsplit("```", 1)[0]
-            start = text.find("[")
-            end = text.rfind("]") + 1
-            if start >= 0 and end > start:
-                return json.loads(text[start:end])
-            return json.loads(text)
-        except Exception as e:
-            if attempt < 2:
-                time.sleep(2 * (attempt + 1))
-    return []
+def call_gemini(api_key, prompt):
+    body = gemini.request_body(prompt, schemas.batch(FIELDS))
+    return gemini.generate(api_key, body, backoff=RETRY_BACKOFF, verbose=False) or ""
 
 
 def build_prompt(batch):
@@ -48,47 +34,67 @@ def build_prompt(batch):
 
 Return JSON array: [{{"id":"...","question_es":"...","explanation_es":"...","vocabulary":[{{"de":"...","es":"..."}}]}}]
 
-{items}
-
-ONLY valid JSON array, no markdown."""
+{items}"""
 
 
-def process_batch(batch_info):
+def process_batch(api_key, batch_info):
     idx, batch = batch_info
-    results = call_gemini(build_prompt(batch))
-    return idx, batch, {r["id"]: r for r in results if "id" in r}
+    rmap, lost = salvage(call_gemini(api_key, build_prompt(batch)), [q["id"] for q in batch])
+    if lost:
+        print(f"  batch {idx}: lost from reply: {', '.join(lost)}", flush=True)
+    rmap, _ = schemas.check(rmap, schemas.item(FIELDS))  # invalid ids are printed by check()
+    return idx, batch, rmap
 
 
 def main():
-    with open(DATA) as f:
-        questions = json.load(f)
+    ap = argparse.ArgumentParser(description=__doc__)
+    metrics.add_arguments(ap)
+    args = ap.parse_args()
+    with metrics.run("translate_fast", profile=args.profile, metrics_file=args.metrics_file):
+        translate_all()
+
+
+def translate_all(questions=None):
+    api_key = gemini.api_key()
+    if questions is None:
+        questions = store.load_questions(DATA)
 
     needs = [q for q in questions if not q.get("question_es")]
     print(f"Remaining: {len(needs)}", flush=True)
 
-    batches = [(i, needs[i:i+BATCH_SIZE]) for i in range(0, len(needs), BATCH_SIZE)]
     done = 0
+    pending = needs
+    for round_no in range(MAX_REQUEUE + 1):
+        if not pending:
+            break
+        if round_no:
+            metrics.count("questions.requeued", len(pending))
+            print(f"Requeue round {round_no}: {len(pending)} questions lost from replies", flush=True)
+        batches = [(i, pending[i:i+BATCH_SIZE]) for i in range(0, len(pending), BATCH_SIZE)]
+        pending = []
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            futures = {pool.submit(process_batch, api_key, b): b for b in batches}
+            for future in as_completed(futures):
+                idx, batch, rmap = future.result()
+                pending.extend(q for q in batch if q["id"] not in rmap)
+                for q in batch:
+                    if q["id"] in rmap:
+                        r = rmap[q["id"]]
+                        for j, orig in enumerate(questions):
+                            if orig["id"] == q["id"]:
+                                questions[j]["question_es"] = r.get("question_es", "")
+                                questions[j]["explanation_es"] = r.get("explanation_es", questions[j].get("explanation_es", ""))
+                                questions[j]["vocabulary"] = r.get("vocabulary", questions[j].get("vocabulary", []))
+                                done += 1
+                                break
+                print(f"  +{len(rmap)} ({done}/{len(needs)})", flush=True)
+
+    store.save_questions(questions, DATA)
+    metrics.count("questions.translated", done)
 
-    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
-        futures = {pool.submit(process_batch, b): b for b in batches}
-        for future in as_completed(futures):
-            idx, batch, rmap = future.result()
-            for q in batch:
-                if q["id"] in rmap:
-                    r = rmap[q["id"]]
-                    for j, orig in enumerate(questions):
-                        if orig["id"] == q["id"]:
-                            questions[j]["question_es"] = r.get("question_es", "")
-                            questions[j]["explanation_es"] = r.get("explanation_es", questions[j].get("explanation_es", ""))
-                            questions[j]["vocabulary"] = r.get("vocabulary", questions[j].get("vocabulary", []))
-                            done += 1
-                            break
-            print(f"  +{len(rmap)} ({done}/{len(needs)})", flush=True)
-
-    with open(DATA, "w") as f:
-        json.dump(questions, f, ensure_ascii=False, indent=2)
-    
     total_es = sum(1 for q in questions if q.get("question_es"))
+    if pending:
+        print(f"Gave up on {len(pending)}: {', '.join(q['id'] for q in pending[:20])}", flush=True)
     print(f"\nDone! {total_es}/{len(questions)} translated total", flush=True)
 
 
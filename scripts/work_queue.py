@@ -0,0 +1,120 @@
+"""Priority order and a resumable on-disk queue for enrichment work.
+
+Priority is a list of rules applied in turn, e.g. the default
+
+    flags:missing_answer_key,options_missing   questions carrying any of these flags first
+    exam_order                                 then exams in the order the app lists them
+    section_order                              then lv1 → sb2 within an exam
+
+with file order breaking ties. The queue is saved as it drains, so a run cut
+short (quota, Ctrl-C) resumes with what was left, in the same order, and the
+observed throughput carries over into the next run's ETA.
+"""
+import json
+import re
+import time
+from pathlib import Path
+
+QUEUE = Path("data/enrich_queue.json")
+APP_JS = Path("app.js")
+DEFAULT_PRIORITY = ["flags:missing_answer_key,options_missing", "exam_order", "section_order"]
+SECTION_ORDER = [("Leseverstehen", 1), ("Leseverstehen", 2), ("Leseverstehen", 3),
+                 ("Sprachbausteine", 1), ("Sprachbausteine", 2)]
+
+
+def app_exam_order(path=APP_JS):
+    """EXAM_ORDER as declared in app.js, so the queue follows what learners see first."""
+    try:
+        src = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return []
+    m = re.search(r"EXAM_ORDER\s*=\s*\[([^\]]*)\]", src)
+    return re.findall(r"['\"]([^'\"]+)['\"]", m.group(1)) if m else []
+
+
+def priority_key(rules, exam_order=None):
+    """Sort key function for questions under the given rules."""
+    exam_rank = {e: i for i, e in enumerate(exam_order if exam_order is not None else app_exam_order())}
+    section_rank = {s: i for i, s in enumerate(SECTION_ORDER)}
+    parts = []
+    for rule in rules:
+        name, _, arg = rule.partition(":")
+        if name == "flags":
+            wanted = {f for f in arg.split(",") if f}
+            parts.append(lambda q, w=wanted: 0 if w & set(q.get("flags") or []) else 1)
+        elif name == "exam_order":
+            parts.append(lambda q: exam_rank.get(q.get("exam"), len(exam_rank)))
+        elif name == "section_order":
+            parts.append(lambda q: section_rank.get((q.get("section"), q.get("teil")), len(section_rank)))
+        else:
+            raise ValueError(f"unknown priority rule {rule!r}")
+    return lambda q: tuple(p(q) for p in parts)
+
+
+def fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class WorkQueue:
+    """Ordered [id, fields] items with done marks and cumulative throughput."""
+
+    def __init__(self, items, spec, path=QUEUE):
+        self.path = Path(path)
+        self.spec = spec            # what the queue was built for; a different spec starts over
+        self.items = items          # [[id, [fields]], ...] in priority order
+        self.done = set()
+        self.observed = {"questions": 0, "seconds": 0.0}
+        self._t0 = time.monotonic()
+        self._run_done = 0
+
+    @classmethod
+    def resume(cls, spec, path=QUEUE):
+        """The saved queue if it was built for the same spec and has work left, else None."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        doc = json.loads(path.read_text(encoding="utf-8"))
+        if doc.get("spec") != spec:
+            return None
+        q = cls(doc["items"], spec, path)
+        q.done = set(doc.get("done", []))
+        q.observed = doc.get("observed", q.observed)
+        return q if q.pending() else None
+
+    def pending(self):
+        return [(qid, fields) for qid, fields in self.items if qid not in self.done]
+
+    def mark_done(self, ids):
+        ids = [i for i in ids if i not in self.done]
+        self.done.update(ids)
+        self._run_done += len(ids)
+
+    def rate(self) -> float:
+        """Questions per second over this and earlier runs."""
+        n = self.observed["questions"] + self._run_done
+        s = self.observed["seconds"] + (time.monotonic() - self._t0)
+        return n / s if s > 0 and n else 0.0
+
+    def eta(self) -> str:
+        left = len(self.items) - len(self.done)
+        rate = self.rate()
+        return fmt_duration(left / rate) if rate else "?"
+
+    def save(self):
+        observed = {
+            "questions": self.observed["questions"] + self._run_done,
+            "seconds": round(self.observed["seconds"] + time.monotonic() - self._t0, 3),
+        }
+        doc = {"v": 1, "spec": self.spec, "items": self.items, "done": sorted(self.done), "observed": observed}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+
+    def finish(self):
+        """Drop the file once everything is done; keep it (for resuming) otherwise."""
+        if not self.pending() and self.path.exists():
+            self.path.unlink()
+        elif self.pending():
+            self.save()
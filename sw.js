@@ -1,4 +1,4 @@
-const CACHE = 'telc-b1-v1';
+const CACHE = 'telc-b1-v3';
 const ASSETS = [
   './',
   './index.html',
@@ -6,13 +6,32 @@ const ASSETS = [
   './app.js',
   './manifest.json',
   './data/questions.json',
+  './data/glossary.json',
+  './data/cards.json',
   './icons/icon-192.png',
   './icons/icon-512.png',
   './icons/icon-maskable-512.png'
 ];
 
+// Data releases (scripts/release_data.py): versions.json names the current
+// version and the deltas from earlier ones, so a cached questions.json is
+// patched step by step instead of downloaded again.
+const DATA_URL = './data/questions.json';
+const VERSIONS_URL = './data/versions.json';
+const VERSION_KEY = './data/questions.version';
+// Built from questions.json (scripts/search_index.py) and cached on first
+// search; dropped when the questions change so the next search refetches it.
+const SEARCH_INDEX_URL = './data/search_index.json';
+const DATA_CHECK_MS = 60 * 60 * 1000;
+let lastDataCheck = 0;
+
 self.addEventListener('install', (e) => {
-  e.waitUntil(caches.open(CACHE).then((c) => c.addAll(ASSETS)));
+  // questions.json past the HTTP cache, like versions.json, so the version it is labelled with is its own
+  const assets = ASSETS.map((url) => (url === DATA_URL ? new Request(url, { cache: 'reload' }) : url));
+  e.waitUntil(
+    caches.open(CACHE)
+      .then((c) => c.addAll(assets).then(() => fetchVersions()).then((v) => v && labelCachedData(c, v)))
+  );
   self.skipWaiting();
 });
 
@@ -24,6 +43,14 @@ self.addEventListener('activate', (e) => {
 });
 
 self.addEventListener('fetch', (e) => {
+  const path = new URL(e.request.url).pathname;
+  if (path.endsWith('/data/versions.json') || path.includes('/data/deltas/')) {
+    return; // always from the network, never cached
+  }
+  if (path.endsWith('/data/questions.json') && Date.now() - lastDataCheck > DATA_CHECK_MS) {
+    lastDataCheck = Date.now();
+    e.waitUntil(refreshData().catch(() => {}));
+  }
   e.respondWith(
     caches.match(e.request).then((cached) => {
       if (cached) return cached;
@@ -37,3 +64,108 @@ self.addEventListener('fetch', (e) => {
     })
   );
 });
+
+async function fetchVersions() {
+  try {
+    const res = await fetch(VERSIONS_URL, { cache: 'no-store' });
+    return res.ok ? res.json() : null;
+  } catch (err) {
+    return null;
+  }
+}
+
+async function cachedVersion(cache) {
+  const res = await cache.match(VERSION_KEY);
+  return res ? Number(await res.text()) : null;
+}
+
+function setCachedVersion(cache, version) {
+  return cache.put(VERSION_KEY, new Response(String(version)));
+}
+
+// content_hash() of scripts/release_data.py: sha256 of json.dumps(questions,
+// ensure_ascii=False, sort_keys=True), first 16 hex digits. Same text for the
+// strings, integers, booleans and nulls the records hold (not for floats).
+function pyJson(v) {
+  if (Array.isArray(v)) return `[${v.map(pyJson).join(', ')}]`;
+  if (v && typeof v === 'object') {
+    return `{${Object.keys(v).sort().map((k) => `${JSON.stringify(k)}: ${pyJson(v[k])}`).join(', ')}}`;
+  }
+  return JSON.stringify(v);
+}
+
+async function contentHash(questions) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(pyJson(questions)));
+  return [...new Uint8Array(digest)].map((b) => b.toString(16).padStart(2, '0')).join('').slice(0, 16);
+}
+
+// The cached questions.json gets versions.current only if it is that release.
+async function labelCachedData(cache, versions) {
+  const res = await cache.match(DATA_URL);
+  if (res && (await contentHash(await res.json())) === versions.hash) {
+    await setCachedVersion(cache, versions.current);
+  }
+}
+
+// Same steps as apply() in scripts/release_data.py.
+function applyDelta(base, delta) {
+  const removed = new Set(delta.removed);
+  const out = [];
+  for (const q of base) {
+    if (removed.has(q.id)) continue;
+    const patch = delta.changed[q.id];
+    if (!patch) {
+      out.push(q);
+      continue;
+    }
+    const next = { ...q, ...patch.set };
+    (patch.unset || []).forEach((k) => delete next[k]);
+    out.push(next);
+  }
+  out.push(...delta.added);
+  if (!delta.order) return out;
+  const byId = new Map(out.map((q) => [q.id, q]));
+  return delta.order.map((id) => byId.get(id));
+}
+
+// The cached questions patched up to versions.current, or null when a step is
+// missing or the result is not the release versions.hash names.
+async function patchedQuestions(cache, versions, have) {
+  const cached = await cache.match(DATA_URL);
+  if (!cached || have === null || have > versions.current) return null;
+  let questions = await cached.json();
+  let v = have;
+  while (v < versions.current) {
+    const step = versions.deltas[String(v)];
+    if (!step) return null;
+    const res = await fetch(step.path, { cache: 'no-store' });
+    if (!res.ok) return null;
+    const delta = await res.json();
+    if (delta.from !== v || delta.to !== step.to) return null;
+    questions = applyDelta(questions, delta);
+    v = delta.to;
+  }
+  if ((await contentHash(questions)) !== versions.hash) return null;
+  return JSON.stringify(questions);
+}
+
+async function refreshData() {
+  const versions = await fetchVersions();
+  if (!versions) return;
+  const cache = await caches.open(CACHE);
+  const have = await cachedVersion(cache);
+  if (have === versions.current) return;
+
+  let body = await patchedQuestions(cache, versions, have).catch(() => null);
+  if (body === null) {
+    const res = await fetch(DATA_URL, { cache: 'no-store' });
+    if (!res.ok) return;
+    body = await res.text();
+  }
+  // cards.json and glossary.json stay as installed: app.js checks both against the questions it loads
+  await cache.put(DATA_URL, new Response(body, { headers: { 'Content-Type': 'application/json' } }));
+  await cache.delete(SEARCH_INDEX_URL);
+  await setCachedVersion(cache, versions.current);
+  const clients = await self.clients.matchAll();
+  clients.forEach((c) => c.postMessage({ type: 'data-updated', version: versions.current }));
+}